@@ -0,0 +1,168 @@
+"""
+Skill co-occurrence (lift, PMI) and salary lift, precomputed per (state,
+role) segment from the sparse X.T @ X of the segment's skill matrix. None
+in a segment key means "any".
+
+    cooc = SkillCooccurrence.for_dataset(get_dataset())
+    cooc.related(skill_id("python"), role="Data Scientist", k=10)
+"""
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from api.salary_stats import SKETCH_MAX, SKETCH_MIN, annual_midpoint
+from api.skills import skill_names, vocabulary_size
+from api.states import normalize_state
+
+# Pairs seen in fewer postings than this are left out of related(). Lift
+# can't exceed N / count(skill), and every rare skill only ever listed next
+# to ``skill`` reaches it, so a low minimum fills the top with those
+MIN_PAIR_COUNT = 20
+
+# Skills listed by fewer salaried postings than this are left out of salary_lift()
+MIN_SALARY_POSTINGS = 20
+
+RELATED_METRICS = ["lift", "pmi", "count"]
+
+
+def _column_values(frame, col):
+    if col not in frame.columns:
+        return np.full(len(frame), "", dtype=object)
+    return frame[col].astype(object).fillna("").astype(str).str.lower().to_numpy(dtype=object)
+
+
+class _Segment:
+    """Co-occurrence and salary arrays for one set of postings."""
+
+    def __init__(self, x, salary):
+        self.n_postings = x.shape[0]
+        self.cooc = (x.T @ x).tocsr()
+        self.cooc.sort_indices()
+        self.skill_counts = self.cooc.diagonal().astype(np.int64)
+
+        # Implausible amounts (mostly hourly pay labelled yearly) would
+        # dominate the means
+        has_salary = (salary >= SKETCH_MIN) & (salary <= SKETCH_MAX)
+        xs = x[has_salary]
+        s = salary[has_salary]
+        self.n_salaried = len(s)
+        self.n_with = np.asarray(xs.sum(axis=0)).ravel().astype(np.int64)
+        self.sum_with = xs.T @ s
+        self.salary_total = float(s.sum())
+
+    def merged(self, other):
+        """A _Segment for this one's postings plus ``other``'s."""
+        out = _Segment.__new__(_Segment)
+        out.n_postings = self.n_postings + other.n_postings
+        out.cooc = (self.cooc + other.cooc).tocsr()
+        out.cooc.sort_indices()
+        out.skill_counts = self.skill_counts + other.skill_counts
+        out.n_salaried = self.n_salaried + other.n_salaried
+        out.n_with = self.n_with + other.n_with
+        out.sum_with = self.sum_with + other.sum_with
+        out.salary_total = self.salary_total + other.salary_total
+        return out
+
+
+def _segments(skills, frame, start=0):
+    """_Segments for rows ``start`` on of ``frame`` (``skills`` is its SkillMatrix)."""
+    x = csr_matrix(
+        (np.ones(len(skills.ids), dtype=np.int32), skills.ids, skills.offsets),
+        shape=(len(skills), vocabulary_size()),
+    )[start:]
+    frame = frame.iloc[start:]
+    n = len(frame)
+    salary = (annual_midpoint(frame) if "min_amount" in frame.columns and "interval" in frame.columns
+              else np.full(n, np.nan))
+    states = _column_values(frame, "state")
+    roles = _column_values(frame, "role")
+
+    masks = {(None, None): np.ones(n, dtype=bool)}
+    for state in np.unique(states[states != ""]):
+        masks[(state, None)] = states == state
+    for role in np.unique(roles[roles != ""]):
+        masks[(None, role)] = roles == role
+    for state, role in set(zip(states.tolist(), roles.tolist())):
+        if state and role:
+            masks[(state, role)] = (states == state) & (roles == role)
+    return {key: _Segment(x[mask], salary[mask]) for key, mask in masks.items()}
+
+
+class SkillCooccurrence:
+    """Per-segment skill co-occurrence and salary lift."""
+
+    def __init__(self, skills, frame):
+        """``skills`` is the frame's SkillMatrix (Dataset.skills)."""
+        self.segments = _segments(skills, frame)
+
+    def extended(self, skills, frame, start):
+        """A new SkillCooccurrence with rows ``start`` on of ``frame`` added."""
+        segments = dict(self.segments)
+        for key, seg in _segments(skills, frame, start).items():
+            segments[key] = segments[key].merged(seg) if key in segments else seg
+        out = SkillCooccurrence.__new__(SkillCooccurrence)
+        out.segments = segments
+        return out
+
+    @classmethod
+    def for_dataset(cls, dataset):
+        """
+        The co-occurrence for ``dataset``, built on first use. Cached per
+        version; ingested rows are added to the previous version's.
+        """
+        return dataset.aggregate("skill_cooccurrence", lambda ds: cls(ds.skills, ds.frame),
+                                 lambda cooc, ds, start: cooc.extended(ds.skills, ds.frame, start))
+
+    def segment(self, state=None, role=None):
+        """The _Segment for the filters, or None if no posting matches them."""
+        key = (normalize_state(state) if state else None, role.strip().lower() if role else None)
+        return self.segments.get(key)
+
+    def related(self, skill, state=None, role=None, k=10, metric="lift", min_count=MIN_PAIR_COUNT):
+        """
+        The ``k`` skills most associated with ``skill`` (an ID, see
+        api.skills.skill_id) in the segment, ranked by ``metric``, as
+        [{"skill", "count", "lift", "pmi"}, ...].
+        """
+        if metric not in RELATED_METRICS:
+            raise ValueError(f"metric must be one of {', '.join(RELATED_METRICS)}")
+        seg = self.segment(state, role)
+        if seg is None or not seg.skill_counts[skill]:
+            return []
+        a, b = seg.cooc.indptr[skill], seg.cooc.indptr[skill + 1]
+        other = seg.cooc.indices[a:b]
+        counts = seg.cooc.data[a:b].astype(np.int64)
+        keep = (other != skill) & (counts >= min_count)
+        other, counts = other[keep], counts[keep]
+
+        lift = counts * seg.n_postings / (seg.skill_counts[skill] * seg.skill_counts[other])
+        pmi = np.log2(lift)
+        score = {"lift": lift, "pmi": pmi, "count": counts}[metric]
+        # Ties go to the pair seen in more postings, then the more frequent skill
+        order = np.lexsort((-seg.skill_counts[other], -counts, -score))[:k]
+        return [
+            {"skill": name, "count": int(c), "lift": round(float(l), 3), "pmi": round(float(p), 3)}
+            for name, c, l, p in zip(skill_names(other[order]), counts[order], lift[order], pmi[order])
+        ]
+
+    def salary_lift(self, state=None, role=None, k=10, min_postings=MIN_SALARY_POSTINGS):
+        """
+        The ``k`` skills whose postings pay most above the segment's other
+        salaried postings, as [{"skill", "postings", "mean_with",
+        "mean_without", "lift"}, ...] with lift = mean_with / mean_without - 1.
+        """
+        seg = self.segment(state, role)
+        if seg is None:
+            return []
+        n_without = seg.n_salaried - seg.n_with
+        ok = (seg.n_with >= min_postings) & (n_without > 0)
+        ids = np.flatnonzero(ok)
+        mean_with = seg.sum_with[ids] / seg.n_with[ids]
+        mean_without = (seg.salary_total - seg.sum_with[ids]) / n_without[ids]
+        lift = mean_with / mean_without - 1
+        order = np.argsort(-lift, kind="stable")[:k]
+        return [
+            {"skill": name, "postings": int(n), "mean_with": round(float(w), 2),
+             "mean_without": round(float(wo), 2), "lift": round(float(l), 4)}
+            for name, n, w, wo, l in zip(skill_names(ids[order]), seg.n_with[ids[order]],
+                                         mean_with[order], mean_without[order], lift[order])
+        ]
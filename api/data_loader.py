@@ -1,42 +1,576 @@
+import numpy as np
 import pandas as pd
+import hashlib
+import json
 import os
+import re
+import threading
+import time
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "processed")
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, every process builds
+    fcntl = None
 
+from api import ingest_log, metrics
+from api.salary_stats import SalarySketches
+from api.skills import ID_COLUMNS, ID_DTYPES, SkillMatrix
 
-# Global cache
-_ALL_STATES_DATA = None
+# JOBS_DATA_DIR points the app at another processed folder (e.g. benchmarks)
+DATA_DIR = os.environ.get(
+    "JOBS_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data", "processed")
+)
 
-def load_all_states_data():
-    """Load the cleaned data for all states from multiple files. Cached."""
-    global _ALL_STATES_DATA
-    if _ALL_STATES_DATA is not None:
-        return _ALL_STATES_DATA
-
-    files = [
-        "all_states_clean.csv",
-        "all_states_business_analyst_clean.csv",
-        "all_states_data_analyst_clean.csv",
-        "all_states_machine_learning_engineer_clean.csv",
-        "all_states_software_engineer_clean.csv",
-        "all_states_DS_PM_clean.csv"
-    ]
-    
+
+# Lists the files that make up the current dataset, e.g.
+#   {"version": "2025-11-20", "files": ["all_states_clean.csv", ...]}
+# Without it, DEFAULT_FILES are used and the version is derived from their
+# sizes and modification times. Written by src/pipeline/build.py, which also
+# adds "skills_index": the parsed_skills SkillMatrix as .npy files,
+# "salary_sketches": the SalarySketches as an .npz file, "job_vectors": the
+# recommender's TF-IDF vectors as .npy files (memory-mapped, see
+# src/analysis/job_vectors.py), "search_index": the api/search.py index as
+# an .npz file, and "ingest_log_rows": how many ingest log rows the build
+# already contains.
+MANIFEST_PATH = os.path.join(DATA_DIR, "manifest.json")
+
+# Postings appended by the ingest worker (src/pipeline/ingest.py) since the
+# last build, see api/ingest_log.py. They are served on top of the built
+# dataset without a rebuild.
+INGEST_LOG_DIR = os.environ.get("JOBS_INGEST_LOG", os.path.join(DATA_DIR, "ingest_log"))
+
+DEFAULT_FILES = [
+    "all_states_clean.csv",
+    "all_states_business_analyst_clean.csv",
+    "all_states_data_analyst_clean.csv",
+    "all_states_machine_learning_engineer_clean.csv",
+    "all_states_software_engineer_clean.csv",
+    "all_states_DS_PM_clean.csv"
+]
+
+# Snapshots of built datasets that every process memory-maps: the frame as
+# an Arrow IPC file, the SkillMatrix as .npy files, the salary sketches and
+# a JSON description, named by version. current.json names the one being
+# served. One process at a time builds a new version (holding build.lock);
+# every process then maps the same files, so workers keep sharing the
+# dataset's pages across reloads instead of each holding a private copy.
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "index", "snapshots")
+SNAPSHOT_CURRENT = os.path.join(SNAPSHOT_DIR, "current.json")
+
+# Global cache: the current Dataset. Replaced as a whole on reload, so a
+# request that already holds a Dataset keeps reading the old version.
+_CURRENT = None
+_RELOAD_LOCK = threading.Lock()
+
+# name -> builder for aggregates, so a reload can rebuild the ones in use
+_AGGREGATE_BUILDERS = {}
+
+# name -> update(value, dataset, start) for aggregates that can take the
+# rows from ``start`` on in without a rebuild (see Dataset.aggregate)
+_AGGREGATE_UPDATERS = {}
+
+# name -> refresh(value) for aggregates the watcher replaces with a
+# refreshed copy on a timer, e.g. to refit what updates left stale
+# (see Dataset.aggregate and start_watcher)
+_AGGREGATE_REFRESHERS = {}
+
+
+# Stored skill ID columns (see api/skills.py). They are moved into
+# Dataset.skills at load time and dropped from the frame.
+SKILL_ID_COLUMNS = ID_COLUMNS
+
+# Explicit schema for the all-states frame. Text columns not listed here are
+# stored as Arrow-backed strings.
+CATEGORY_COLUMNS = [
+    "site", "state", "role", "interval", "currency", "job_type", "salary_source",
+    "company", "location", "company_industry", "company_num_employees",
+    "company_revenue", "job_level", "job_function", "listing_type", "experience_range",
+]
+NUMERIC_COLUMNS = ["min_amount", "max_amount", "company_rating", "company_reviews_count", "skill_count"]
+BOOL_COLUMNS = ["is_remote"]
+DATE_COLUMNS = ["date_posted"]
+
+
+def _downcast_numeric(s):
+    """Smallest nullable numeric dtype that holds ``s`` without loss."""
+    s = pd.to_numeric(s, errors="coerce")
+    values = s.dropna()
+    if not len(values):
+        return s.astype("Float32")
+    if (values % 1 == 0).all() and values.abs().max() < 2**31:
+        return s.astype("Int32")
+    as_f32 = values.astype("float32").astype("float64")
+    if (as_f32 == values).all():
+        return s.astype("Float32")
+    return s.astype("Float64")
+
+
+def _to_bool(s):
+    mapped = s.map({True: True, False: False, "True": True, "False": False,
+                    "true": True, "false": False})
+    return mapped.astype("boolean")
+
+
+def apply_schema(df):
+    """
+    Convert a raw concatenated frame to the explicit column schema.
+
+    Low-cardinality text becomes categorical, other text is stored as
+    Arrow-backed strings, salaries and counts use the smallest lossless
+    nullable numeric type, is_remote is a real boolean and date_posted a
+    datetime.
+
+    Besides the memory savings, object columns hold one Python object per
+    cell, and touching their refcounts after a fork dirties the pages
+    shared with the gunicorn master. Arrow strings and categorical codes
+    live in a few contiguous buffers, so a frame loaded before fork stays
+    shared across workers.
+    """
+    for col in df.columns:
+        if col in CATEGORY_COLUMNS:
+            df[col] = df[col].astype("category")
+        elif col in NUMERIC_COLUMNS:
+            df[col] = _downcast_numeric(df[col])
+        elif col in BOOL_COLUMNS:
+            df[col] = _to_bool(df[col])
+        elif col in DATE_COLUMNS:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+        elif df[col].dtype == object:
+            df[col] = df[col].astype("string[pyarrow]")
+    return df
+
+
+def memory_report(df):
+    """Deep memory usage in bytes, per column and in total."""
+    usage = df.memory_usage(deep=True, index=False)
+    return {"total": int(usage.sum()), "columns": {c: int(b) for c, b in usage.items()}}
+
+
+class Dataset:
+    """One version of the all-states data plus aggregates derived from it."""
+
+    def __init__(self, frame, version, modified, memory=None, skills=None, salary=None,
+                 base_version=None, log_rows=0, base_rows=None):
+        self.frame = frame
+        self.version = version
+        # Manifest version of the build, and the ingest log rows read on top
+        # of it (version is "{base_version}+{log_rows}" once there are any)
+        self.base_version = base_version or version
+        self.log_rows = log_rows
+        # Rows of frame from the build; the ones after come from the log
+        self.base_rows = len(frame) if base_rows is None else base_rows
+        # parsed_skills as a SkillMatrix, row-aligned with frame
+        self.skills = skills if skills is not None else SkillMatrix.from_columns(n=len(frame))
+        # Yearly salary statistics per (state, role, remote) segment
+        self.salary = salary if salary is not None else SalarySketches.from_frame(frame)
+        # Frame size in bytes before and after apply_schema
+        self.memory = memory or {}
+        # Unix time of the newest source file, for Last-Modified headers
+        self.modified = modified
+        self._aggregates = {}
+        self._lock = threading.Lock()
+
+    def aggregate(self, name, builder, update=None, refresh=None):
+        """
+        Return ``builder(self)``, computed once per dataset version.
+
+        With ``update``, a dataset extended by ingested rows gets the
+        aggregate as ``update(old_value, new_dataset, start)`` instead of a
+        rebuild, ``start`` being the position of the first new row. With
+        ``refresh``, the watcher periodically replaces the value with
+        ``refresh(value)`` (see refresh_aggregates).
+        """
+        metrics.count_cache(f"aggregate:{name}", name in self._aggregates)
+        if name not in self._aggregates:
+            with self._lock:
+                if name not in self._aggregates:
+                    _AGGREGATE_BUILDERS[name] = builder
+                    if update is not None:
+                        _AGGREGATE_UPDATERS[name] = update
+                    if refresh is not None:
+                        _AGGREGATE_REFRESHERS[name] = refresh
+                    self._aggregates[name] = builder(self)
+        return self._aggregates[name]
+
+    def refresh_aggregates(self):
+        """Replace each aggregate that has a refresher with ``refresh(value)``."""
+        for name, value in list(self._aggregates.items()):
+            refresh = _AGGREGATE_REFRESHERS.get(name)
+            if refresh is not None:
+                refreshed = refresh(value)
+                with self._lock:
+                    self._aggregates[name] = refreshed
+
+
+def read_manifest():
+    """Return (version, files, modified) for the dataset on disk. ValueError if the manifest is invalid."""
+    if os.path.exists(MANIFEST_PATH):
+        with open(MANIFEST_PATH) as f:
+            manifest = json.load(f)
+        if not isinstance(manifest, dict) or not manifest.get("version"):
+            raise ValueError(f"{MANIFEST_PATH} has no version")
+        files = manifest.get("files", DEFAULT_FILES)
+        version = str(manifest["version"])
+        modified = os.path.getmtime(MANIFEST_PATH)
+        return version, files, modified
+
+    files = DEFAULT_FILES
+    digest = hashlib.sha1()
+    modified = 0.0
+    for f in files:
+        path = os.path.join(DATA_DIR, f)
+        if os.path.exists(path):
+            st = os.stat(path)
+            digest.update(f"{f}:{st.st_size}:{st.st_mtime_ns};".encode())
+            modified = max(modified, st.st_mtime)
+    return digest.hexdigest()[:12], files, modified
+
+
+def _manifest_entry(key):
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH) as f:
+        return json.load(f).get(key)
+
+
+def _load_skill_index(n_rows):
+    """The manifest's prebuilt SkillMatrix, if it has one matching ``n_rows``."""
+    entry = _manifest_entry("skills_index")
+    if not entry:
+        return None
+    try:
+        offsets = np.load(os.path.join(DATA_DIR, entry["offsets"]))
+        ids = np.load(os.path.join(DATA_DIR, entry["ids"]))
+    except (OSError, ValueError) as e:
+        print(f"Error loading skills index: {e}")
+        return None
+    if len(offsets) != n_rows + 1:
+        return None
+    return SkillMatrix(offsets, ids)
+
+
+def _load_salary_sketches(n_rows):
+    """The manifest's prebuilt SalarySketches, if it has one matching ``n_rows``."""
+    entry = _manifest_entry("salary_sketches")
+    if not entry:
+        return None
+    try:
+        sketches = SalarySketches.load(os.path.join(DATA_DIR, entry))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading salary sketches: {e}")
+        return None
+    if sketches.n_rows != n_rows:
+        return None
+    return sketches
+
+
+def append_frames(frame, rows):
+    """``frame`` followed by ``rows`` (both after apply_schema), keeping the schema."""
+    combined = pd.concat([frame, rows], ignore_index=True)
+    # Categoricals with different categories come out of concat as plain
+    # strings, and columns missing on one side as object
+    changed = [c for c in combined.columns
+               if combined[c].dtype == object
+               or (c in frame.columns and isinstance(frame[c].dtype, pd.CategoricalDtype)
+                   and not isinstance(combined[c].dtype, pd.CategoricalDtype))]
+    if changed:
+        combined[changed] = apply_schema(combined[changed].copy())
+    return combined
+
+
+def _extend_dataset(old, rows, end, modified):
+    """A new Dataset: ``old`` plus ingest log ``rows`` (the log up to row ``end``)."""
+    skills = SkillMatrix.from_columns(rows.get("parsed_skill_ids"), rows.get("parsed_skills"),
+                                      n=len(rows))
+    rows = rows.drop(columns=SKILL_ID_COLUMNS, errors="ignore")
+    salary = SalarySketches.from_frame(rows)
+    rows = apply_schema(rows)
+    frame = append_frames(old.frame, rows) if len(old.frame.columns) else rows
+
+    version = f"{old.base_version}+{end}"
+    new = Dataset(frame, version, max(old.modified, modified), old.memory,
+                  old.skills.concat(skills), old.salary.merge(salary),
+                  base_version=old.base_version, log_rows=end, base_rows=old.base_rows)
+    print(f"Added {len(rows)} ingested rows, version {version}")
+    return new
+
+
+def _build_dataset(version, files, modified):
     dfs = []
     for f in files:
         path = os.path.join(DATA_DIR, f)
         if os.path.exists(path):
             try:
-                dfs.append(pd.read_csv(path))
+                dfs.append(pd.read_csv(path, dtype=ID_DTYPES))
             except Exception as e:
                 print(f"Error loading {f}: {e}")
-    
+
+    memory = {}
+    skills = None
+    salary = None
     if not dfs:
-        _ALL_STATES_DATA = pd.DataFrame()
+        frame = pd.DataFrame()
     else:
-        _ALL_STATES_DATA = pd.concat(dfs, ignore_index=True)
-        
-    return _ALL_STATES_DATA
+        frame = pd.concat(dfs, ignore_index=True)
+        skills = _load_skill_index(len(frame))
+        if skills is None:
+            skills = SkillMatrix.from_columns(frame.get("parsed_skill_ids"), frame.get("parsed_skills"))
+        frame = frame.drop(columns=SKILL_ID_COLUMNS, errors="ignore")
+        salary = _load_salary_sketches(len(frame))
+        memory["raw_bytes"] = memory_report(frame)["total"]
+        frame = apply_schema(frame)
+        memory["bytes"] = memory_report(frame)["total"]
+        print(
+            f"Loaded {len(frame)} rows, version {version}: "
+            f"{memory['raw_bytes'] / 2**20:.1f} MB -> {memory['bytes'] / 2**20:.1f} MB"
+        )
+
+    # Log rows the build already contains (all of them if the log was reset since)
+    start = min(_manifest_entry("ingest_log_rows") or 0, ingest_log.log_size(INGEST_LOG_DIR))
+    base = Dataset(frame, version, modified, memory, skills, salary, log_rows=start)
+    return _read_log(base, start)
+
+
+def _read_log(dataset, start):
+    """``dataset`` extended by the ingest log rows from ``start`` on, if there are any."""
+    rows, end = ingest_log.read_rows(INGEST_LOG_DIR, start)
+    if not len(rows):
+        return dataset
+    modified = os.path.getmtime(ingest_log.list_parts(INGEST_LOG_DIR)[-1][2])
+    return _extend_dataset(dataset, rows, end, modified)
+
+
+def _snapshot_path(key, suffix):
+    return os.path.join(SNAPSHOT_DIR, f"{key}.{suffix}")
+
+
+def _snapshot_key(version):
+    return re.sub(r"[^A-Za-z0-9_+-]", "_", version)
+
+
+def _current_snapshot():
+    """Key of the snapshot being served, or None."""
+    try:
+        with open(SNAPSHOT_CURRENT) as f:
+            return json.load(f)["key"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _snapshot_meta(key):
+    with open(_snapshot_path(key, "json")) as f:
+        return json.load(f)
+
+
+def _replace_with(path, write, mode="wb"):
+    """Write ``path`` through a temp file, so readers never see a partial one."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, mode) as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def _write_snapshot(dataset):
+    """Save ``dataset`` as a snapshot and make it the current one."""
+    import pyarrow as pa
+
+    key = _snapshot_key(dataset.version)
+    previous = _current_snapshot()
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+
+    table = pa.Table.from_pandas(dataset.frame, preserve_index=False)
+
+    def write_table(f):
+        with pa.ipc.new_file(f, table.schema) as writer:
+            writer.write_table(table)
+
+    _replace_with(_snapshot_path(key, "arrow"), write_table)
+    _replace_with(_snapshot_path(key, "skills_offsets.npy"), lambda f: np.save(f, dataset.skills.offsets))
+    _replace_with(_snapshot_path(key, "skills_ids.npy"), lambda f: np.save(f, dataset.skills.ids))
+    _replace_with(_snapshot_path(key, "salary.npz"), dataset.salary.save)
+    meta = {
+        "version": dataset.version, "base_version": dataset.base_version,
+        "log_rows": dataset.log_rows, "base_rows": dataset.base_rows,
+        "modified": dataset.modified, "memory": dataset.memory,
+    }
+    _replace_with(_snapshot_path(key, "json"), lambda f: json.dump(meta, f), mode="w")
+    _replace_with(SNAPSHOT_CURRENT, lambda f: json.dump({"key": key}, f), mode="w")
+
+    # Processes still mapping an older snapshot keep its pages after the
+    # files are removed; the previous one stays for those about to load it
+    for name in os.listdir(SNAPSHOT_DIR):
+        if name.split(".", 1)[0] not in (key, previous, "current", "build"):
+            try:
+                os.remove(os.path.join(SNAPSHOT_DIR, name))
+            except OSError:
+                pass
+
+
+def _load_snapshot(key):
+    """The Dataset saved as snapshot ``key``, its frame and skills memory-mapped."""
+    import pyarrow as pa
+
+    meta = _snapshot_meta(key)
+    source = pa.memory_map(_snapshot_path(key, "arrow"))
+    # Arrow-backed string columns stay views of the mapped file
+    frame = pa.ipc.open_file(source).read_all().to_pandas()
+    skills = SkillMatrix(np.load(_snapshot_path(key, "skills_offsets.npy"), mmap_mode="r"),
+                         np.load(_snapshot_path(key, "skills_ids.npy"), mmap_mode="r"))
+    salary = SalarySketches.load(_snapshot_path(key, "salary.npz"))
+    return Dataset(frame, meta["version"], meta["modified"], meta["memory"], skills, salary,
+                   base_version=meta["base_version"], log_rows=meta["log_rows"],
+                   base_rows=meta["base_rows"])
+
+
+def _lock_builds(blocking):
+    """An open, locked SNAPSHOT_DIR/build.lock, or None if another process holds it."""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    f = open(os.path.join(SNAPSHOT_DIR, "build.lock"), "w")
+    if fcntl is not None:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            f.close()
+            return None
+    return f
+
+
+def _update_snapshot(force=False):
+    """
+    Build a snapshot for the manifest and ingest log if the current one is
+    out of date. If only the log grew, its new rows are appended to the
+    current snapshot's dataset.
+    """
+    version, files, modified = read_manifest()
+    log_rows = ingest_log.log_size(INGEST_LOG_DIR)
+    key = _current_snapshot()
+    meta = _snapshot_meta(key) if key else None
+    # A log shorter than what was read means it was reset: full build
+    if meta and meta["base_version"] == version and log_rows >= meta["log_rows"] and not force:
+        if log_rows == meta["log_rows"]:
+            return
+        old = _CURRENT if _CURRENT is not None and _CURRENT.version == meta["version"] \
+            else _load_snapshot(key)
+        with metrics.span("dataset.ingest"):
+            new = _read_log(old, meta["log_rows"])
+        if new is not old:
+            _write_snapshot(new)
+        return
+
+    with metrics.span("dataset.load"):
+        new = _build_dataset(version, files, modified)
+    _write_snapshot(new)
+
+
+def get_dataset():
+    """Return the current Dataset, loading it on first use. Cached."""
+    if _CURRENT is None:
+        reload_dataset()
+    return _CURRENT
+
+
+def current_version():
+    """Version string of the dataset currently being served."""
+    return get_dataset().version
+
+
+def reload_dataset(force=False):
+    """
+    Swap in the current dataset snapshot, building it first if the manifest
+    or the ingest log changed (see SNAPSHOT_DIR).
+
+    Only one process builds at a time; the others skip the build and load
+    its snapshot on a later check. If the build fails (e.g. an invalid
+    manifest), the last good snapshot keeps being served. The new dataset
+    and every aggregate in use on the old version are loaded before the
+    swap, so requests never see a half-built dataset. If only ingested rows
+    were added, aggregates that have an updater are updated instead of
+    rebuilt. Returns True if a new version was installed.
+    """
+    global _CURRENT
+    with _RELOAD_LOCK:
+        # Wait for a build in progress when there is nothing to serve yet
+        lock = _lock_builds(blocking=_CURRENT is None or force)
+        if lock is not None:
+            try:
+                _update_snapshot(force)
+            except Exception as e:
+                if _current_snapshot() is None:
+                    raise
+                print(f"Error building dataset, serving the last good one: {e}")
+            finally:
+                lock.close()
+
+        key = _current_snapshot()
+        old = _CURRENT
+        if key is None or (old is not None and _snapshot_key(old.version) == key and not force):
+            return False
+        new = _load_snapshot(key)
+
+        if old is not None:
+            appended = (new.base_version == old.base_version and new.base_rows == old.base_rows
+                        and len(new.frame) > len(old.frame))
+            for name, value in list(old._aggregates.items()):
+                if appended and name in _AGGREGATE_UPDATERS:
+                    with new._lock:
+                        new._aggregates[name] = _AGGREGATE_UPDATERS[name](value, new, len(old.frame))
+                else:
+                    new.aggregate(name, _AGGREGATE_BUILDERS[name])
+
+        _CURRENT = new
+        return True
+
+
+def refresh_aggregates():
+    """Run the current dataset's aggregate refreshers (see Dataset.aggregate)."""
+    with _RELOAD_LOCK:
+        if _CURRENT is not None:
+            _CURRENT.refresh_aggregates()
+
+
+def start_watcher(interval=None, refresh_interval=None):
+    """
+    Poll the manifest every ``interval`` seconds and reload in the background,
+    and refresh the aggregates every ``refresh_interval`` seconds.
+
+    Default to the DATASET_WATCH_INTERVAL (60s) and DATASET_REFRESH_INTERVAL
+    (3600s) environment variables; an interval of 0 disables watching
+    (and refreshing), a refresh interval of 0 only refreshing. Threads
+    don't survive fork, so under gunicorn this is called from each worker
+    (see gunicorn.conf.py); the build lock makes one of them build each new
+    version and the others map it.
+    """
+    if interval is None:
+        interval = float(os.environ.get("DATASET_WATCH_INTERVAL", 60))
+    if refresh_interval is None:
+        refresh_interval = float(os.environ.get("DATASET_REFRESH_INTERVAL", 3600))
+    if interval <= 0:
+        return None
+
+    def watch():
+        last_refresh = time.monotonic()
+        while True:
+            time.sleep(interval)
+            try:
+                if reload_dataset():
+                    print(f"Loaded dataset version {_CURRENT.version}")
+            except Exception as e:
+                print(f"Error reloading dataset: {e}")
+            if refresh_interval > 0 and time.monotonic() - last_refresh >= refresh_interval:
+                last_refresh = time.monotonic()
+                try:
+                    refresh_aggregates()
+                except Exception as e:
+                    print(f"Error refreshing aggregates: {e}")
+
+    thread = threading.Thread(target=watch, name="dataset-watcher", daemon=True)
+    thread.start()
+    return thread
+
+
+def load_all_states_data():
+    """Load the cleaned data for all states from multiple files. Cached."""
+    return get_dataset().frame
 
 
 def load_california_data():
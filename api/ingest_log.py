@@ -0,0 +1,89 @@
+"""
+Append-only log of postings ingested after the dataset was built: a folder
+of Parquet parts named by the log rows they hold
+(``000000000000-000000000250.parquet`` is rows 0..249). Parts are renamed
+into place whole and never change, so readers can ask for the rows after
+the ones they have.
+"""
+import os
+import re
+
+import pandas as pd
+
+_PART_RE = re.compile(r"^(\d{12})-(\d{12})\.parquet$")
+
+
+def list_parts(log_dir):
+    """[(start, end, path), ...] covering the log in order, without overlaps."""
+    if not os.path.isdir(log_dir):
+        return []
+    parts = []
+    for name in os.listdir(log_dir):
+        m = _PART_RE.match(name)
+        if m:
+            parts.append((int(m.group(1)), int(m.group(2)), os.path.join(log_dir, name)))
+    # Widest part first for each start, then drop parts inside an earlier one
+    parts.sort(key=lambda p: (p[0], -p[1]))
+    out = []
+    for start, end, path in parts:
+        if out and end <= out[-1][1]:
+            continue
+        out.append((start, end, path))
+    return out
+
+
+def log_size(log_dir):
+    """Number of rows in the log."""
+    parts = list_parts(log_dir)
+    return parts[-1][1] if parts else 0
+
+
+def read_rows(log_dir, start=0):
+    """
+    Log rows from ``start`` on as a DataFrame, and the row count they end at.
+    Retries if a compaction removes a part while it is being read.
+    """
+    for attempt in range(3):
+        parts = [p for p in list_parts(log_dir) if p[1] > start]
+        try:
+            frames = [pd.read_parquet(path).iloc[max(start - first, 0):]
+                      for first, _, path in parts]
+        except FileNotFoundError:
+            if attempt == 2:
+                raise
+            continue
+        end = parts[-1][1] if parts else start
+        if not frames:
+            return pd.DataFrame(), end
+        return pd.concat(frames, ignore_index=True), end
+
+
+def append_rows(log_dir, df):
+    """Append ``df`` as a new part. Returns the log size after it. Single writer only."""
+    if not len(df):
+        return log_size(log_dir)
+    os.makedirs(log_dir, exist_ok=True)
+    start = log_size(log_dir)
+    end = start + len(df)
+    _write_part(df.reset_index(drop=True), start, end, log_dir)
+    return end
+
+
+def compact(log_dir, max_parts=1):
+    """Merge the log into one part if it has more than ``max_parts``. Returns True if it did."""
+    parts = list_parts(log_dir)
+    if len(parts) <= max_parts:
+        return False
+    rows, end = read_rows(log_dir)
+    _write_part(rows, parts[0][0], end, log_dir)
+    for _, _, path in parts:
+        os.remove(path)
+    print(f"Compacted {len(parts)} log parts into one ({end} rows)")
+    return True
+
+
+def _write_part(df, start, end, log_dir):
+    path = os.path.join(log_dir, f"{start:012d}-{end:012d}.parquet")
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
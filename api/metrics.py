@@ -0,0 +1,268 @@
+"""
+Lightweight in-process metrics with a Prometheus text endpoint, on with
+APP_METRICS=1 (see the README for gunicorn). When off, the helpers return
+immediately.
+
+    with metrics.span("recommend.tfidf_score"):
+        ...
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+ENABLED = os.environ.get("APP_METRICS", "0") == "1"
+
+# Folder the worker processes share their metrics through (see the README)
+MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+FLUSH_INTERVAL = float(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_HELP = {
+    "app_request_seconds": ("histogram", "Request latency by route"),
+    "app_stage_seconds": ("histogram", "Time spent in a named stage of a request"),
+    "app_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+}
+
+_NOOP = nullcontext()
+_LOCK = threading.Lock()
+
+# (name, sorted label items) -> [bucket counts..., sum, count] or counter value
+_HISTOGRAMS = {}
+_COUNTERS = {}
+_LAST_FLUSH = 0.0
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def observe(name, seconds, **labels):
+    """Record one observation in histogram ``name``."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        hist = _HISTOGRAMS.get(key)
+        if hist is None:
+            hist = _HISTOGRAMS[key] = [0] * len(BUCKETS) + [0.0, 0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                hist[i] += 1
+                break
+        hist[-2] += seconds
+        hist[-1] += 1
+
+
+def inc(name, amount=1, **labels):
+    """Add ``amount`` to counter ``name``."""
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _LOCK:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + amount
+
+
+def count_cache(cache, hit):
+    """Count a hit or miss on a named cache."""
+    inc("app_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+@contextmanager
+def _timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe("app_stage_seconds", time.perf_counter() - start, stage=stage)
+
+
+def span(stage):
+    """Context manager timing a named stage into app_stage_seconds."""
+    if not ENABLED:
+        return _NOOP
+    return _timed(stage)
+
+
+def _escape(value):
+    """A label value escaped as the text format requires: backslash, quote, newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(items, extra=()):
+    parts = [f'{k}="{_escape(v)}"' for k, v in list(items) + list(extra)]
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _snapshot():
+    with _LOCK:
+        return {k: list(v) for k, v in _HISTOGRAMS.items()}, dict(_COUNTERS)
+
+
+def _write_json(path, hists, counters):
+    data = {
+        "histograms": [[name, items, values] for (name, items), values in hists.items()],
+        "counters": [[name, items, value] for (name, items), value in counters.items()],
+    }
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_json(path):
+    with open(path) as f:
+        data = json.load(f)
+    hists = {(name, tuple(map(tuple, items))): values for name, items, values in data["histograms"]}
+    counters = {(name, tuple(map(tuple, items))): value for name, items, value in data["counters"]}
+    return hists, counters
+
+
+def _add(hists, counters, more_hists, more_counters):
+    for key, values in more_hists.items():
+        hist = hists.setdefault(key, [0] * len(BUCKETS) + [0.0, 0])
+        for i, value in enumerate(values):
+            hist[i] += value
+    for key, value in more_counters.items():
+        counters[key] = counters.get(key, 0) + value
+
+
+def _reset_after_fork():
+    # A forked worker starts from zero; what the parent recorded stays
+    # counted under the parent (see gunicorn.conf.py when_ready)
+    global _LOCK, _LAST_FLUSH
+    _LOCK = threading.Lock()
+    _HISTOGRAMS.clear()
+    _COUNTERS.clear()
+    _LAST_FLUSH = 0.0
+
+
+if MULTIPROC_DIR and hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def flush(force=False):
+    """Write this process's metrics to MULTIPROC_DIR, at most every FLUSH_INTERVAL seconds unless ``force``."""
+    global _LAST_FLUSH
+    if not ENABLED or not MULTIPROC_DIR:
+        return
+    now = time.monotonic()
+    with _LOCK:
+        if not force and now - _LAST_FLUSH < FLUSH_INTERVAL:
+            return
+        _LAST_FLUSH = now
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+    _write_json(os.path.join(MULTIPROC_DIR, f"{os.getpid()}.json"), *_snapshot())
+
+
+def mark_process_dead(pid):
+    """
+    Fold an exited worker's metrics into MULTIPROC_DIR/exited.json (gunicorn
+    child_exit), so its counts stay in the totals and a new process with
+    the same pid starts from zero.
+    """
+    if not MULTIPROC_DIR:
+        return
+    path = os.path.join(MULTIPROC_DIR, f"{pid}.json")
+    exited = os.path.join(MULTIPROC_DIR, "exited.json")
+    try:
+        hists, counters = _read_json(path)
+    except (OSError, ValueError):
+        return
+    if os.path.exists(exited):
+        _add(hists, counters, *_read_json(exited))
+    _write_json(exited, hists, counters)
+    os.remove(path)
+
+
+def clear_multiproc_dir():
+    """Remove the metrics of a previous server run (gunicorn on_starting)."""
+    if MULTIPROC_DIR:
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.json")):
+            os.remove(path)
+
+
+def collect():
+    """
+    (histograms, counters) of this process, plus those of the other
+    processes in MULTIPROC_DIR if it is set.
+    """
+    hists, counters = _snapshot()
+    if MULTIPROC_DIR:
+        own = os.path.join(MULTIPROC_DIR, f"{os.getpid()}.json")
+        for path in glob.glob(os.path.join(MULTIPROC_DIR, "*.json")):
+            if path == own:
+                continue
+            try:
+                _add(hists, counters, *_read_json(path))
+            except (OSError, ValueError):
+                # Removed by child_exit since the listing
+                pass
+    return hists, counters
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (see collect)."""
+    hists, counters = collect()
+
+    lines = []
+    names = sorted({k[0] for k in hists} | {k[0] for k in counters})
+    for name in names:
+        kind, text = _HELP.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (n, items), value in sorted(counters.items()):
+            if n == name:
+                lines.append(f"{name}{_labels(items)} {value}")
+        for (n, items), hist in sorted(hists.items()):
+            if n != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(BUCKETS, hist):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(items, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(items, [('le', '+Inf')])} {hist[-1]}")
+            lines.append(f"{name}_sum{_labels(items)} {hist[-2]:.6f}")
+            lines.append(f"{name}_count{_labels(items)} {hist[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+def init_app(app, route_labels=None):
+    """
+    Time every request of a Flask app and serve GET /metrics.
+
+    ``route_labels`` is an optional callable returning extra labels for the
+    current request (e.g. its filter parameters). Does nothing unless
+    metrics are enabled.
+    """
+    if not ENABLED:
+        return
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None and request.endpoint != "metrics":
+            labels = {
+                "route": request.url_rule.rule if request.url_rule else "unmatched",
+                "method": request.method,
+                "status": str(response.status_code),
+            }
+            if route_labels is not None:
+                labels.update(route_labels())
+            observe("app_request_seconds", time.perf_counter() - start, **labels)
+        flush()
+        return response
+
+    @app.route("/metrics")
+    def metrics():
+        return app.response_class(render(), mimetype="text/plain; version=0.0.4")
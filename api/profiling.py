@@ -0,0 +1,167 @@
+"""
+Opt-in request profiler for the Flask app (set PROFILE_DIR, see the README),
+plus a CLI to read the results.
+
+    python -m api.profiling top /tmp/profiles -n 25 --route /recommend
+"""
+import argparse
+import cProfile
+import glob
+import json
+import os
+import pstats
+import random
+import re
+import sys
+import time
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR")
+THRESHOLD_MS = float(os.environ.get("PROFILE_THRESHOLD_MS", 500))
+SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 1.0))
+MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 200))
+ENGINE = os.environ.get("PROFILE_ENGINE", "cprofile")
+
+
+def _rotate(directory, keep):
+    """Delete the oldest captures so at most ``keep`` remain."""
+    metas = sorted(glob.glob(os.path.join(directory, "*.json")))
+    for meta in metas[:max(len(metas) - keep, 0)]:
+        stem = meta[:-len(".json")]
+        for path in glob.glob(stem + ".*"):
+            os.remove(path)
+
+
+def _write_capture(directory, profiler, meta):
+    os.makedirs(directory, exist_ok=True)
+    route = re.sub(r"[^A-Za-z0-9]+", "_", meta["path"]).strip("_") or "root"
+    stem = os.path.join(
+        directory,
+        f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{route}-{int(meta['duration_ms'])}ms",
+    )
+    if isinstance(profiler, cProfile.Profile):
+        profiler.dump_stats(stem + ".prof")
+    else:
+        with open(stem + ".html", "w") as f:
+            f.write(profiler.output_html())
+    with open(stem + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+    _rotate(directory, MAX_FILES)
+
+
+def init_app(app):
+    """Profile sampled requests of a Flask app. Does nothing unless PROFILE_DIR is set."""
+    if not PROFILE_DIR:
+        return
+
+    from flask import g, request
+
+    use_pyinstrument = False
+    if ENGINE == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+            use_pyinstrument = True
+        except ImportError:
+            app.logger.warning("pyinstrument not installed, profiling with cProfile only")
+
+    @app.before_request
+    def _start_profile():
+        if random.random() >= SAMPLE_RATE:
+            return
+        if use_pyinstrument:
+            from pyinstrument import Profiler
+
+            g.profiler = Profiler()
+            g.profiler.start()
+        else:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        g.profile_start = time.perf_counter()
+
+    @app.after_request
+    def _record_status(response):
+        if "profiler" in g:
+            g.profile_status = response.status_code
+        return response
+
+    # Teardown also runs when the view raised (after_request may not), so
+    # the profiler is always stopped before the next request
+    @app.teardown_request
+    def _finish_profile(exc):
+        profiler = g.pop("profiler", None)
+        if profiler is None:
+            return
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+        else:
+            profiler.stop()
+        duration_ms = (time.perf_counter() - g.pop("profile_start")) * 1000
+        if duration_ms >= THRESHOLD_MS:
+            meta = {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "pid": os.getpid(),
+                "method": request.method,
+                "path": request.path,
+                "route": request.url_rule.rule if request.url_rule else None,
+                "query": request.query_string.decode(errors="replace"),
+                "status": g.pop("profile_status", 500),
+                "duration_ms": round(duration_ms, 2),
+                "engine": "pyinstrument" if use_pyinstrument else "cprofile",
+            }
+            if exc is not None:
+                meta["error"] = repr(exc)
+            try:
+                _write_capture(PROFILE_DIR, profiler, meta)
+            except OSError as e:
+                app.logger.warning(f"Could not write profile: {e}")
+
+
+def top(directory, limit=25, sort="cumulative", route=None):
+    """Print the hottest functions across all captures in ``directory``."""
+    captures = []
+    for meta_path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        prof_path = meta_path[:-len(".json")] + ".prof"
+        if not os.path.exists(prof_path):
+            continue
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if route and meta.get("route") != route and meta.get("path") != route:
+            continue
+        captures.append((meta, prof_path))
+
+    if not captures:
+        print(f"No profiles found in {directory}")
+        return
+
+    by_route = {}
+    for meta, _ in captures:
+        by_route.setdefault(meta.get("route") or meta["path"], []).append(meta["duration_ms"])
+    print(f"{len(captures)} captures")
+    for name, durations in sorted(by_route.items()):
+        print(f"  {name}: {len(durations)} requests, "
+              f"mean {sum(durations) / len(durations):.0f} ms, max {max(durations):.0f} ms")
+    print()
+
+    stats = pstats.Stats(captures[0][1], stream=sys.stdout)
+    for _, prof_path in captures[1:]:
+        stats.add(prof_path)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect captured request profiles")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_top = sub.add_parser("top", help="hottest functions across captured profiles")
+    p_top.add_argument("directory", nargs="?", default=PROFILE_DIR)
+    p_top.add_argument("-n", "--limit", type=int, default=25)
+    p_top.add_argument("--sort", default="cumulative",
+                       choices=["cumulative", "tottime", "ncalls"])
+    p_top.add_argument("--route", help="only profiles for this route or path")
+    args = parser.parse_args(argv)
+
+    if not args.directory:
+        parser.error("directory is required when PROFILE_DIR is not set")
+    top(args.directory, limit=args.limit, sort=args.sort, route=args.route)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+import numpy as np
+import pandas as pd
+
+from api.states import normalize_state
+
+# Quantiles returned with a binned salary response unless ?quantiles= is given
+DEFAULT_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+# Upper bound on ?bins= so a request can't ask for a huge payload
+MAX_BINS = 500
+
+# Multiplier from a posting's pay interval to a yearly amount
+ANNUAL_FACTORS = {"yearly": 1, "monthly": 12, "weekly": 52, "daily": 260, "hourly": 2080}
+
+# Yearly amounts outside this range are treated as data errors, and
+# amounts that only exceed CONVERTED_MAX after converting from a shorter
+# interval as yearly already (see annual_midpoint)
+ANNUAL_MIN = 10_000
+ANNUAL_MAX = 1_000_000
+CONVERTED_MAX = 500_000
+
+
+def _float_list(text, name):
+    try:
+        return [float(x) for x in text.split(",") if x.strip()]
+    except ValueError:
+        raise ValueError(f"{name} must be a comma separated list of numbers")
+
+
+def annual_midpoint(df):
+    """
+    Midpoint of min_amount and max_amount converted to a yearly amount, as
+    a float array (NaN where the salary or its interval is unknown).
+
+    Some postings give yearly amounts under an hourly or monthly interval
+    (e.g. 191360-291200 "hourly"): a midpoint that is a yearly amount on
+    its own but above CONVERTED_MAX once converted is taken as yearly
+    already. Anything outside ANNUAL_MIN..ANNUAL_MAX is NaN.
+    """
+    min_amount = pd.to_numeric(df["min_amount"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    max_amount = pd.to_numeric(df["max_amount"], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    factor = df["interval"].astype(object).map(ANNUAL_FACTORS).to_numpy(dtype=float, na_value=np.nan)
+    midpoint = (min_amount + max_amount) / 2
+    annual = midpoint * factor
+    with np.errstate(invalid="ignore"):
+        already_yearly = (annual > CONVERTED_MAX) & (midpoint >= ANNUAL_MIN) & (midpoint <= ANNUAL_MAX)
+        annual = np.where(already_yearly, midpoint, annual)
+        return np.where((annual >= ANNUAL_MIN) & (annual <= ANNUAL_MAX), annual, np.nan)
+
+
+def salary_histogram(values, args):
+    """
+    Bin salaries server side instead of shipping every value.
+
+    ``args`` are the request query args:
+      bin_edges=40000,60000,...  explicit, increasing edges
+      bins=N                     N equal-width bins over [min, max]
+      min=, max=                 optional range for ``bins``
+      quantiles=0.1,0.5,0.9      quantiles to report (default DEFAULT_QUANTILES)
+
+    Returns a dict with ``edges``, ``counts``, ``quantiles`` and ``count``.
+    Raises ValueError on bad arguments.
+    """
+    values = np.asarray(values, dtype=float)
+
+    if args.get("bin_edges"):
+        edges = np.asarray(_float_list(args["bin_edges"], "bin_edges"))
+        if len(edges) < 2 or np.any(np.diff(edges) <= 0):
+            raise ValueError("bin_edges must have at least two increasing values")
+        if len(edges) > MAX_BINS + 1:
+            raise ValueError(f"at most {MAX_BINS} bins are supported")
+    else:
+        try:
+            bins = int(args.get("bins", 40))
+        except ValueError:
+            raise ValueError("bins must be an integer")
+        if not 1 <= bins <= MAX_BINS:
+            raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+        try:
+            lo = float(args["min"]) if args.get("min") else (values.min() if len(values) else 0.0)
+            hi = float(args["max"]) if args.get("max") else (values.max() if len(values) else 1.0)
+        except ValueError:
+            raise ValueError("min and max must be numbers")
+        if hi <= lo:
+            hi = lo + 1.0
+        edges = np.linspace(lo, hi, bins + 1)
+
+    counts, edges = np.histogram(values, bins=edges)
+
+    qs = DEFAULT_QUANTILES
+    if args.get("quantiles"):
+        qs = _float_list(args["quantiles"], "quantiles")
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("quantiles must be between 0 and 1")
+    quantiles = {}
+    if len(values):
+        quantiles = {str(q): float(v) for q, v in zip(qs, np.quantile(values, qs))}
+
+    return {
+        "edges": [round(float(e), 2) for e in edges],
+        "counts": counts.tolist(),
+        "quantiles": quantiles,
+        "count": int(len(values)),
+    }
+
+
+# Salary sketches: quantiles within SKETCH_ALPHA relative error from log
+# spaced buckets (as in DDSketch). Yearly amounts are clamped to
+# [SKETCH_MIN, SKETCH_MAX] for bucketing; min and max are kept exactly.
+SKETCH_ALPHA = 0.01
+SKETCH_MIN = 1_000
+SKETCH_MAX = 10_000_000
+_LOG_GAMMA = np.log((1 + SKETCH_ALPHA) / (1 - SKETCH_ALPHA))
+_BUCKET_OFFSET = int(np.ceil(np.log(SKETCH_MIN) / _LOG_GAMMA))
+SKETCH_BUCKETS = int(np.ceil(np.log(SKETCH_MAX) / _LOG_GAMMA)) - _BUCKET_OFFSET + 1
+
+# Columns a salary segment is keyed by, and the names used to filter on them
+SEGMENT_FIELDS = {"state": "state", "role": "role", "remote": "is_remote"}
+
+
+def sketch_buckets(values):
+    """Sketch bucket of each (positive, yearly) salary."""
+    clamped = np.clip(values, SKETCH_MIN, SKETCH_MAX)
+    idx = np.ceil(np.log(clamped) / _LOG_GAMMA).astype(np.int64) - _BUCKET_OFFSET
+    return np.clip(idx, 0, SKETCH_BUCKETS - 1)
+
+
+def bucket_values(idx):
+    """Representative salary of sketch buckets (within SKETCH_ALPHA of any value in them)."""
+    gamma = np.exp(_LOG_GAMMA)
+    return 2 * np.exp((np.asarray(idx) + _BUCKET_OFFSET) * _LOG_GAMMA) / (gamma + 1)
+
+
+class SalarySketches:
+    """
+    Yearly salary statistics per (state, role, remote) segment, mergeable.
+
+    Every segment keeps a bucket count row (see sketch_buckets) plus exact
+    count, sum, sum of squares, min and max, so statistics for any filter
+    combination come from adding up the matching segments' arrays instead
+    of scanning postings. Salaries are the annual_midpoint of each posting.
+    """
+
+    def __init__(self, segments, counts, n, total, total_sq, lo, hi, n_rows):
+        # segments: {"state": [...], "role": [...], "remote": [...]}, one entry per segment
+        self.segments = {k: np.asarray(v) for k, v in segments.items()}
+        self.counts = counts
+        self.n = n
+        self.total = total
+        self.total_sq = total_sq
+        self.lo = lo
+        self.hi = hi
+        # Rows of the frame the sketches were built from
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_frame(cls, frame):
+        n_rows = len(frame)
+        if "min_amount" in frame.columns and "interval" in frame.columns:
+            salary = annual_midpoint(frame)
+        else:
+            salary = np.full(n_rows, np.nan)
+        valid = np.isfinite(salary) & (salary > 0)
+
+        keys = {}
+        for name, col in SEGMENT_FIELDS.items():
+            if col not in frame.columns:
+                values = pd.Series([""] * n_rows if name != "remote" else [False] * n_rows)
+            elif name == "remote":
+                values = frame[col].astype(object).isin([True, "True", "true"])
+            else:
+                values = frame[col].astype(object).fillna("").astype(str)
+            keys[name] = pd.Series(values).to_numpy()[valid]
+        grouped = pd.DataFrame(keys).groupby(list(SEGMENT_FIELDS), sort=True)
+        codes = grouped.ngroup().to_numpy()
+        index = grouped.size().index
+        segments = {
+            "state": np.asarray(index.get_level_values("state"), dtype=str),
+            "role": np.asarray(index.get_level_values("role"), dtype=str),
+            "remote": np.asarray(index.get_level_values("remote"), dtype=bool),
+        }
+
+        x = salary[valid]
+        s = len(index)
+        counts = np.bincount(codes * SKETCH_BUCKETS + sketch_buckets(x),
+                             minlength=s * SKETCH_BUCKETS).reshape(s, SKETCH_BUCKETS)
+        lo = np.full(s, np.inf)
+        hi = np.full(s, -np.inf)
+        np.minimum.at(lo, codes, x)
+        np.maximum.at(hi, codes, x)
+        return cls(
+            segments,
+            counts.astype(np.int32),
+            np.bincount(codes, minlength=s),
+            np.bincount(codes, weights=x, minlength=s),
+            np.bincount(codes, weights=x * x, minlength=s),
+            lo,
+            hi,
+            n_rows,
+        )
+
+    def merge(self, other):
+        """New sketches holding both ``self``'s and ``other``'s postings, segment by segment."""
+        keys = list(zip(*(self.segments[k].tolist() for k in SEGMENT_FIELDS)))
+        position = {key: i for i, key in enumerate(keys)}
+        other_pos = []
+        for key in zip(*(other.segments[k].tolist() for k in SEGMENT_FIELDS)):
+            if key not in position:
+                position[key] = len(keys)
+                keys.append(key)
+            other_pos.append(position[key])
+        other_pos = np.array(other_pos, dtype=np.intp)
+        s = len(keys)
+
+        def combine(mine, theirs, fill, op=np.add):
+            out = np.full((s,) + mine.shape[1:], fill, dtype=np.result_type(mine, theirs))
+            out[:len(mine)] = mine
+            if len(other_pos):
+                out[other_pos] = op(out[other_pos], theirs)
+            return out
+
+        # Not self's dtypes: fixed-width strings would cut longer new names
+        segments = {name: np.array([key[i] for key in keys], dtype=bool if name == "remote" else str)
+                    for i, name in enumerate(SEGMENT_FIELDS)}
+        return SalarySketches(
+            segments,
+            combine(self.counts, other.counts, 0),
+            combine(self.n, other.n, 0),
+            combine(self.total, other.total, 0.0),
+            combine(self.total_sq, other.total_sq, 0.0),
+            combine(self.lo, other.lo, np.inf, np.minimum),
+            combine(self.hi, other.hi, -np.inf, np.maximum),
+            self.n_rows + other.n_rows,
+        )
+
+    def save(self, path):
+        np.savez(path, counts=self.counts, n=self.n, total=self.total, total_sq=self.total_sq,
+                 lo=self.lo, hi=self.hi, n_rows=self.n_rows,
+                 **{f"segment_{k}": v for k, v in self.segments.items()})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            segments = {k: data[f"segment_{k}"] for k in SEGMENT_FIELDS}
+            return cls(segments, data["counts"], data["n"], data["total"], data["total_sq"],
+                       data["lo"], data["hi"], int(data["n_rows"]))
+
+    def select(self, state=None, role=None, remote=None):
+        """Boolean mask of the segments matching the filters (None = any)."""
+        mask = np.ones(len(self.n), dtype=bool)
+        if state:
+            mask &= np.char.lower(self.segments["state"]) == normalize_state(state)
+        if role:
+            mask &= np.char.lower(self.segments["role"]) == role.strip().lower()
+        if remote is not None:
+            mask &= self.segments["remote"] == remote
+        return mask
+
+    def summary(self, mask=None, quantiles=DEFAULT_QUANTILES):
+        """
+        Merged statistics of the segments in ``mask`` (None = all): count,
+        mean, std, min, max, the requested quantiles and box plot values
+        (quartiles, and whiskers at 1.5 IQR clamped to min/max).
+        """
+        if mask is None:
+            mask = np.ones(len(self.n), dtype=bool)
+        n = int(self.n[mask].sum())
+        if not n:
+            return {"count": 0}
+        counts = self.counts[mask].sum(axis=0)
+        lo, hi = float(self.lo[mask].min()), float(self.hi[mask].max())
+        mean = self.total[mask].sum() / n
+        var = max(self.total_sq[mask].sum() / n - mean * mean, 0.0)
+
+        cum = np.cumsum(counts)
+
+        def quantile(q):
+            bucket = np.searchsorted(cum, q * (n - 1), side="right")
+            return float(np.clip(bucket_values(bucket), lo, hi))
+
+        q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+        iqr = q3 - q1
+        return {
+            "count": n,
+            "mean": round(float(mean), 2),
+            "std": round(float(np.sqrt(var * n / (n - 1))) if n > 1 else 0.0, 2),
+            "min": round(lo, 2),
+            "max": round(hi, 2),
+            "quantiles": {str(q): round(quantile(q), 2) for q in quantiles},
+            "box": {
+                "lower_whisker": round(max(lo, q1 - 1.5 * iqr), 2),
+                "q1": round(q1, 2),
+                "median": round(median, 2),
+                "q3": round(q3, 2),
+                "upper_whisker": round(min(hi, q3 + 1.5 * iqr), 2),
+            },
+        }
+
+    def compare(self, by, quantiles=DEFAULT_QUANTILES, **filters):
+        """summary per value of segment field ``by`` among the segments matching ``filters``."""
+        if by not in SEGMENT_FIELDS:
+            raise ValueError(f"by must be one of {', '.join(SEGMENT_FIELDS)}")
+        mask = self.select(**filters)
+        values = self.segments[by]
+        return {
+            str(value).lower() if by == "remote" else str(value):
+                self.summary(mask & (values == value), quantiles)
+            for value in np.unique(values[mask])
+        }
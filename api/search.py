@@ -0,0 +1,330 @@
+"""
+Full-text search over job postings: a positional inverted index with BM25,
+stored as flat NumPy arrays sorted by term, posting and position.
+
+    index = SearchIndex.for_dataset(get_dataset())
+    rows, scores, total = index.search('"machine learning" python', state="CA")
+"""
+import itertools
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from api.data_loader import DATA_DIR, MANIFEST_PATH
+from api.salary_stats import annual_midpoint
+from api.states import STATE_CODES, normalize_state
+
+# Fields indexed, in order; phrases never span two of them
+SEARCH_FIELDS = ["title", "company", "parsed_skills", "description"]
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Keeps c++, c#, node.js and the like as single tokens
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+_LOCATION_STATE = re.compile(r",\s*([A-Z]{2})\b")
+
+# Arrays written by SearchIndex.save(), besides the vocabulary
+ARRAYS = ["doc_len", "docs", "tfs", "positions", "term_offsets", "term_pos_offsets"]
+
+# Title masks kept per index for ?role= filters, which are user input
+ROLE_CACHE_SIZE = 64
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def parse_query(query):
+    """Split a query into clauses: a tuple of tokens per word or quoted phrase."""
+    clauses = []
+    for phrase in PHRASE_RE.findall(query):
+        tokens = tokenize(phrase)
+        if tokens:
+            clauses.append(tuple(tokens))
+    for token in tokenize(PHRASE_RE.sub(" ", query)):
+        clauses.append((token,))
+    # A repeated word counts once
+    return list(dict.fromkeys(clauses))
+
+
+def _text_column(frame, col):
+    if col not in frame.columns:
+        return [""] * len(frame)
+    return frame[col].astype(object).where(frame[col].notna(), "").astype(str).tolist()
+
+
+def stored_search_index(frame):
+    """The build's SearchIndex (manifest "search_index") for the rows of ``frame``, or None."""
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH) as f:
+        entry = json.load(f).get("search_index")
+    if not entry:
+        return None
+    try:
+        return SearchIndex.load(os.path.join(DATA_DIR, entry), frame)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading search index: {e}")
+        return None
+
+
+def _stable_order(keys):
+    """np.argsort(keys, kind="stable") for non-negative int32 keys, via one plain int64 sort."""
+    combined = (keys.astype(np.int64) << 32) | np.arange(len(keys), dtype=np.int64)
+    combined.sort()
+    return combined & 0xFFFFFFFF
+
+
+class SearchIndex:
+    """Positional inverted index over one dataset version (see the README)."""
+
+    def __init__(self, frame):
+        n = len(frame)
+        # One part per (posting, field), row by row. Each distinct text is
+        # tokenized once, since reposted jobs repeat the same description
+        # many times, and tokens get term IDs in order of first appearance
+        cells = np.empty(n * len(SEARCH_FIELDS), dtype=object)
+        for i, col in enumerate(SEARCH_FIELDS):
+            cells[i::len(SEARCH_FIELDS)] = _text_column(frame, col)
+        text_of_part, texts = pd.factorize(cells)
+        tokens = [tokenize(text) for text in texts]
+        text_len = np.array([len(t) for t in tokens], dtype=np.int64)
+        text_terms, vocab = pd.factorize(np.array(list(itertools.chain.from_iterable(tokens)),
+                                                  dtype=object))
+        del cells, tokens
+        vocab = {t: i for i, t in enumerate(vocab.tolist())}
+
+        part_len = text_len[text_of_part]
+        text_start = np.cumsum(text_len) - text_len
+        # Token k of the parts, back to back, is token k - part_start of its text
+        part_start = np.cumsum(part_len) - part_len
+        term = text_terms[np.arange(part_len.sum(), dtype=np.int64)
+                          + np.repeat(text_start[text_of_part] - part_start, part_len)
+                          ].astype(np.int32)
+        field_len = part_len.reshape(n, len(SEARCH_FIELDS))
+        doc_len = field_len.sum(axis=1)
+        # Position of each field's first token in its posting, leaving a gap
+        # of one between fields so phrases can't span them
+        field_start = np.cumsum(field_len, axis=1) - field_len + np.arange(len(SEARCH_FIELDS))
+        pos = (np.arange(len(term), dtype=np.int64)
+               - np.repeat(part_start - field_start.ravel(), part_len)).astype(np.int32)
+        doc = np.repeat(np.arange(n, dtype=np.int32), doc_len)
+
+        # Tokens are already in (doc, position) order, so a stable sort by
+        # term gives (term, doc, position)
+        order = _stable_order(term)
+        term, doc, pos = term[order], doc[order], pos[order]
+
+        first = np.ones(len(term), dtype=bool)
+        first[1:] = (term[1:] != term[:-1]) | (doc[1:] != doc[:-1])
+        posting_start = np.flatnonzero(first)
+
+        self.vocab = vocab
+        self.n_docs = n
+        self.doc_len = doc_len.astype(np.int32)
+        self.avg_doc_len = float(doc_len.mean()) if n else 0.0
+        self.docs = doc[posting_start]
+        self.tfs = np.diff(np.append(posting_start, len(term))).astype(np.int32)
+        self.positions = pos
+        self.term_offsets = np.searchsorted(
+            term[posting_start], np.arange(len(vocab) + 1)
+        ).astype(np.int64)
+        # Term t's positions are positions[term_pos_offsets[t]:term_pos_offsets[t + 1]]
+        self.term_pos_offsets = np.searchsorted(term, np.arange(len(vocab) + 1)).astype(np.int64)
+
+        self._set_filters(frame)
+
+    def _set_filters(self, frame):
+        """Filter columns for filter_mask, from ``frame`` (the indexed rows)."""
+        n = len(frame)
+        self.state = (frame["state"].astype(object).str.lower().to_numpy(dtype=object)
+                      if "state" in frame.columns else np.full(n, None, dtype=object))
+        location = frame["location"].astype(object) if "location" in frame.columns \
+            else pd.Series([None] * n, dtype=object)
+        # The state in the location ("Austin, TX"), as normalize_state gives it
+        codes = location.str.extract(_LOCATION_STATE)[0]
+        self.location_state = codes.map(STATE_CODES).fillna(codes).str.lower().to_numpy(dtype=object)
+        self.role = (frame["role"].astype(object).str.lower().to_numpy(dtype=object)
+                     if "role" in frame.columns else np.full(n, None, dtype=object))
+        self.title_lower = pd.Series(_text_column(frame, "title")).str.lower()
+        remote = location.str.contains("remote", case=False, na=False).to_numpy(dtype=bool)
+        if "is_remote" in frame.columns:
+            remote = remote | frame["is_remote"].fillna(False).astype(bool).to_numpy()
+        self.remote = remote
+        self.salary = annual_midpoint(frame) if "min_amount" in frame.columns else np.full(n, np.nan)
+        # role -> rows whose title contains it, for filter_mask (see role_titles)
+        self._role_titles = {}
+
+    def save(self, path):
+        """Write the postings and vocabulary (not the filter columns) as an .npz file."""
+        np.savez(path, vocab=np.frombuffer("\n".join(self.vocab).encode(), dtype=np.uint8),
+                 **{name: getattr(self, name) for name in ARRAYS})
+
+    @classmethod
+    def load(cls, path, frame):
+        """The index save() wrote for the rows of ``frame``. ValueError if it has other rows."""
+        out = cls.__new__(cls)
+        with np.load(path) as data:
+            for name in ARRAYS:
+                setattr(out, name, data[name])
+            terms = data["vocab"].tobytes().decode()
+        out.vocab = {t: i for i, t in enumerate(terms.split("\n"))} if terms else {}
+        out.n_docs = len(out.doc_len)
+        if out.n_docs != len(frame):
+            raise ValueError(f"search index has {out.n_docs} rows, the dataset {len(frame)}")
+        out.avg_doc_len = float(out.doc_len.mean()) if out.n_docs else 0.0
+        out._set_filters(frame)
+        return out
+
+    @classmethod
+    def for_dataset(cls, dataset):
+        """
+        The index for ``dataset``, built on first use. Cached per version.
+        The build's rows come from its stored index (manifest
+        "search_index") when there is one, and rows added by the ingest
+        worker are merged in (see extended).
+        """
+        def build(ds):
+            base = ds.frame.iloc[:ds.base_rows]
+            index = stored_search_index(base) or cls(base)
+            if len(ds.frame) > ds.base_rows:
+                index = index.extended(ds.frame.iloc[ds.base_rows:])
+            return index
+
+        return dataset.aggregate("search_index", build,
+                                 lambda index, ds, start: index.extended(ds.frame.iloc[start:]))
+
+    def extended(self, frame):
+        """
+        A new index with the postings of ``frame`` appended as rows
+        n_docs, n_docs + 1, ... Only ``frame`` is tokenized: its index is
+        built on its own, mapped onto this vocabulary and merged in with a
+        stable sort by term, which keeps (term, doc, position) order.
+        """
+        add = SearchIndex(frame.reset_index(drop=True))
+        vocab = dict(self.vocab)
+        # add.vocab's IDs are its insertion order
+        remap = np.fromiter((vocab.setdefault(t, len(vocab)) for t in add.vocab),
+                            dtype=np.int64, count=len(add.vocab))
+        n_terms = np.arange(len(vocab) + 1)
+
+        def merge(offsets, add_offsets, values, add_values):
+            terms = np.concatenate([
+                np.repeat(np.arange(len(offsets) - 1), np.diff(offsets)),
+                remap[np.repeat(np.arange(len(add_offsets) - 1), np.diff(add_offsets))],
+            ])
+            order = _stable_order(terms)
+            merged = [np.concatenate([v, a])[order] for v, a in zip(values, add_values)]
+            return np.searchsorted(terms[order], n_terms).astype(np.int64), merged
+
+        out = SearchIndex.__new__(SearchIndex)
+        out.vocab = vocab
+        out.n_docs = self.n_docs + add.n_docs
+        out.doc_len = np.concatenate([self.doc_len, add.doc_len])
+        out.avg_doc_len = float(out.doc_len.mean()) if out.n_docs else 0.0
+        out.term_offsets, (out.docs, out.tfs) = merge(
+            self.term_offsets, add.term_offsets,
+            (self.docs, self.tfs), (add.docs + np.int32(self.n_docs), add.tfs))
+        out.term_pos_offsets, (out.positions,) = merge(
+            self.term_pos_offsets, add.term_pos_offsets, (self.positions,), (add.positions,))
+
+        for name in ("state", "location_state", "role", "remote", "salary"):
+            setattr(out, name, np.concatenate([getattr(self, name), getattr(add, name)]))
+        out.title_lower = pd.concat([self.title_lower, add.title_lower], ignore_index=True)
+        out._role_titles = {}
+        return out
+
+    def role_titles(self, role):
+        """Rows whose lowercase title contains ``role`` (lowercase). Cached per role."""
+        mask = self._role_titles.get(role)
+        if mask is None:
+            mask = self.title_lower.str.contains(role, regex=False).to_numpy(dtype=bool)
+            while len(self._role_titles) >= ROLE_CACHE_SIZE:
+                self._role_titles.pop(next(iter(self._role_titles)), None)
+            self._role_titles[role] = mask
+        return mask
+
+    def _term_entries(self, token):
+        """(docs, positions) of every occurrence of ``token``."""
+        t = self.vocab.get(token)
+        if t is None:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+        a, b = self.term_offsets[t], self.term_offsets[t + 1]
+        docs = np.repeat(self.docs[a:b], self.tfs[a:b])
+        return docs, self.positions[self.term_pos_offsets[t]:self.term_pos_offsets[t + 1]]
+
+    def _clause_postings(self, clause):
+        """(docs, tfs) for a single token or a phrase."""
+        if len(clause) == 1:
+            t = self.vocab.get(clause[0])
+            if t is None:
+                return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32)
+            a, b = self.term_offsets[t], self.term_offsets[t + 1]
+            return self.docs[a:b], self.tfs[a:b]
+
+        # Phrase: occurrence keys (doc, start position) present for every
+        # token at its offset within the phrase
+        keys = None
+        for j, token in enumerate(clause):
+            docs, pos = self._term_entries(token)
+            ok = pos >= j
+            k = (docs[ok].astype(np.int64) << 32) | (pos[ok] - j).astype(np.int64)
+            keys = k if keys is None else np.intersect1d(keys, k, assume_unique=True)
+            if not len(keys):
+                break
+        docs, tfs = np.unique((keys >> 32).astype(np.int32), return_counts=True)
+        return docs, tfs.astype(np.int32)
+
+    def filter_mask(self, state=None, role=None, remote=None, min_salary=None, max_salary=None):
+        """Boolean row mask for the optional filters (None = not filtered)."""
+        mask = np.ones(self.n_docs, dtype=bool)
+        if state:
+            state = normalize_state(state)
+            mask &= (self.state == state) | (self.location_state == state)
+        if role:
+            role = role.strip().lower()
+            mask &= (self.role == role) | self.role_titles(role)
+        if remote is not None:
+            mask &= self.remote == remote
+        if min_salary is not None:
+            mask &= self.salary >= min_salary
+        if max_salary is not None:
+            mask &= self.salary <= max_salary
+        return mask
+
+    def search(self, query, offset=0, limit=20, **filters):
+        """
+        Rank rows matching every clause of ``query`` by BM25.
+
+        Returns (rows, scores, total) for the ``limit`` results starting at
+        ``offset``; ``total`` counts all matches. Keyword arguments are
+        passed to filter_mask. A query without any word matches nothing.
+        """
+        clauses = parse_query(query)
+        if not clauses:
+            return np.zeros(0, dtype=np.int64), np.zeros(0), 0
+        scores = np.zeros(self.n_docs, dtype=np.float64)
+        matched = np.zeros(self.n_docs, dtype=np.int32)
+        norm = K1 * (1 - B + B * self.doc_len / max(self.avg_doc_len, 1e-9))
+        for clause in clauses:
+            docs, tfs = self._clause_postings(clause)
+            if not len(docs):
+                return np.zeros(0, dtype=np.int64), np.zeros(0), 0
+            idf = np.log(1 + (self.n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            scores[docs] += idf * tfs * (K1 + 1) / (tfs + norm[docs])
+            matched[docs] += 1
+
+        hits = matched == len(clauses)
+        if any(v is not None for v in filters.values()):
+            hits &= self.filter_mask(**filters)
+        rows = np.flatnonzero(hits)
+        order = np.argsort(-scores[rows], kind="stable")
+        page = rows[order[offset:offset + limit]]
+        return page, scores[page], len(rows)
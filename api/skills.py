@@ -0,0 +1,180 @@
+"""
+Skill vocabulary and a compact per-posting skill index.
+
+A skill ID is the position of the term in src/cleaning/skills.json, so keep
+that file append-only. IDs are stored space separated ("3 17 42"); read
+those columns with ``dtype=ID_DTYPES`` or single IDs come back as floats.
+"""
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+SKILLS_JSON_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "cleaning", "skills.json")
+
+# Stored skill ID columns, and the read_csv dtypes that keep them as text
+ID_COLUMNS = ["parsed_skill_ids", "skill_ids"]
+ID_DTYPES = dict.fromkeys(ID_COLUMNS, str)
+
+# Global cache: skills.json terms, key -> ID and ID -> display name
+_TERMS = None
+_KEY_TO_ID = None
+_NAMES = None
+
+
+def skill_key(name):
+    """Normalized form used to match skills: lowercase, single spaces, no spaces around '/'."""
+    return re.sub(r"\s*/\s*", "/", " ".join(str(name).lower().split()))
+
+
+def get_skill_terms():
+    """The skill terms from skills.json. Cached."""
+    global _TERMS, _KEY_TO_ID, _NAMES
+    if _TERMS is None:
+        with open(SKILLS_JSON_PATH, "r") as f:
+            terms = json.load(f)
+        key_to_id = {}
+        for i, term in enumerate(terms):
+            key_to_id.setdefault(skill_key(term), i)
+        _KEY_TO_ID = key_to_id
+        _NAMES = np.array([skill_key(t) for t in terms], dtype=object)
+        _TERMS = terms
+    return _TERMS
+
+
+def vocabulary_size():
+    return len(get_skill_terms())
+
+
+def skill_names(ids):
+    """Display names (skill_key of the term) for an array of skill IDs."""
+    get_skill_terms()
+    return _NAMES[np.asarray(ids, dtype=np.intp)].tolist()
+
+
+def skill_id(name):
+    """Vocabulary ID of a skill name, or None if it isn't in skills.json."""
+    get_skill_terms()
+    return _KEY_TO_ID.get(skill_key(name))
+
+
+def encode_skills(skills):
+    """
+    Sorted unique skill IDs for a comma separated string (or an iterable of
+    names). Skills not in the vocabulary are dropped.
+    """
+    get_skill_terms()
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    elif skills is None or (pd.api.types.is_scalar(skills) and pd.isna(skills)):
+        return np.zeros(0, dtype=np.int32)
+    ids = {_KEY_TO_ID.get(skill_key(s)) for s in skills}
+    ids.discard(None)
+    return np.array(sorted(ids), dtype=np.int32)
+
+
+def listed_counts(names, n=None):
+    """
+    Per row of a column of comma separated skill names, how many distinct
+    skills (ignoring case) it lists, in the vocabulary or not. None gives
+    ``n`` zeros. The cleaning stage stores this as the skill_count column.
+    """
+    if names is None:
+        return np.zeros(n or 0, dtype=np.int32)
+    return np.array([
+        0 if pd.isna(text) else len({s.strip().lower() for s in str(text).split(",") if s.strip()})
+        for text in names.tolist()
+    ], dtype=np.int32)
+
+
+def format_ids(ids):
+    """Skill IDs as the space separated string stored in the CSVs."""
+    return " ".join(str(i) for i in ids)
+
+
+def parse_ids(text):
+    """Inverse of format_ids. A lone ID read as a number (42 or 42.0) is accepted too."""
+    if text is None or pd.isna(text):
+        return np.zeros(0, dtype=np.int32)
+    if isinstance(text, (int, float, np.number)):
+        return np.array([int(text)], dtype=np.int32)
+    return np.array(str(text).split(), dtype=np.int32)
+
+
+class SkillMatrix:
+    """One skills column in CSR form: posting i owns ids[offsets[i]:offsets[i + 1]]."""
+
+    def __init__(self, offsets, ids):
+        self.offsets = offsets
+        self.ids = ids
+        self.lengths = np.diff(offsets)
+        # Posting (row position) of every entry in ids
+        self.rows = np.repeat(np.arange(len(offsets) - 1, dtype=np.int32), self.lengths)
+
+    @classmethod
+    def from_columns(cls, ids=None, names=None, n=None):
+        """
+        Build from a column of stored ID strings, falling back to encoding
+        the comma separated ``names`` column for rows without IDs (files
+        cleaned before IDs were written). Either column may be None.
+        """
+        if n is None:
+            n = len(ids) if ids is not None else len(names) if names is not None else 0
+        id_values = ids.tolist() if ids is not None else [None] * n
+        name_values = names.tolist() if names is not None else [None] * n
+        vocab = vocabulary_size()
+
+        per_row = []
+        for stored, text in zip(id_values, name_values):
+            row = None if stored is None or pd.isna(stored) else parse_ids(stored)
+            # IDs outside the vocabulary mean skills.json changed since cleaning
+            if row is None or (len(row) and row.max() >= vocab):
+                row = encode_skills(text)
+            per_row.append(row)
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(r) for r in per_row])
+        flat = np.concatenate(per_row) if per_row else np.zeros(0, dtype=np.int32)
+        return cls(offsets, flat.astype(np.int32, copy=False))
+
+    def concat(self, other):
+        """A new SkillMatrix with ``other``'s postings after this one's."""
+        offsets = np.concatenate([self.offsets, self.offsets[-1] + other.offsets[1:]])
+        return SkillMatrix(offsets, np.concatenate([self.ids, other.ids]))
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def row(self, i):
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def _entry_mask(self, rows):
+        if rows is None:
+            return None
+        rows = np.asarray(rows)
+        if rows.dtype != bool:
+            mask = np.zeros(len(self), dtype=bool)
+            mask[rows] = True
+            rows = mask
+        return rows[self.rows]
+
+    def counts(self, rows=None):
+        """Postings per skill ID over ``rows`` (positions or a boolean mask; None = all)."""
+        entries = self._entry_mask(rows)
+        ids = self.ids if entries is None else self.ids[entries]
+        return np.bincount(ids, minlength=vocabulary_size())
+
+    def most_common(self, rows=None, k=20):
+        """[(name, count), ...] for the ``k`` most frequent skills over ``rows``."""
+        counts = self.counts(rows)
+        top = np.argsort(-counts, kind="stable")[:k]
+        top = top[counts[top] > 0]
+        return list(zip(skill_names(top), counts[top].tolist()))
+
+    def overlap(self, skill_ids):
+        """Per posting, how many of ``skill_ids`` it lists."""
+        wanted = np.zeros(vocabulary_size(), dtype=bool)
+        wanted[np.asarray(skill_ids, dtype=np.intp)] = True
+        return np.bincount(self.rows, weights=wanted[self.ids], minlength=len(self)).astype(np.int32)
@@ -0,0 +1,10 @@
+"""State names and the two-letter codes used in "City, ST" locations."""
+
+# The scraped states
+STATE_CODES = {"CA": "California", "NY": "New York", "TX": "Texas"}
+
+
+def normalize_state(state):
+    """Lowercase full name for a state name or code ("TX", "texas" -> "texas")."""
+    state = " ".join(str(state).split())
+    return STATE_CODES.get(state.upper(), state).lower()
@@ -0,0 +1,127 @@
+"""
+Posting counts over time for /api/trends, precomputed per dataset version:
+daily counts per filter bucket on one shared date axis, so weekly totals,
+rolling averages and growth are cumsum differences instead of a groupby.
+"""
+import numpy as np
+import pandas as pd
+
+# freq query value -> pandas period alias (None = daily)
+FREQS = {"day": None, "week": "W", "month": "M"}
+
+
+class TrendStore:
+    """Daily posting counts per bucket over a shared date axis."""
+
+    def __init__(self, dates, buckets=None):
+        """``dates`` holds the posting date of every row; ``buckets`` maps a key to row positions."""
+        days = pd.to_datetime(pd.Series(dates).reset_index(drop=True), errors="coerce").dt.normalize()
+        valid = days.notna().to_numpy()
+        if valid.any():
+            first = days[valid].min()
+            self.days = pd.date_range(first, days[valid].max(), freq="D")
+        else:
+            first = None
+            self.days = pd.DatetimeIndex([])
+
+        # Position of each row's day on the axis, -1 without a date
+        day_index = np.full(len(days), -1, dtype=np.int32)
+        if first is not None:
+            day_index[valid] = (days[valid] - first).dt.days.to_numpy()
+        self.day_index = day_index
+
+        self.counts = {key: self.daily_counts(rows) for key, rows in (buckets or {}).items()}
+
+    def extended(self, dates, buckets=None):
+        """
+        A new store with rows of ``dates`` appended after the current ones.
+        ``buckets`` maps keys to positions within the new rows; their
+        counts are added to the key's existing ones.
+        """
+        added = TrendStore(dates)
+        days = self.days.union(added.days)
+        if len(days):
+            days = pd.date_range(days[0], days[-1], freq="D")
+        shift = days.searchsorted(self.days[0]) if len(self.days) else 0
+        added_shift = days.searchsorted(added.days[0]) if len(added.days) else 0
+
+        store = TrendStore.__new__(TrendStore)
+        store.days = days
+        store.day_index = np.concatenate([
+            np.where(self.day_index >= 0, self.day_index + shift, -1),
+            np.where(added.day_index >= 0, added.day_index + added_shift, -1),
+        ]).astype(np.int32)
+        store.counts = {}
+        for key, counts in self.counts.items():
+            padded = np.zeros(len(days), dtype=np.int32)
+            padded[shift:shift + len(counts)] = counts
+            store.counts[key] = padded
+        for key, rows in (buckets or {}).items():
+            new_counts = added.daily_counts(rows)
+            if key not in store.counts:
+                store.counts[key] = np.zeros(len(days), dtype=np.int32)
+            store.counts[key][added_shift:added_shift + len(new_counts)] += new_counts
+        return store
+
+    def daily_counts(self, rows=None):
+        """Postings per day over ``rows`` (positions or a boolean mask; None = all)."""
+        idx = self.day_index if rows is None else self.day_index[np.asarray(rows)]
+        return np.bincount(idx[idx >= 0], minlength=len(self.days)).astype(np.int32)
+
+    def _period_bounds(self, lo, hi, freq):
+        """Start positions of the periods covering days lo..hi-1, plus hi."""
+        if FREQS[freq] is None:
+            return np.arange(lo, hi + 1)
+        days = self.days[lo:hi]
+        starts = days.dayofweek == 0 if freq == "week" else days.day == 1
+        return np.unique(np.concatenate([[lo], lo + np.flatnonzero(starts), [hi]]))
+
+    def series(self, counts, freq="day", window=None, growth=False, start=None, end=None,
+               dense=False):
+        """
+        ``counts`` (from self.counts or daily_counts) as a JSON-ready series.
+
+        Covers the first to the last day with postings, narrowed by the
+        optional ``start``/``end`` dates. Each period is labelled with its
+        first day (the Monday for weeks). ``window`` adds a rolling average
+        over that many periods (None until a full window is available) and
+        ``growth`` the fractional change from the previous period (None
+        after an empty period). Periods without postings are left out, as
+        the old per-request groupby did, unless ``dense``; rolling averages
+        and growth count them either way.
+        """
+        if freq not in FREQS:
+            raise ValueError(f"freq must be one of {', '.join(FREQS)}")
+        if window is not None and window < 1:
+            raise ValueError("window must be at least 1")
+
+        nonzero = np.flatnonzero(counts)
+        lo, hi = (nonzero[0], nonzero[-1] + 1) if len(nonzero) else (0, 0)
+        if start is not None:
+            lo = max(lo, self.days.searchsorted(pd.Timestamp(start)))
+        if end is not None:
+            hi = min(hi, self.days.searchsorted(pd.Timestamp(end), side="right"))
+        hi = max(hi, lo)
+
+        cum = np.concatenate([[0], np.cumsum(counts, dtype=np.int64)])
+        bounds = self._period_bounds(lo, hi, freq)
+        totals = cum[bounds[1:]] - cum[bounds[:-1]]
+
+        labels = self.days[bounds[:-1]]
+        if FREQS[freq] is not None:
+            labels = labels.to_period(FREQS[freq]).start_time
+        out = {"date": labels.strftime("%Y-%m-%d").tolist(), "postings": totals.tolist()}
+
+        if window is not None:
+            period_cum = np.concatenate([[0], np.cumsum(totals)])
+            rolling = (period_cum[window:] - period_cum[:-window]) / window
+            out["rolling"] = [None] * min(window - 1, len(totals)) + np.round(rolling, 3).tolist()
+        if growth:
+            change = [None]
+            for prev, cur in zip(totals[:-1].tolist(), totals[1:].tolist()):
+                change.append(round((cur - prev) / prev, 4) if prev else None)
+            out["growth"] = change[:len(totals)]
+        if not dense:
+            keep = np.flatnonzero(totals)
+            out = {name: [values[i] for i in keep] for name, values in out.items()}
+        return out
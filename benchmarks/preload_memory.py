@@ -0,0 +1,120 @@
+"""
+Compare gunicorn workers with and without dataset preload.
+
+Starts the app under gunicorn twice (PRELOAD_DATA=1 and PRELOAD_DATA=0),
+times the first requests, warms every worker, then reads RSS and PSS
+(proportional set size, which splits shared pages between processes) for
+each worker from /proc. Linux only.
+
+    python benchmarks/preload_memory.py --workers 4 --out preload.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+ENDPOINTS = ["/api/salary", "/api/skills", "/api/trends"]
+
+
+def _get(url):
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=120) as res:
+        res.read()
+    return time.perf_counter() - start
+
+
+def _wait_until_up(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url + "/intro", timeout=5).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not come up")
+
+
+def _children(pid):
+    path = f"/proc/{pid}/task/{pid}/children"
+    with open(path) as f:
+        return [int(p) for p in f.read().split()]
+
+
+def _memory_kb(pid):
+    """RSS and PSS in kB from /proc/<pid>/smaps_rollup."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key.lower()] = int(rest.split()[0])
+    return out
+
+
+def measure(preload, workers, port, warm_requests):
+    env = dict(os.environ, PRELOAD_DATA="1" if preload else "0",
+               WEB_CONCURRENCY=str(workers))
+    cmd = [
+        sys.executable, "-m", "gunicorn",
+        "--config", "gunicorn.conf.py",
+        "--bind", f"127.0.0.1:{port}",
+        "src.website.app:app",
+    ]
+    started = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        _wait_until_up(base)
+        startup = time.perf_counter() - started
+
+        first = {ep: _get(base + ep) for ep in ENDPOINTS}
+
+        # Keep hitting the data endpoints so every worker has loaded its data
+        latencies = []
+        for _ in range(warm_requests):
+            for ep in ENDPOINTS:
+                latencies.append(_get(base + ep))
+
+        worker_mem = [_memory_kb(pid) for pid in _children(proc.pid)]
+        return {
+            "preload": preload,
+            "workers": workers,
+            "startup_s": round(startup, 3),
+            "first_request_s": {ep: round(t, 4) for ep, t in first.items()},
+            "max_warmup_request_s": round(max(latencies), 4),
+            "master_kb": _memory_kb(proc.pid),
+            "worker_kb": worker_mem,
+            "total_worker_pss_kb": sum(m["pss"] for m in worker_mem),
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warm-requests", type=int, default=20)
+    parser.add_argument("--out", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = [
+        measure(preload, args.workers, args.port + i, args.warm_requests)
+        for i, preload in enumerate((False, True))
+    ]
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
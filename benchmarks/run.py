@@ -0,0 +1,276 @@
+"""
+Benchmark suite for the data loader, chart APIs, recommender and cleaning.
+
+Builds an all-states dataset from the bundled data/processed CSVs (scaled
+up by copying rows for scale > 1, or with --synthetic, generated by
+synthetic_corpus.py), then, in a fresh process per scale, measures:
+
+  * cold dataset load time
+  * p50/p99 latency per /api/* endpoint through the Flask test client
+  * recommendation index build time and recommendations/second
+  * clean_html docs/second and spaCy skill extraction docs/second
+    (skipped if spaCy or its model isn't installed)
+  * peak RSS
+
+Results are printed and optionally written as JSON, tagged with the git
+commit, so runs can be compared across commits.
+
+    python benchmarks/run.py --scales 1,10 --out bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from synthetic_corpus import CorpusModel, load_postings, write_corpus
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Query strings hit for each endpoint (no conditional headers, so every
+# call does the full work)
+ENDPOINTS = [
+    "/api/filters",
+    "/api/salary",
+    "/api/salary?bins=40",
+    "/api/salary?location=California&job=Software Engineer",
+    "/api/salary/stats?state=Texas&by=role",
+    "/api/skills",
+    "/api/skills?location=Remote&job=Data Scientist",
+    "/api/skills/related?skill=python&role=Data Scientist",
+    "/api/skills/salary?state=Texas",
+    "/api/trends",
+    "/api/trends?location=Texas&job=Data Analyst",
+    "/api/trends?freq=week&window=4&growth=true",
+    "/api/search?q=python",
+    '/api/search?q="machine learning" aws&state=CA&remote=false',
+]
+
+SAMPLE_RESUMES = [
+    "Recent graduate, intern at a startup. Python, SQL, pandas, scikit-learn, "
+    "machine learning, statistics, Tableau. Built dashboards and ETL pipelines.",
+    "Software engineer with 2 years of experience in Java, Spring, Docker, "
+    "Kubernetes, AWS and React. Designed REST APIs and CI/CD with GitHub Actions.",
+    "Business analyst, 3+ years. Excel, SQL, Power BI, stakeholder communication, "
+    "Agile, requirements gathering, forecasting and A/B testing.",
+]
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _peak_rss_mb():
+    # ru_maxrss is kB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def _timings(samples):
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": len(ms),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+    }
+
+
+def write_scaled_dataset(base, scale, out_dir):
+    """
+    Write ``scale`` copies of ``base`` as all_states_clean.csv.
+
+    Copies get a distinct id and a tag in the description so de-duplication
+    in the recommender doesn't collapse them back into the original rows.
+    """
+    path = os.path.join(out_dir, "all_states_clean.csv")
+    for i in range(scale):
+        part = base
+        if i:
+            part = base.copy()
+            part["id"] = part["id"].astype(str) + f"-x{i}"
+            part["description"] = part["description"].fillna("") + f" (copy {i})"
+        part.to_csv(path, mode="a" if i else "w", header=not i, index=False)
+    return path
+
+
+def bench_loader():
+    from api.data_loader import get_dataset
+
+    start = time.perf_counter()
+    dataset = get_dataset()
+    return {
+        "cold_load_s": round(time.perf_counter() - start, 3),
+        "rows": len(dataset.frame),
+        "frame_mb": round(dataset.frame.memory_usage(deep=True).sum() / 2**20, 1),
+    }
+
+
+def bench_endpoints(iterations):
+    from src.website.app import app
+
+    client = app.test_client()
+    results = {}
+    for url in ENDPOINTS:
+        client.get(url)  # first call may build lazy aggregates
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            res = client.get(url)
+            samples.append(time.perf_counter() - start)
+            assert res.status_code == 200, (url, res.status_code)
+        results[url] = _timings(samples)
+    return results
+
+
+def bench_recommender(iterations):
+    from src.analysis.recommendation_model import get_job_index, recommend_jobs
+
+    start = time.perf_counter()
+    index = get_job_index()
+    build_s = time.perf_counter() - start
+
+    samples = []
+    for i in range(iterations):
+        resume = SAMPLE_RESUMES[i % len(SAMPLE_RESUMES)]
+        start = time.perf_counter()
+        recommend_jobs(resume)
+        samples.append(time.perf_counter() - start)
+    out = _timings(samples)
+    out["index_build_s"] = round(build_s, 3)
+    out["indexed_jobs"] = len(index.jobs)
+    out["recommendations_per_s"] = round(len(samples) / sum(samples), 3)
+    return out
+
+
+def bench_cleaning(max_docs):
+    from src.cleaning import clean_CSV
+
+    raw_dir = os.path.join(REPO_ROOT, "data", "raw")
+    docs = []
+    for f in sorted(os.listdir(raw_dir)):
+        if f.endswith("_jobs.csv"):
+            df = pd.read_csv(os.path.join(raw_dir, f), usecols=lambda c: c == "description",
+                             on_bad_lines="skip")
+            if "description" in df.columns:
+                docs.extend(df["description"].tolist())
+        if len(docs) >= max_docs:
+            break
+    docs = pd.Series(docs[:max_docs], dtype=object)
+
+    # Equivalence with the pre-vectorized cleaner is checked by tests/test_clean_html.py
+    start = time.perf_counter()
+    cleaned = clean_CSV.clean_html_column(docs)
+    html_s = time.perf_counter() - start
+
+    out = {
+        "docs": len(docs),
+        "clean_html_docs_per_s": round(len(docs) / html_s, 1),
+    }
+
+    try:
+        clean_CSV.load_matcher()
+    except Exception as e:  # spaCy or its model not installed
+        out["extract_skills"] = f"skipped: {type(e).__name__}: {e}"
+        return out
+    start = time.perf_counter()
+    for d in cleaned:
+        clean_CSV.extract_skills_nlp(d)
+    out["extract_skills_docs_per_s"] = round(len(docs) / (time.perf_counter() - start), 1)
+    return out
+
+
+def run_worker(args):
+    """Run every benchmark against JOBS_DATA_DIR in this process."""
+    sys.path.insert(0, REPO_ROOT)
+    # Time uncompressed responses: API_GZIP_MIN_SIZE=0 turns gzip off. The
+    # test client sends no If-None-Match, so every request builds a full
+    # response rather than a 304.
+    os.environ.setdefault("API_GZIP_MIN_SIZE", "0")
+
+    results = {"loader": bench_loader()}
+    results["endpoints"] = bench_endpoints(args.iterations)
+    results["recommender"] = bench_recommender(args.rec_iterations)
+    if args.cleaning:
+        results["cleaning"] = bench_cleaning(args.clean_docs)
+    results["peak_rss_mb"] = round(_peak_rss_mb(), 1)
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", default="1,10",
+                        help="comma separated dataset multipliers, e.g. 1,10,100")
+    parser.add_argument("--iterations", type=int, default=30,
+                        help="requests per endpoint")
+    parser.add_argument("--rec-iterations", type=int, default=5,
+                        help="recommend_jobs calls per scale")
+    parser.add_argument("--clean-docs", type=int, default=500,
+                        help="raw descriptions to clean (scale 1 only)")
+    parser.add_argument("--synthetic", action="store_true",
+                        help="generate scaled datasets instead of copying rows")
+    parser.add_argument("--out", help="write results as JSON to this path")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--cleaning", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    base = load_postings()
+    model = CorpusModel(base) if args.synthetic else None
+    report = {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "base_rows": len(base),
+        "synthetic": args.synthetic,
+        "scales": {},
+    }
+
+    for scale in [int(s) for s in args.scales.split(",")]:
+        with tempfile.TemporaryDirectory(prefix=f"bench-x{scale}-") as data_dir:
+            if model is not None:
+                write_corpus(model, scale * len(base),
+                             os.path.join(data_dir, "all_states_clean.csv"))
+            else:
+                write_scaled_dataset(base, scale, data_dir)
+            cmd = [
+                sys.executable, os.path.abspath(__file__), "--worker",
+                "--iterations", str(args.iterations),
+                "--rec-iterations", str(args.rec_iterations),
+                "--clean-docs", str(args.clean_docs),
+            ]
+            if scale == 1:
+                cmd.append("--cleaning")
+            env = dict(os.environ, JOBS_DATA_DIR=data_dir, DATASET_WATCH_INTERVAL="0")
+            out = subprocess.run(cmd, cwd=REPO_ROOT, env=env, capture_output=True,
+                                 text=True, check=True)
+            report["scales"][str(scale)] = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"scale x{scale}: done", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Synthetic job-posting corpus for scale testing.
+
+Learns column distributions from the processed CSVs and writes any number
+of postings in the same schema, so the loader, chart APIs and
+recommend_jobs can be load-tested far beyond the bundled ~10k rows.
+
+What is modelled:
+  * title, interval, salary range and skill set come from a sampled
+    "template" posting, so titles keep their salary levels and skill mix;
+    salaries get lognormal jitter, skills are thinned and topped up from
+    the skill co-occurrence table
+  * company, location, date_posted, job_type and is_remote are drawn from
+    their marginal frequencies
+  * descriptions are stitched from real sentences to match the empirical
+    length distribution, with the posting's skills mentioned in them
+
+    python benchmarks/synthetic_corpus.py --rows 1000000 --out /tmp/syn/all_states_clean.csv
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PROCESSED = os.path.join(REPO_ROOT, "data", "processed")
+
+# Probability of keeping each template skill, and of adding a co-occurring one
+SKILL_KEEP_P = 0.8
+SKILL_ADD_P = 0.4
+
+# Neighbours kept per skill in the co-occurrence table
+CO_OCCURRENCE_TOP = 15
+
+SALARY_JITTER = 0.08
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+")
+
+
+def load_postings(folder=PROCESSED):
+    """All per-state posting files in ``folder`` (summary reports excluded)."""
+    dfs = []
+    for f in sorted(os.listdir(folder)):
+        if not f.endswith("_clean.csv") or f.startswith("all_states"):
+            continue
+        df = pd.read_csv(os.path.join(folder, f))
+        if "title" in df.columns:
+            dfs.append(df)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _split_skills(value):
+    if pd.isna(value):
+        return []
+    return [s.strip() for s in str(value).split(",") if s.strip()]
+
+
+class _Categorical:
+    """Empirical distribution of one column (NaN kept as a value)."""
+
+    def __init__(self, series):
+        counts = series.astype(object).where(series.notna(), None).value_counts(dropna=False)
+        self.values = np.array(counts.index.tolist(), dtype=object)
+        self.p = (counts.to_numpy() / counts.sum()).astype(float)
+
+    def sample(self, rng, n):
+        return self.values[rng.choice(len(self.values), size=n, p=self.p)]
+
+
+class CorpusModel:
+    """Column distributions learned from real postings; see module docstring."""
+
+    def __init__(self, postings, max_sentences=50000, seed=0):
+        rng = np.random.default_rng(seed)
+        df = postings.reset_index(drop=True)
+        self.columns = list(df.columns)
+
+        # Templates: title + salary + skills, sampled together
+        self.titles = df["title"].fillna("").to_numpy(dtype=object)
+        self.interval = df["interval"].to_numpy(dtype=object)
+        self.min_amount = pd.to_numeric(df["min_amount"], errors="coerce").to_numpy()
+        self.max_amount = pd.to_numeric(df["max_amount"], errors="coerce").to_numpy()
+        self.template_skills = [_split_skills(s) for s in df["parsed_skills"]]
+
+        self.marginals = {
+            col: _Categorical(df[col])
+            for col in ["company", "location", "date_posted", "job_type", "is_remote",
+                        "site", "currency", "company_industry"]
+            if col in df.columns
+        }
+
+        # Skill vocabulary and co-occurrence neighbours
+        vocab = sorted({s for skills in self.template_skills for s in skills})
+        self.skills = np.array(vocab, dtype=object)
+        skill_id = {s: i for i, s in enumerate(vocab)}
+        co = np.zeros((len(vocab), len(vocab)), dtype=np.int64)
+        for skills in self.template_skills:
+            ids = np.array([skill_id[s] for s in set(skills)], dtype=np.int64)
+            if len(ids) > 1:
+                co[np.ix_(ids, ids)] += 1
+        np.fill_diagonal(co, 0)
+        self.neighbours = []
+        for row in co:
+            top = np.argsort(row)[::-1][:CO_OCCURRENCE_TOP]
+            top = top[row[top] > 0]
+            if len(top):
+                self.neighbours.append((top, np.cumsum(row[top]) / row[top].sum()))
+            else:
+                self.neighbours.append(None)
+
+        # Description sentences and lengths (in sentences)
+        sentences = []
+        lengths = []
+        for desc in df["description"].dropna().astype(str):
+            parts = [s for s in _SENTENCE_SPLIT.split(desc) if len(s) > 20]
+            lengths.append(max(len(parts), 1))
+            sentences.extend(parts)
+        if len(sentences) > max_sentences:
+            sentences = list(rng.choice(np.array(sentences, dtype=object), max_sentences, replace=False))
+        self.sentences = np.array(sentences or ["No description."], dtype=object)
+        self.description_lengths = np.array(lengths or [1])
+
+    def _sample_skills(self, rng, template):
+        skills = [s for s in self.template_skills[template] if rng.random() < SKILL_KEEP_P]
+        if skills and rng.random() < SKILL_ADD_P:
+            anchor = np.searchsorted(self.skills, skills[rng.integers(len(skills))])
+            nb = self.neighbours[anchor]
+            if nb is not None:
+                pick = nb[0][np.searchsorted(nb[1], rng.random())]
+                if self.skills[pick] not in skills:
+                    skills.append(self.skills[pick])
+        return sorted(skills)
+
+    def sample(self, n, rng, start_id=0):
+        """Return ``n`` synthetic postings as a DataFrame."""
+        templates = rng.integers(len(self.titles), size=n)
+        out = {}
+        ids = np.arange(start_id, start_id + n)
+        out["id"] = [f"syn-{i:09d}" for i in ids]
+        out["job_url"] = [f"https://example.com/viewjob?jk=syn{i:09d}" for i in ids]
+        out["title"] = self.titles[templates]
+        out["interval"] = self.interval[templates]
+
+        jitter = np.exp(rng.normal(0.0, SALARY_JITTER, size=n))
+        out["min_amount"] = np.round(self.min_amount[templates] * jitter, -2)
+        out["max_amount"] = np.round(self.max_amount[templates] * jitter, -2)
+
+        for col, dist in self.marginals.items():
+            out[col] = dist.sample(rng, n)
+
+        skills = [self._sample_skills(rng, t) for t in templates]
+        out["parsed_skills"] = [", ".join(s) for s in skills]
+        # The recommender's skill overlap score reads skills
+        out["skills"] = out["parsed_skills"]
+
+        n_sent = rng.choice(self.description_lengths, size=n)
+        sent_ids = rng.integers(len(self.sentences), size=int(n_sent.sum()))
+        bounds = np.cumsum(n_sent)[:-1]
+        descriptions = []
+        for row_skills, chunk in zip(skills, np.split(sent_ids, bounds)):
+            text = " ".join(self.sentences[chunk])
+            if row_skills:
+                text += " Skills: " + ", ".join(row_skills) + "."
+            descriptions.append(text)
+        out["description"] = descriptions
+
+        frame = pd.DataFrame(out)
+        if "state" in self.columns and "location" in frame.columns:
+            frame["state"] = frame["location"].astype(str).str.extract(r",\s*([A-Z]{2})\b")[0]
+        for col in self.columns:
+            if col not in frame.columns:
+                frame[col] = None
+        return frame[self.columns]
+
+
+def write_corpus(model, rows, path, seed=0, chunk_size=50000):
+    """Write ``rows`` synthetic postings to ``path`` in chunks."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+    while written < rows:
+        n = min(chunk_size, rows - written)
+        chunk = model.sample(n, rng, start_id=written)
+        chunk.to_csv(path, mode="a" if written else "w", header=not written, index=False)
+        written += n
+        print(f"  {written}/{rows} rows", file=sys.stderr)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--out", required=True, help="output CSV path")
+    parser.add_argument("--source", default=PROCESSED,
+                        help="folder of processed CSVs to learn from")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    model = CorpusModel(load_postings(args.source), seed=args.seed)
+    write_corpus(model, args.rows, args.out, seed=args.seed, chunk_size=args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
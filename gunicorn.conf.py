@@ -0,0 +1,69 @@
+"""
+Gunicorn settings for the dashboard (see Procfile).
+
+With PRELOAD_DATA=1 (the default) the app, the all-states dataset, the
+recommendation index and the /recommend modules (scikit-learn, PyPDF2) are
+loaded once in the master before workers fork, so every worker shares the
+same pages copy-on-write and none of them pays the load cost on its first
+request.
+
+With APP_METRICS=1, workers share their metrics through
+METRICS_MULTIPROC_DIR (a folder under the system temp dir unless set), so
+/metrics reports every worker (see api/metrics.py).
+"""
+import gc
+import os
+import tempfile
+
+if os.environ.get("APP_METRICS", "0") == "1":
+    os.environ.setdefault("METRICS_MULTIPROC_DIR",
+                          os.path.join(tempfile.gettempdir(), "job-dashboard-metrics"))
+
+workers = int(os.environ.get("WEB_CONCURRENCY", 2))
+
+preload_app = os.environ.get("PRELOAD_DATA", "1") == "1"
+
+
+def on_starting(server):
+    from api import metrics
+
+    metrics.clear_multiproc_dir()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    from src.website.app import warm_up
+
+    warm_up()
+
+    # The workers' /metrics include what the preload recorded
+    from api import metrics
+
+    metrics.flush(force=True)
+
+    # Move everything loaded so far out of the collector's reach, so a GC
+    # pass in a worker doesn't write to (and un-share) the master's pages.
+    gc.freeze()
+    server.log.info("Preloaded dataset and recommendation index")
+
+
+def post_fork(server, worker):
+    # Each worker watches the dataset manifest; one of them builds each new
+    # version as a snapshot and all of them map it (see data_loader.SNAPSHOT_DIR)
+    from api.data_loader import start_watcher
+
+    start_watcher()
+
+
+def worker_exit(server, worker):
+    from api import metrics
+
+    metrics.flush(force=True)
+
+
+def child_exit(server, worker):
+    from api import metrics
+
+    metrics.mark_process_dead(worker.pid)
@@ -1,19 +1,15 @@
 from __future__ import annotations
 
+import importlib
+import inspect
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import Tuple
 
 import pandas as pd
 
-from jobspy.bayt import BaytScraper
-from jobspy.bdjobs import BDJobs
-from jobspy.glassdoor import Glassdoor
-from jobspy.google import Google
-from jobspy.indeed import Indeed
-from jobspy.linkedin import LinkedIn
-from jobspy.naukri import Naukri
 from jobspy.model import JobType, Location, JobResponse, Country
 from jobspy.model import SalarySource, ScraperInput, Site
+from jobspy.telemetry import ScrapeTelemetry
 from jobspy.util import (
     set_logger_level,
     extract_salary,
@@ -23,10 +19,37 @@ from jobspy.util import (
     convert_to_annual,
     desired_order,
 )
-from jobspy.ziprecruiter import ZipRecruiter
 
 
-# Update the SCRAPER_MAPPING dictionary in the scrape_jobs function
+# Scraper modules are imported only for the sites being scraped, so e.g. an
+# Indeed-only run doesn't load the other scrapers or their dependencies.
+SCRAPER_MAPPING = {
+    Site.LINKEDIN: ("jobspy.linkedin", "LinkedIn"),
+    Site.INDEED: ("jobspy.indeed", "Indeed"),
+    Site.ZIP_RECRUITER: ("jobspy.ziprecruiter", "ZipRecruiter"),
+    Site.GLASSDOOR: ("jobspy.glassdoor", "Glassdoor"),
+    Site.GOOGLE: ("jobspy.google", "Google"),
+    Site.BAYT: ("jobspy.bayt", "BaytScraper"),
+    Site.NAUKRI: ("jobspy.naukri", "Naukri"),
+    Site.BDJOBS: ("jobspy.bdjobs", "BDJobs"),
+}
+
+
+def get_scraper_class(site: Site):
+    """
+    Imports and returns the scraper class for a site
+    """
+    module_name, class_name = SCRAPER_MAPPING[site]
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def __getattr__(name: str):
+    # keep `from jobspy import Indeed` etc. working without eager imports
+    for module_name, class_name in SCRAPER_MAPPING.values():
+        if class_name == name:
+            return getattr(importlib.import_module(module_name), class_name)
+    raise AttributeError(f"module 'jobspy' has no attribute '{name}'")
+
 
 def scrape_jobs(
     site_name: str | list[str] | Site | list[Site] | None = None,
@@ -49,24 +72,22 @@ def scrape_jobs(
     enforce_annual_salary: bool = False,
     verbose: int = 0,
     user_agent: str = None,
+    return_report: bool = False,
+    telemetry_path: str | None = None,
     **kwargs,
-) -> pd.DataFrame:
+) -> pd.DataFrame | Tuple[pd.DataFrame, dict]:
     """
     Scrapes job data from job boards concurrently
-    :return: Pandas DataFrame containing job data
+    :param return_report: also return a per-site run report (requests, bytes,
+        page latencies, job yield/duplicates, why paging stopped)
+    :param telemetry_path: append per-request/per-page events and the report
+        to this JSONL file
+    :return: Pandas DataFrame containing job data, or (DataFrame, report)
+        if return_report is set
     """
-    SCRAPER_MAPPING = {
-        Site.LINKEDIN: LinkedIn,
-        Site.INDEED: Indeed,
-        Site.ZIP_RECRUITER: ZipRecruiter,
-        Site.GLASSDOOR: Glassdoor,
-        Site.GOOGLE: Google,
-        Site.BAYT: BaytScraper,
-        Site.NAUKRI: Naukri,
-        Site.BDJOBS: BDJobs,  # Add BDJobs to the scraper mapping
-    }
     set_logger_level(verbose)
     job_type = get_enum_from_value(job_type) if job_type else None
+    telemetry = ScrapeTelemetry() if (return_report or telemetry_path) else None
 
     def get_site_type():
         site_types = list(Site)
@@ -102,8 +123,12 @@ def scrape_jobs(
     )
 
     def scrape_site(site: Site) -> Tuple[str, JobResponse]:
-        scraper_class = SCRAPER_MAPPING[site]
-        scraper = scraper_class(proxies=proxies, ca_cert=ca_cert, user_agent=user_agent)
+        scraper_class = get_scraper_class(site)
+        scraper_kwargs = dict(proxies=proxies, ca_cert=ca_cert, user_agent=user_agent)
+        # only some scrapers are instrumented so far (Indeed)
+        if telemetry is not None and "telemetry" in inspect.signature(scraper_class).parameters:
+            scraper_kwargs["telemetry"] = telemetry
+        scraper = scraper_class(**scraper_kwargs)
         scraped_data: JobResponse = scraper.scrape(scraper_input)
         cap_name = site.value.capitalize()
         site_name = "ZipRecruiter" if cap_name == "Zip_recruiter" else cap_name
@@ -214,14 +239,21 @@ def scrape_jobs(
         jobs_df = jobs_df[desired_order]
 
         # Step 4: Sort the DataFrame as required
-        return jobs_df.sort_values(
+        jobs_df = jobs_df.sort_values(
             by=["site", "date_posted"], ascending=[True, False]
         ).reset_index(drop=True)
     else:
-        return pd.DataFrame()
+        jobs_df = pd.DataFrame()
+
+    if telemetry is None:
+        return jobs_df
+    if telemetry_path:
+        telemetry.write_jsonl(telemetry_path)
+    if return_report:
+        return jobs_df, telemetry.report()
+    return jobs_df
 
 
-# Add BDJobs to __all__
 __all__ = [
-    "BDJobs",
+    "ScrapeTelemetry",
 ]
\ No newline at end of file
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import math
+import time
 from datetime import datetime
 from typing import Tuple
 
@@ -28,20 +29,26 @@ log = create_logger("Indeed")
 
 class Indeed(Scraper):
     def __init__(
-        self, proxies: list[str] | str | None = None, ca_cert: str | None = None, user_agent: str | None = None
+        self, proxies: list[str] | str | None = None, ca_cert: str | None = None, user_agent: str | None = None,
+        telemetry=None,
     ):
         """
         Initializes IndeedScraper with the Indeed API url
         """
-        super().__init__(Site.INDEED, proxies=proxies)
+        super().__init__(Site.INDEED, proxies=proxies, telemetry=telemetry)
 
         self.session = create_session(
-            proxies=self.proxies, ca_cert=ca_cert, is_tls=False
+            proxies=self.proxies,
+            ca_cert=ca_cert,
+            is_tls=False,
+            telemetry=telemetry,
+            telemetry_site=Site.INDEED.value,
         )
         self.scraper_input = None
         self.jobs_per_page = 100
         self.num_workers = 10
         self.seen_urls = set()
+        self._last_page_ok = True
         self.headers = None
         self.api_country_code = None
         self.base_url = None
@@ -67,12 +74,15 @@ class Indeed(Scraper):
             log.info(
                 f"search page: {page} / {math.ceil(scraper_input.results_wanted / self.jobs_per_page)}"
             )
-            jobs, cursor = self._scrape_page(cursor)
+            jobs, cursor = self._scrape_page(cursor, page)
             if not jobs:
                 log.info(f"found no jobs on page: {page}")
+                self._record_stop("no_jobs" if self._last_page_ok else "non_ok_status", page)
                 break
             job_list += jobs
             page += 1
+        else:
+            self._record_stop("results_wanted_reached", page - 1)
         return JobResponse(
             jobs=job_list[
                 scraper_input.offset : scraper_input.offset
@@ -80,12 +90,22 @@ class Indeed(Scraper):
             ]
         )
 
-    def _scrape_page(self, cursor: str | None) -> Tuple[list[JobPost], str | None]:
+    def _record_stop(self, reason: str, page: int):
+        if self.telemetry is not None:
+            self.telemetry.record(
+                "stop", site=self.site.value, reason=reason, page=page,
+                jobs_seen=len(self.seen_urls),
+            )
+
+    def _scrape_page(self, cursor: str | None, page: int | None = None) -> Tuple[list[JobPost], str | None]:
         """
         Scrapes a page of Indeed for jobs with scraper_input criteria
         :param cursor:
+        :param page: page number, for telemetry
         :return: jobs found on page, next page cursor
         """
+        start = time.perf_counter()
+        self._last_page_ok = True
         jobs = []
         new_cursor = None
         filters = self._build_filters()
@@ -121,6 +141,8 @@ class Indeed(Scraper):
             log.info(
                 f"responded with status code: {response.status_code} (submit GitHub issue if this appears to be a bug)"
             )
+            self._last_page_ok = False
+            self._record_page(page, start, response, results=0, new_jobs=0)
             return jobs, new_cursor
         data = response.json()
         jobs = data["data"]["jobSearch"]["results"]
@@ -132,8 +154,28 @@ class Indeed(Scraper):
             if processed_job:
                 job_list.append(processed_job)
 
+        self._record_page(page, start, response, results=len(jobs), new_jobs=len(job_list))
         return job_list, new_cursor
 
+    def _record_page(self, page, start, response, results, new_jobs):
+        """
+        Records one search page: latency, response size and job yield
+        (results the API returned vs. new ones after seen_urls dedupe)
+        """
+        if self.telemetry is None:
+            return
+        self.telemetry.record(
+            "page",
+            site=self.site.value,
+            page=page,
+            status=response.status_code,
+            latency_s=round(time.perf_counter() - start, 4),
+            bytes=len(response.content or b""),
+            results=results,
+            new_jobs=new_jobs,
+            duplicates=results - new_jobs,
+        )
+
     def _build_filters(self):
         """
         Builds the filters dict for job type/is_remote. If hours_old is provided, composite filter for job_type/is_remote is not possible.
@@ -324,12 +324,14 @@ class ScraperInput(BaseModel):
 
 class Scraper(ABC):
     def __init__(
-        self, site: Site, proxies: list[str] | None = None, ca_cert: str | None = None, user_agent: str | None = None
+        self, site: Site, proxies: list[str] | None = None, ca_cert: str | None = None, user_agent: str | None = None,
+        telemetry=None,
     ):
         self.site = site
         self.proxies = proxies
         self.ca_cert = ca_cert
         self.user_agent = user_agent
+        self.telemetry = telemetry
 
     @abstractmethod
     def scrape(self, scraper_input: ScraperInput) -> JobResponse: ...
@@ -0,0 +1,105 @@
+"""
+jobspy.telemetry
+~~~~~~~~~~~~~~~~
+
+Structured metrics for a scrape run: one event per HTTP request (from the
+session layer), one per search page (from the scrapers) and one when a
+site stops paging. ``report()`` aggregates them per site.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+
+
+def _percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    idx = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[idx]
+
+
+class ScrapeTelemetry:
+    def __init__(self):
+        self.events: list[dict] = []
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, **fields):
+        """
+        Adds an event
+        :param kind: "request", "page" or "stop"
+        :param fields: event fields, e.g. site, status, latency_s, bytes
+        """
+        event = {"ts": round(time.time(), 3), "kind": kind, **fields}
+        with self._lock:
+            self.events.append(event)
+
+    def report(self) -> dict:
+        """
+        Aggregates events per site
+        :return: dict of site -> counters and latency percentiles
+        """
+        with self._lock:
+            events = list(self.events)
+
+        sites: dict[str, dict] = {}
+        latencies: dict[str, list[float]] = {}
+        for event in events:
+            site = event.get("site") or "unknown"
+            stats = sites.setdefault(
+                site,
+                {
+                    "requests": 0,
+                    "request_errors": 0,
+                    "status_counts": {},
+                    "bytes": 0,
+                    "pages": 0,
+                    "jobs_returned": 0,
+                    "jobs_new": 0,
+                    "jobs_duplicate": 0,
+                    "stop_reason": None,
+                },
+            )
+            if event["kind"] == "request":
+                stats["requests"] += 1
+                status = str(event.get("status"))
+                stats["status_counts"][status] = stats["status_counts"].get(status, 0) + 1
+                if not event.get("ok"):
+                    stats["request_errors"] += 1
+                stats["bytes"] += event.get("bytes") or 0
+            elif event["kind"] == "page":
+                stats["pages"] += 1
+                stats["jobs_returned"] += event.get("results", 0)
+                stats["jobs_new"] += event.get("new_jobs", 0)
+                stats["jobs_duplicate"] += event.get("duplicates", 0)
+                latencies.setdefault(site, []).append(event["latency_s"])
+            elif event["kind"] == "stop":
+                stats["stop_reason"] = event.get("reason")
+
+        for site, stats in sites.items():
+            lat = latencies.get(site, [])
+            stats["page_latency_s"] = {
+                "p50": _percentile(lat, 0.5),
+                "p95": _percentile(lat, 0.95),
+                "max": max(lat) if lat else None,
+            }
+        return {
+            "elapsed_s": round(time.time() - self.started, 3),
+            "sites": sites,
+        }
+
+    def write_jsonl(self, path: str):
+        """
+        Writes every event, then the aggregated report, as JSON lines
+        :param path: output file, appended to
+        """
+        with self._lock:
+            events = list(self.events)
+        with open(path, "a") as f:
+            for event in events:
+                f.write(json.dumps(event) + "\n")
+            f.write(json.dumps({"kind": "report", **self.report()}) + "\n")
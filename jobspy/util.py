@@ -2,13 +2,12 @@ from __future__ import annotations
 
 import logging
 import re
+import time
 from itertools import cycle
+from urllib.parse import urlsplit
 
-import numpy as np
 import requests
-import tls_client
 import urllib3
-from markdownify import markdownify as md
 from requests.adapters import HTTPAdapter, Retry
 
 from jobspy.model import CompensationInterval, JobType, Site
@@ -30,6 +29,27 @@ def create_logger(name: str):
 
 
 class RotatingProxySession:
+    # Set by create_session; receives one "request" event per HTTP call
+    telemetry = None
+    telemetry_site = None
+
+    def _record_request(self, method, url, start, response=None, error=None):
+        if self.telemetry is None:
+            return
+        parts = urlsplit(str(url))
+        self.telemetry.record(
+            "request",
+            site=self.telemetry_site,
+            method=method,
+            host=parts.netloc,
+            path=parts.path,
+            status=response.status_code if response is not None else None,
+            ok=bool(response is not None and response.ok),
+            latency_s=round(time.perf_counter() - start, 4),
+            bytes=len(response.content or b"") if response is not None else 0,
+            error=f"{type(error).__name__}: {error}" if error else None,
+        )
+
     def __init__(self, proxies=None):
         if isinstance(proxies, str):
             self.proxy_cycle = cycle([self.format_proxy(proxies)])
@@ -83,24 +103,63 @@ class RequestsRotating(RotatingProxySession, requests.Session):
                 self.proxies = next_proxy
             else:
                 self.proxies = {}
-        return requests.Session.request(self, method, url, **kwargs)
+        start = time.perf_counter()
+        try:
+            response = requests.Session.request(self, method, url, **kwargs)
+        except Exception as e:
+            self._record_request(method, url, start, error=e)
+            raise
+        self._record_request(method, url, start, response=response)
+        return response
 
 
-class TLSRotating(RotatingProxySession, tls_client.Session):
-    def __init__(self, proxies=None):
-        RotatingProxySession.__init__(self, proxies=proxies)
-        tls_client.Session.__init__(self, random_tls_extension_order=True)
+_TLS_ROTATING = None
 
-    def execute_request(self, *args, **kwargs):
-        if self.proxy_cycle:
-            next_proxy = next(self.proxy_cycle)
-            if next_proxy["http"] != "http://localhost":
-                self.proxies = next_proxy
-            else:
-                self.proxies = {}
-        response = tls_client.Session.execute_request(self, *args, **kwargs)
-        response.ok = response.status_code in range(200, 400)
-        return response
+
+def get_tls_rotating_class():
+    """
+    Builds the TLSRotating session class on first use, so tls_client is only
+    imported by scrapers that ask for a TLS session
+    """
+    global _TLS_ROTATING
+    if _TLS_ROTATING is not None:
+        return _TLS_ROTATING
+
+    import tls_client
+
+    class TLSRotating(RotatingProxySession, tls_client.Session):
+        def __init__(self, proxies=None):
+            RotatingProxySession.__init__(self, proxies=proxies)
+            tls_client.Session.__init__(self, random_tls_extension_order=True)
+
+        def execute_request(self, *args, **kwargs):
+            if self.proxy_cycle:
+                next_proxy = next(self.proxy_cycle)
+                if next_proxy["http"] != "http://localhost":
+                    self.proxies = next_proxy
+                else:
+                    self.proxies = {}
+            method = kwargs.get("method", args[0] if args else None)
+            url = kwargs.get("url", args[1] if len(args) > 1 else "")
+            start = time.perf_counter()
+            try:
+                response = tls_client.Session.execute_request(self, *args, **kwargs)
+            except Exception as e:
+                self._record_request(method, url, start, error=e)
+                raise
+            response.ok = response.status_code in range(200, 400)
+            self._record_request(method, url, start, response=response)
+            return response
+
+    _TLS_ROTATING = TLSRotating
+    return _TLS_ROTATING
+
+
+def __getattr__(name: str):
+    # keep `from jobspy.util import TLSRotating` working without importing tls_client
+    if name == "TLSRotating":
+        return get_tls_rotating_class()
+    raise AttributeError(f"module 'jobspy.util' has no attribute '{name}'")
 
 
 def create_session(
@@ -111,13 +170,16 @@ def create_session(
     has_retry: bool = False,
     delay: int = 1,
     clear_cookies: bool = False,
+    telemetry=None,
+    telemetry_site: str | None = None,
 ) -> requests.Session:
     """
     Creates a requests session with optional tls, proxy, and retry settings.
+    If telemetry (a ScrapeTelemetry) is given, every request is recorded to it.
     :return: A session object
     """
     if is_tls:
-        session = TLSRotating(proxies=proxies)
+        session = get_tls_rotating_class()(proxies=proxies)
     else:
         session = RequestsRotating(
             proxies=proxies,
@@ -129,6 +191,9 @@ def create_session(
     if ca_cert:
         session.verify = ca_cert
 
+    session.telemetry = telemetry
+    session.telemetry_site = telemetry_site
+
     return session
 
 
@@ -154,6 +219,8 @@ def set_logger_level(verbose: int):
 def markdown_converter(description_html: str):
     if description_html is None:
         return None
+    from markdownify import markdownify as md
+
     markdown = md(description_html)
     return markdown.strip()
 
@@ -186,6 +253,8 @@ def get_enum_from_job_type(job_type_str: str) -> JobType | None:
 
 
 def currency_parser(cur_str):
+    import numpy as np
+
     # Remove any non-numerical characters
     # except for ',' '.' or '-' (e.g. EUR)
     cur_str = re.sub("[^-0-9.,]", "", cur_str)
@@ -0,0 +1,174 @@
+"""
+Hashed TF-IDF vectors of job postings that take new postings without a
+refit. Postings are appended and tombstoned in O(new rows); refresh()
+recomputes IDF and norms from the kept document frequencies.
+
+    vectors = JobVectors.from_texts(texts).refreshed()
+    scores = vectors.appended(new_texts).scores(resume_text, rows)
+"""
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+N_FEATURES = 2**21
+
+# Same term filtering as the recommender's old per-request TfidfVectorizer:
+# terms in fewer than MIN_DF postings or more than MAX_DF of them are ignored
+MIN_DF = 3
+MAX_DF = 0.85
+
+# Appended blocks kept before they are merged into one
+MAX_BLOCKS = 8
+
+# Arrays written by save(): the CSR parts of the vectors, df and alive
+ARRAYS = ["data", "indices", "indptr", "df", "alive"]
+
+_VECTORIZER = None
+
+
+def _vectorizer():
+    global _VECTORIZER
+    if _VECTORIZER is None:
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        _VECTORIZER = HashingVectorizer(
+            stop_words="english", ngram_range=(1, 2), n_features=N_FEATURES,
+            alternate_sign=False, norm=None, dtype=np.float32,
+        )
+    return _VECTORIZER
+
+
+def term_frequencies(texts):
+    """Sublinear term frequencies (CSR, one row per text)."""
+    x = _vectorizer().transform(texts).tocsr()
+    x.sum_duplicates()
+    np.log(x.data, out=x.data)
+    x.data += 1
+    return x
+
+
+def _norms(x, weights):
+    """Weighted length of each row of ``x``."""
+    return np.sqrt(x.multiply(x) @ (weights * weights)).astype(np.float32)
+
+
+def _document_frequency(x, rows=None):
+    """Postings per column over ``rows`` of ``x`` (all rows if None)."""
+    if rows is not None:
+        x = x[rows]
+    return np.bincount(x.indices, minlength=N_FEATURES).astype(np.int32)
+
+
+class JobVectors:
+    """Appendable hashed TF-IDF vectors with tombstones (see the README)."""
+
+    def __init__(self, blocks, df, alive):
+        self.blocks = blocks
+        self.df = df
+        self.alive = alive
+        self.n_docs = len(alive)
+        self.weights = None
+        self.norms = None
+
+    @classmethod
+    def from_texts(cls, texts):
+        x = term_frequencies(texts)
+        return cls([x], _document_frequency(x), np.ones(x.shape[0], dtype=bool))
+
+    @classmethod
+    def load(cls, paths, mmap_mode="r"):
+        """Vectors written by save(), ``paths`` mapping ARRAYS to files. Memory-mapped by default."""
+        arrays = {name: np.load(paths[name], mmap_mode=mmap_mode) for name in ARRAYS}
+        n = len(arrays["indptr"]) - 1
+        x = csr_matrix((arrays["data"], arrays["indices"], arrays["indptr"]), shape=(n, N_FEATURES))
+        return cls([x], arrays["df"], arrays["alive"])
+
+    def save(self, paths):
+        """Write the vectors as one raw .npy array per ARRAYS entry of ``paths`` (file objects or names)."""
+        x = self.compacted().blocks[0]
+        # One index dtype, so load() can use the mapped arrays without a cast
+        index_dtype = np.result_type(x.indices, x.indptr)
+        arrays = {"data": x.data, "indices": x.indices.astype(index_dtype, copy=False),
+                  "indptr": x.indptr.astype(index_dtype, copy=False), "df": self.df,
+                  "alive": self.alive}
+        for name in ARRAYS:
+            np.save(paths[name], arrays[name])
+
+    def appended(self, texts):
+        """
+        New vectors with ``texts`` as rows n_docs, n_docs + 1, ... (see
+        MAX_BLOCKS). Current weights are kept and only the new rows' norms
+        computed.
+        """
+        x = term_frequencies(texts)
+        blocks = self.blocks + [x]
+        if len(blocks) > MAX_BLOCKS:
+            # The first block may be memory-mapped and shared, leave it be
+            blocks = [blocks[0], vstack(blocks[1:], format="csr")]
+        out = JobVectors(blocks, self.df + _document_frequency(x),
+                         np.concatenate([self.alive, np.ones(x.shape[0], dtype=bool)]))
+        if self.weights is not None:
+            out.weights = self.weights
+            out.norms = np.concatenate([self.norms, _norms(x, self.weights)])
+        return out
+
+    def removed(self, rows):
+        """New vectors with ``rows`` tombstoned: left out of df and scored 0. Weights are kept."""
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = np.unique(rows[self.alive[rows]])
+        alive = self.alive.copy()
+        alive[rows] = False
+        df = self.df.copy()
+        start = 0
+        for block in self.blocks:
+            end = start + block.shape[0]
+            mine = rows[(rows >= start) & (rows < end)] - start
+            if len(mine):
+                df -= _document_frequency(block, mine)
+            start = end
+        out = JobVectors(self.blocks, df, alive)
+        if self.weights is not None:
+            out.weights = self.weights
+            out.norms = np.where(alive, self.norms, 0).astype(np.float32)
+        return out
+
+    def compacted(self):
+        """The same vectors as one block, tombstoned rows emptied."""
+        x = vstack(self.blocks, format="csr") if len(self.blocks) > 1 else self.blocks[0].copy()
+        if not self.alive.all():
+            keep = np.repeat(self.alive, np.diff(x.indptr))
+            indptr = np.concatenate([[0], np.cumsum(np.where(self.alive, np.diff(x.indptr), 0))])
+            x = csr_matrix((x.data[keep], x.indices[keep], indptr), shape=x.shape)
+        out = JobVectors([x], self.df, self.alive)
+        out.weights, out.norms = self.weights, self.norms
+        return out
+
+    def refreshed(self):
+        """IDF weights and row norms from the current counts (in place; returns self)."""
+        n = int(self.alive.sum())
+        weights = (np.log((1 + n) / (1 + self.df)) + 1).astype(np.float32)
+        weights[(self.df < MIN_DF) | (self.df > MAX_DF * n)] = 0
+        norms = np.concatenate([_norms(block, weights) for block in self.blocks])
+        norms[~self.alive] = 0
+        self.weights, self.norms = weights, norms
+        return self
+
+    def scores(self, text, rows=None):
+        """Cosine similarity of ``text`` with each posting (or ``rows`` of them)."""
+        if self.weights is None:
+            self.refreshed()
+        q = term_frequencies([text])
+        q.data *= self.weights[q.indices]
+        q_norm = np.sqrt(q.multiply(q).sum())
+        # Scoring against weight * vector: the query side carries both weights
+        # A dense query makes each block product a plain matrix-vector one,
+        # about twice as fast as sparse @ sparse
+        dense = np.zeros(N_FEATURES, dtype=np.float32)
+        dense[q.indices] = q.data * self.weights[q.indices]
+        dots = np.concatenate([block @ dense for block in self.blocks])
+        if rows is not None:
+            dots, norms = dots[rows], self.norms[rows]
+        else:
+            norms = self.norms
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out = np.where(norms > 0, dots / (norms * q_norm), 0.0)
+        return np.nan_to_num(out)
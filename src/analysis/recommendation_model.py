@@ -1,33 +1,70 @@
-import os
+import copy
+import hashlib
 import json
+import os
+import threading
+from collections import OrderedDict
 import pandas as pd
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import PyPDF2
+import numpy as np
+
+# scikit-learn and PyPDF2 are imported where they're used, so importing this
+# module (and starting the web app) doesn't pay for them until /recommend runs;
+# a gunicorn preload imports them in the master (import_recommend_modules).
+
+from api import metrics
+from api.data_loader import DATA_DIR, MANIFEST_PATH, append_frames, apply_schema, get_dataset, read_manifest
+# All the skills from the skill.json file (loaded on first use)
+from api.skills import ID_DTYPES, SkillMatrix, encode_skills, get_skill_terms, listed_counts, skill_names
+from src.analysis.job_vectors import ARRAYS, JobVectors
+
+
+# Title terms for roles we filter out by default (we are new grads)
+DEFAULT_SENIOR_TERMS = ("senior", "sr.", "lead", "principal", "director", "manager")
+
+# How many years above the candidate's experience a posting may ask for
+DEFAULT_EXP_TOLERANCE = 1
 
-# Load all the skills from the skill.json file
-SKILLS_JSON_PATH = os.path.join(os.path.dirname(__file__), "..", "cleaning", "skills.json")
+# Bounds on the per-index caches, which are keyed by user input (resume
+# experience, exclude_titles): title masks per term, candidate masks per
+# (experience, terms), and terms considered per request
+TERM_CACHE_SIZE = 256
+CANDIDATE_CACHE_SIZE = 128
+MAX_SENIOR_TERMS = 20
 
-with open(SKILLS_JSON_PATH, "r") as f:
-    SKILL_TERMS = json.load(f)
+# Postings older than this many days are tombstoned in the job index and
+# never recommended (0 keeps them all). Applied when the index is built, to
+# ingested postings as they are appended and on every refit (see get_job_index).
+MAX_POSTING_AGE_DAYS = int(os.environ.get("RECOMMEND_MAX_AGE_DAYS", 0))
 
 
-# Load all job data from processed CSVs
+def job_texts(jobs):
+    """Text matched against resumes: title + skills + description."""
+    return (
+        jobs["title"].fillna("").astype(str) + " " +
+        jobs["skills"].fillna("").astype(str) + " " +
+        jobs["description"].fillna("").astype(str)
+    ).tolist()
+
+# Load all job data from processed CSVs (the built dataset if there is a
+# manifest, every CSV in the folder otherwise)
 def load_job_data():
-    base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-    folder_path = os.path.join(base_dir, "data", "processed")
+    folder_path = DATA_DIR
 
-    all_files = [
-        os.path.join(folder_path, f)
-        for f in os.listdir(folder_path)
-        if f.endswith(".csv")
-    ]
+    if os.path.exists(MANIFEST_PATH):
+        _, files, _ = read_manifest()
+        all_files = [os.path.join(folder_path, f) for f in files]
+    else:
+        all_files = [
+            os.path.join(folder_path, f)
+            for f in os.listdir(folder_path)
+            if f.endswith(".csv")
+        ]
 
     dfs = []
     for file in all_files:
         try:
-            df = pd.read_csv(file)
+            df = pd.read_csv(file, dtype=ID_DTYPES)
             dfs.append(df)
         except Exception as e:
             print(f"Error reading {file}: {e}")
@@ -35,14 +72,51 @@ def load_job_data():
     if not dfs:
         raise ValueError("No CSV files found in processed folder.")
 
-    combined = pd.concat(dfs, ignore_index=True)
+    return apply_schema(dedupe_jobs(pd.concat(dfs, ignore_index=True)))
+
 
-    # Remove duplicates
-    combined = combined.drop_duplicates(
+# Remove duplicates: near-duplicate clusters from the cleaning stage
+# (src/cleaning/dedupe.py) where available, exact matches otherwise
+def dedupe_jobs(combined):
+    if "cluster_id" in combined.columns:
+        clustered = combined["cluster_id"].notna()
+        combined = pd.concat([
+            combined[clustered].drop_duplicates(subset=["cluster_id"], keep="first"),
+            combined[~clustered],
+        ])
+    return combined.drop_duplicates(
         subset=["title", "company", "description"], keep="first"
     )
 
-    return combined
+
+def jobs_digest(jobs):
+    """Fingerprint of the job rows' ids and order, to match stored vectors to them."""
+    ids = jobs["id"].astype(object).fillna("").astype(str) if "id" in jobs.columns else []
+    return hashlib.sha1("\n".join(ids).encode()).hexdigest()[:12]
+
+
+def stored_job_vectors(jobs):
+    """
+    The build's JobVectors (manifest "job_vectors"), memory-mapped, if they
+    were built for exactly these ``jobs``; None otherwise.
+    """
+    if not os.path.exists(MANIFEST_PATH):
+        return None
+    with open(MANIFEST_PATH) as f:
+        entry = json.load(f).get("job_vectors")
+    if not entry or entry.get("rows") != len(jobs) or entry.get("digest") != jobs_digest(jobs):
+        return None
+    try:
+        return JobVectors.load({name: os.path.join(DATA_DIR, entry[name]) for name in ARRAYS})
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error loading job vectors: {e}")
+        return None
+
+
+def import_recommend_modules():
+    """Import scikit-learn and PyPDF2 now instead of on the first /recommend (gunicorn preload)."""
+    import PyPDF2  # noqa: F401
+    from sklearn.feature_extraction.text import HashingVectorizer  # noqa: F401
 
 
 # Extract resume text (PDF or TXT)
@@ -50,6 +124,8 @@ def extract_resume_text(resume_file):
     filename = resume_file.filename.lower()
 
     if filename.endswith(".pdf"):
+        import PyPDF2
+
         reader = PyPDF2.PdfReader(resume_file)
         text = ""
         for page in reader.pages:
@@ -79,7 +155,7 @@ def extract_years_of_experience(resume_text):
 # Extract skill matches from resume
 def extract_resume_skills(resume_text):
     resume_lower = resume_text.lower()
-    found = {s for s in SKILL_TERMS if s.lower() in resume_lower}
+    found = {s for s in get_skill_terms() if s.lower() in resume_lower}
     return found
 
 
@@ -103,47 +179,295 @@ def extract_years_from_description(text):
     return 0
 
 
+class _LRU:
+    """A dict bounded to ``size`` entries, evicting the least recently used."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def items(self):
+        """(key, value) pairs, least recently used first."""
+        with self._lock:
+            return list(self._items.items())
+
+
+def normalize_terms(terms):
+    """Lowercase, de-duplicated, sorted title terms, at most MAX_SENIOR_TERMS of them."""
+    return tuple(sorted({t.strip().lower() for t in terms if t.strip()}))[:MAX_SENIOR_TERMS]
+
+
+def job_keys(jobs):
+    """One hash per job of its title, company and description (what dedupe_jobs compares)."""
+    cols = pd.DataFrame({c: jobs[c].astype(object).fillna("").astype(str) if c in jobs.columns else ""
+                         for c in ["title", "company", "description"]}, index=jobs.index)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy()
+
+
+def expired_rows(jobs):
+    """Positions of the ``jobs`` posted more than MAX_POSTING_AGE_DAYS ago (none if 0)."""
+    if not MAX_POSTING_AGE_DAYS or "date_posted" not in jobs.columns:
+        return np.zeros(0, dtype=np.int64)
+    cutoff = pd.Timestamp.now() - pd.Timedelta(days=MAX_POSTING_AGE_DAYS)
+    posted = pd.to_datetime(jobs["date_posted"], errors="coerce")
+    return np.flatnonzero((posted < cutoff).to_numpy())
+
+
+def _min_exp(jobs):
+    # min_exp is precomputed by the build's derive stage
+    if "min_exp" in jobs.columns and jobs["min_exp"].notna().all():
+        return jobs["min_exp"].astype(int)
+    return jobs["description"].apply(extract_years_from_description).astype(int)
+
+
+def _skill_counts(jobs):
+    # skill_count is stored by the cleaning stage
+    if "skill_count" in jobs.columns and jobs["skill_count"].notna().all():
+        return jobs["skill_count"].to_numpy(dtype=np.int32)
+    return listed_counts(jobs.get("skills"), len(jobs))
+
+
+def _title_mask(titles, term):
+    return titles.str.contains(term, regex=False).to_numpy(dtype=bool)
+
+
+class JobIndex:
+    """
+    Job postings plus precomputed filter columns and row bitmaps.
+
+    ``is_senior`` and ``min_exp`` are computed once per posting, and
+    ``exp_bitmaps`` maps each experience level to a boolean mask of the
+    jobs requiring *at most* that many years, so the candidate set for a
+    resume is a cached intersection of two masks. ``skills`` holds each
+    job's ``skills`` as skill IDs, ``skill_counts`` how many skills it
+    lists (including ones outside the vocabulary) and ``vectors`` its
+    TF-IDF vector (rows line up with ``jobs``).
+
+    extended() appends ingested jobs, vectorizing and scanning only the
+    new rows (the arrays and frame are still copied), and leaves the IDF
+    weights stale and expired postings in place; refit() recomputes both,
+    and the dataset watcher runs it on a timer (see get_job_index).
+    """
+
+    def __init__(self, jobs, skills=None, vectors=None):
+        jobs = jobs.reset_index(drop=True)
+        if skills is None:
+            skills = SkillMatrix.from_columns(jobs.get("skill_ids"), jobs.get("skills"))
+        self.skills = skills
+        self.skill_counts = _skill_counts(jobs)
+        if vectors is None:
+            vectors = stored_job_vectors(jobs) or JobVectors.from_texts(job_texts(jobs))
+        expired = expired_rows(jobs)
+        if len(expired):
+            vectors = vectors.removed(expired)
+        self.vectors = vectors.refreshed()
+        self.title_lower = jobs["title"].fillna("").str.lower()
+        # Sorted job_keys, to leave out jobs the index already has
+        self.keys = np.sort(job_keys(jobs))
+
+        jobs["min_exp"] = _min_exp(jobs)
+        self._term_masks = _LRU(TERM_CACHE_SIZE)
+        jobs["is_senior"] = self.senior_mask(DEFAULT_SENIOR_TERMS)
+        self.jobs = jobs
+
+        min_exp = jobs["min_exp"].to_numpy()
+        self.exp_levels = np.unique(min_exp)
+        self.exp_bitmaps = {}
+        at_most = np.zeros(len(jobs), dtype=bool)
+        for level in self.exp_levels:
+            at_most = at_most | (min_exp == level)
+            self.exp_bitmaps[int(level)] = at_most
+
+        self._candidates = _LRU(CANDIDATE_CACHE_SIZE)
+
+    def extended(self, new_jobs):
+        """
+        A new index with ``new_jobs`` appended, leaving out postings whose
+        title, company and description it already has.
+
+        Only the new jobs are vectorized, checked for expiry and scanned
+        for title terms and experience; the existing rows' masks (and the
+        cached ones) are copied with the new rows' values appended, so an
+        append still costs a copy of every array. IDF weights are kept as
+        they are until refit().
+        """
+        new_jobs = new_jobs.reset_index(drop=True)
+        keys = job_keys(new_jobs)
+        pos = np.minimum(np.searchsorted(self.keys, keys), max(len(self.keys) - 1, 0))
+        known = self.keys[pos] == keys if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        new = ~known & ~pd.Series(keys).duplicated().to_numpy()
+        if not new.any():
+            return self
+        new_jobs = new_jobs[new].reset_index(drop=True)
+        keys = np.sort(keys[new])
+        n = len(self.jobs)
+
+        out = JobIndex.__new__(JobIndex)
+        out.skills = self.skills.concat(
+            SkillMatrix.from_columns(new_jobs.get("skill_ids"), new_jobs.get("skills"), n=len(new_jobs))
+        )
+        out.skill_counts = np.concatenate([self.skill_counts, _skill_counts(new_jobs)])
+        vectors = self.vectors.appended(job_texts(new_jobs))
+        expired = expired_rows(new_jobs)
+        if len(expired):
+            vectors = vectors.removed(n + expired)
+        out.vectors = vectors
+        out.keys = np.insert(self.keys, np.searchsorted(self.keys, keys), keys)
+
+        titles = new_jobs["title"].fillna("").str.lower()
+        out.title_lower = pd.concat([self.title_lower, titles], ignore_index=True)
+        out._term_masks = _LRU(TERM_CACHE_SIZE)
+        for term, mask in self._term_masks.items():
+            out._term_masks.put(term, np.concatenate([mask, _title_mask(titles, term)]))
+
+        def new_senior(terms):
+            mask = np.zeros(len(new_jobs), dtype=bool)
+            for term in normalize_terms(terms):
+                mask |= _title_mask(titles, term)
+            return mask
+
+        new_jobs["min_exp"] = _min_exp(new_jobs)
+        new_jobs["is_senior"] = new_senior(DEFAULT_SENIOR_TERMS)
+        out.jobs = append_frames(self.jobs, apply_schema(new_jobs))
+
+        min_exp = new_jobs["min_exp"].to_numpy()
+        out.exp_levels = np.union1d(self.exp_levels, min_exp)
+        out.exp_bitmaps = {int(level): np.concatenate([self.experience_mask(level), min_exp <= level])
+                           for level in out.exp_levels}
+
+        alive = vectors.alive[n:]
+        out._candidates = _LRU(CANDIDATE_CACHE_SIZE)
+        for (max_years, terms), mask in self._candidates.items():
+            added = (min_exp <= max_years) & ~new_senior(terms) & alive
+            out._candidates.put((max_years, terms), np.concatenate([mask, added]))
+        return out
+
+    def refit(self):
+        """
+        The same index with expired postings tombstoned and the IDF weights
+        and norms recomputed over every stored vector. The index itself is
+        left unchanged, so requests using it are unaffected.
+        """
+        vectors = self.vectors
+        expired = expired_rows(self.jobs)
+        expired = expired[vectors.alive[expired]]
+        if len(expired):
+            vectors = vectors.removed(expired)
+        out = copy.copy(self)
+        out.vectors = JobVectors(vectors.blocks, vectors.df, vectors.alive).refreshed()
+        if len(expired):
+            out._candidates = _LRU(CANDIDATE_CACHE_SIZE)
+        return out
+
+    def skill_scores(self, skill_ids, rows):
+        """
+        Share of each of ``rows``' listed skills that are in ``skill_ids``
+        (0 for jobs listing none). Skills outside the vocabulary can't
+        match but still count towards a job's total.
+        """
+        matched = self.skills.overlap(skill_ids)[rows]
+        n_skills = self.skill_counts[rows]
+        return np.where(n_skills > 0, matched / np.maximum(n_skills, 1), 0.0)
+
+    def senior_mask(self, terms):
+        """Rows whose title contains any of ``terms`` (plain substrings)."""
+        mask = np.zeros(len(self.title_lower), dtype=bool)
+        for term in normalize_terms(terms):
+            term_mask = self._term_masks.get(term)
+            if term_mask is None:
+                term_mask = _title_mask(self.title_lower, term)
+                self._term_masks.put(term, term_mask)
+            mask |= term_mask
+        return mask
+
+    def experience_mask(self, max_years):
+        """Rows whose required experience is at most ``max_years``."""
+        pos = np.searchsorted(self.exp_levels, max_years, side="right")
+        if pos == 0:
+            return np.zeros(len(self.jobs), dtype=bool)
+        return self.exp_bitmaps[int(self.exp_levels[pos - 1])]
+
+    def candidates(self, user_years, senior_terms=DEFAULT_SENIOR_TERMS,
+                   exp_tolerance=DEFAULT_EXP_TOLERANCE):
+        """Boolean mask of jobs that pass the title and experience filters."""
+        terms = normalize_terms(senior_terms)
+        key = (user_years + exp_tolerance, terms)
+        mask = self._candidates.get(key)
+        metrics.count_cache("recommend_candidates", mask is not None)
+        if mask is None:
+            if terms == normalize_terms(DEFAULT_SENIOR_TERMS):
+                senior = self.jobs["is_senior"].to_numpy()
+            else:
+                senior = self.senior_mask(terms)
+            mask = self.experience_mask(key[0]) & ~senior & self.vectors.alive
+            self._candidates.put(key, mask)
+        return mask
+
+
+def get_job_index():
+    """
+    Build the job index on first use. Cached per dataset version, so a
+    dataset reload rebuilds it in the background along with the frame, and
+    rows added by the ingest worker are appended to it. The dataset watcher
+    refits it every DATASET_REFRESH_INTERVAL seconds (see
+    data_loader.start_watcher), which also tombstones postings that have
+    expired since.
+    """
+    def build(ds):
+        index = JobIndex(load_job_data())
+        # load_job_data only reads the build's files
+        if len(ds.frame) > ds.base_rows:
+            index = index.extended(ds.frame.iloc[ds.base_rows:])
+        return index
+
+    return get_dataset().aggregate("job_index", build,
+                                   lambda index, ds, start: index.extended(ds.frame.iloc[start:]),
+                                   refresh=lambda index: index.refit())
+
+
 # Main recommendation function
-def recommend_jobs(resume_text, top_k=5):
-    # 1. Load job data
-    jobs = load_job_data()
+def recommend_jobs(resume_text, top_k=5, senior_terms=DEFAULT_SENIOR_TERMS,
+                   exp_tolerance=DEFAULT_EXP_TOLERANCE):
+    # 1. Load job data (with precomputed filter columns)
+    with metrics.span("recommend.load_index"):
+        index = get_job_index()
 
     # 2. Determine candidate experience level from resume
     user_years = extract_years_of_experience(resume_text)
 
-    # 3. Filter out senior roles by TITLE (we are new grads)
-    senior_terms = ["senior", "sr.", "lead", "principal", "director", "manager"]
-    pattern = "|".join(senior_terms)
-    jobs = jobs[~jobs["title"].str.lower().str.contains(pattern, na=False)]
-
-    # 4. Extract required years of experience from job DESCRIPTION
-    jobs["min_exp"] = jobs["description"].apply(extract_years_from_description)
-
-    # keep jobs that are not too far above the student's level
-    jobs = jobs[jobs["min_exp"] <= user_years + 1].copy()
+    # 3-4. Filter out senior roles by TITLE and jobs whose DESCRIPTION asks
+    # for too much experience (precomputed bitmaps, see JobIndex)
+    with metrics.span("recommend.filter"):
+        mask = index.candidates(user_years, senior_terms, exp_tolerance)
+        jobs = index.jobs[mask].copy()
 
-    # 5. Build TF–IDF matrix using title + skills + description
-    job_texts = (
-        jobs["title"].fillna("") + " " +
-        jobs["skills"].fillna("") + " " +
-        jobs["description"].fillna("")
-    )
-
-    vectorizer = TfidfVectorizer(
-        stop_words="english",
-        max_df=0.85,
-        min_df=3,
-        sublinear_tf=True,
-        ngram_range=(1, 2),
-    )
+    # Nothing passed the filters (e.g. a strict exp_tolerance)
+    if jobs.empty:
+        return jobs.assign(tfidf_score=0.0, skill_score=0.0, exp_bonus=0.0,
+                           final_score=0.0, matched_skills=None)
 
-    job_matrix = vectorizer.fit_transform(job_texts)
-    
-    resume_skills = extract_resume_skills(resume_text)
-    resume_for_tfidf = resume_text + " " + " ".join(resume_skills)
+    # 5. TF-IDF similarity over title + skills + description, against the
+    # job vectors stored in the index (see job_vectors.py)
+    with metrics.span("recommend.tfidf_score"):
+        resume_skills = extract_resume_skills(resume_text)
+        resume_for_tfidf = resume_text + " " + " ".join(resume_skills)
 
-    resume_vec = vectorizer.transform([resume_for_tfidf])
-    tfidf_scores = cosine_similarity(resume_vec, job_matrix).flatten()
+        tfidf_scores = index.vectors.scores(resume_for_tfidf, jobs.index.to_numpy())
 
     # 5a. normalize tfidf to [0, 1]
     tfidf_min, tfidf_max = tfidf_scores.min(), tfidf_scores.max()
@@ -154,39 +478,35 @@ def recommend_jobs(resume_text, top_k=5):
 
     jobs["tfidf_score"] = tfidf_norm
 
-    # 6. Skill overlap score (normalized) + record matched skills
-    def skill_overlap(job_skill_field):
-        if pd.isna(job_skill_field):
-            return set(), 0.0
-        job_skillset = {
-            s.strip().lower() for s in str(job_skill_field).split(",") if s.strip()
-        }
-        overlap = resume_skills.intersection(job_skillset)
-        if not job_skillset:
-            score = 0.0
-        else:
-            score = len(overlap) / len(job_skillset)  # 0–1
-        return overlap, score
-
-    overlap_results = jobs["skills"].apply(skill_overlap)
-    jobs["matched_skills"] = overlap_results.apply(lambda x: sorted(x[0]))
-    jobs["skill_score"] = overlap_results.apply(lambda x: x[1])
+    # 6. Skill overlap score (normalized): share of the job's skills the
+    # resume has, counted over skill IDs (jobs.index is the row in index.skills)
+    with metrics.span("recommend.skill_score"):
+        resume_ids = encode_skills(resume_skills)
+        jobs["skill_score"] = index.skill_scores(resume_ids, jobs.index.to_numpy())  # 0–1
 
     # 7. Experience bonus: closer to user_years is slightly better (also 0–1)
     def experience_bonus(min_exp):
-        # already filtered min_exp <= user_years + 1
+        # already filtered min_exp <= user_years + exp_tolerance
         gap = abs(min_exp - user_years)
         return 1.0 / (1.0 + gap)
 
-    jobs["exp_bonus"] = jobs["min_exp"].apply(experience_bonus)
+    with metrics.span("recommend.rank"):
+        jobs["exp_bonus"] = jobs["min_exp"].apply(experience_bonus)
 
-    # 8. Final combined score for ranking
-    #    TF-IDF and skill_score are both in [0,1], exp_bonus in (0,1]
-    jobs["final_score"] = (
-        0.55 * jobs["tfidf_score"] +
-        0.35 * jobs["skill_score"] +
-        0.10 * jobs["exp_bonus"]
-    )
+        # 8. Final combined score for ranking
+        #    TF-IDF and skill_score are both in [0,1], exp_bonus in (0,1]
+        jobs["final_score"] = (
+            0.55 * jobs["tfidf_score"] +
+            0.35 * jobs["skill_score"] +
+            0.10 * jobs["exp_bonus"]
+        )
+
+        top = jobs.sort_values("final_score", ascending=False).head(top_k).copy()
+
+    # Record matched skills for the jobs we return
+    top["matched_skills"] = [
+        skill_names(np.intersect1d(index.skills.row(i), resume_ids)) for i in top.index
+    ]
 
     # Return the top matching jobs
-    return jobs.sort_values("final_score", ascending=False).head(top_k)
+    return top
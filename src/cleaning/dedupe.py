@@ -0,0 +1,187 @@
+"""
+Near-duplicate detection for cleaned postings with MinHash + LSH over word
+5-gram shingles of the title, company and description. Each cluster keeps
+one row: the one with a salary, then the most recent, then the first seen.
+
+    python src/cleaning/dedupe.py data/processed/*_clean.csv --out /tmp/deduped.csv
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 5
+
+# Minimum estimated Jaccard similarity for two postings to be duplicates
+THRESHOLD = 0.8
+
+# Documents hashed per batch, bounds memory on large inputs
+BATCH_DOCS = 5000
+
+TEXT_COLUMNS = ["title", "company", "description"]
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+_MASK64 = (1 << 64) - 1
+
+
+def _permutations(num_perm, seed):
+    """Odd multipliers and offsets for multiply-shift hashing."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _shingles(texts):
+    """(shingle hashes, start of each document's shingles, #shingles per document)."""
+    tokens = []
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        words = _TOKEN.findall(text)
+        lengths[i] = len(words)
+        tokens.extend(words)
+    if not tokens:
+        return np.zeros(0, dtype=np.uint64), np.zeros(len(texts), dtype=np.int64), lengths
+
+    h = pd.util.hash_array(np.array(tokens, dtype=object), categorize=True)
+    n = len(h)
+    ends = np.repeat(np.cumsum(lengths), lengths)
+    idx = np.arange(n)
+
+    # Shingle starting at each token: sum of the next SHINGLE_SIZE token
+    # hashes times distinct odd constants, never crossing a document end
+    s = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE_SIZE):
+        valid = idx + j < ends
+        mult = np.uint64((0x9E3779B97F4A7C15 * (2 * j + 1)) & _MASK64)
+        s[valid] += h[idx[valid] + j] * mult
+
+    # Keep full-length shingles, plus the first one of documents shorter
+    # than SHINGLE_SIZE so they still get a signature
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    keep = (idx + SHINGLE_SIZE <= ends) | ((idx == starts) & (ends - starts < SHINGLE_SIZE))
+    counts = np.bincount(np.repeat(np.arange(len(texts)), lengths)[keep], minlength=len(texts))
+    return s[keep], np.cumsum(counts) - counts, counts
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=1):
+    """uint32 MinHash signatures, one row per text. Empty texts get all-max rows."""
+    a, b = _permutations(num_perm, seed)
+    sig = np.full((len(texts), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    for lo in range(0, len(texts), BATCH_DOCS):
+        shingles, starts, counts = _shingles(texts[lo:lo + BATCH_DOCS])
+        has = counts > 0
+        if not has.any():
+            continue
+        rows = lo + np.flatnonzero(has)
+        for p in range(num_perm):
+            v = ((shingles * a[p] + b[p]) >> np.uint64(32)).astype(np.uint32)
+            sig[rows, p] = np.minimum.reduceat(v, starts[has])
+    return sig
+
+
+def lsh_pairs(sig, bands=BANDS):
+    """Candidate pairs (i, j), i < j, that share all values of some band."""
+    n, num_perm = sig.shape
+    r = num_perm // bands
+    pairs = []
+    for band in range(bands):
+        cols = sig[:, band * r:(band + 1) * r].astype(np.uint64)
+        key = np.zeros(n, dtype=np.uint64)
+        for j in range(r):
+            key = key * np.uint64(0x100000001B3) + cols[:, j]
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        new_group = np.ones(n, dtype=bool)
+        new_group[1:] = sorted_key[1:] != sorted_key[:-1]
+        # Pair every member of a bucket with the bucket's first member
+        first = order[np.maximum.accumulate(np.where(new_group, np.arange(n), 0))]
+        member = ~new_group
+        pairs.append(np.stack([first[member], order[member]], axis=1))
+    if not pairs:
+        return np.zeros((0, 2), dtype=np.int64)
+    pairs = np.concatenate(pairs)
+    pairs.sort(axis=1)
+    return np.unique(pairs, axis=0)
+
+
+def cluster_labels(texts, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS):
+    """Cluster label per text; near-duplicate texts share a label."""
+    texts = pd.Series(texts, dtype=object).fillna("").astype(str).str.lower()
+    codes, unique = pd.factorize(texts)
+    unique = list(unique)
+    n = len(unique)
+
+    sig = minhash_signatures(unique, num_perm=num_perm)
+    empty = np.array([not _TOKEN.search(t) for t in unique], dtype=bool)
+    pairs = lsh_pairs(sig, bands=bands)
+    pairs = pairs[~empty[pairs[:, 0]] & ~empty[pairs[:, 1]]]
+
+    keep = np.zeros(len(pairs), dtype=bool)
+    for lo in range(0, len(pairs), 100000):
+        chunk = pairs[lo:lo + 100000]
+        keep[lo:lo + 100000] = (sig[chunk[:, 0]] == sig[chunk[:, 1]]).mean(axis=1) >= threshold
+    pairs = pairs[keep]
+
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, labels = connected_components(graph, directed=False)
+    return labels[codes]
+
+
+def dedupe_postings(df, threshold=THRESHOLD):
+    """Canonical row per near-duplicate cluster, with cluster_id and cluster_size."""
+    df = df.reset_index(drop=True)
+    text = pd.Series("", index=df.index, dtype=object)
+    for col in TEXT_COLUMNS:
+        if col in df.columns:
+            text = text + " " + df[col].astype(object).fillna("").astype(str)
+    labels = cluster_labels(text, threshold=threshold)
+
+    has_salary = df["min_amount"].notna() if "min_amount" in df.columns else pd.Series(False, index=df.index)
+    posted = (pd.to_datetime(df["date_posted"], errors="coerce") if "date_posted" in df.columns
+              else pd.Series(pd.NaT, index=df.index))
+    ranked = pd.DataFrame({
+        "label": labels,
+        "has_salary": has_salary.to_numpy(dtype=bool),
+        "posted": posted.to_numpy(),
+        "row": np.arange(len(df)),
+    }).sort_values(["label", "has_salary", "posted", "row"],
+                   ascending=[True, False, False, True], na_position="last")
+    canonical = np.sort(ranked.drop_duplicates("label")["row"].to_numpy())
+
+    ids = df["id"].astype(str).to_numpy() if "id" in df.columns else np.arange(len(df)).astype(str)
+    sizes = np.bincount(labels)
+
+    out = df.iloc[canonical].copy()
+    out["cluster_id"] = ids[canonical]
+    out["cluster_size"] = sizes[labels[canonical]]
+    print(f"Dedupe: {len(df)} postings -> {len(out)} clusters")
+    return out.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="+", help="cleaned CSVs to combine (summary files are skipped)")
+    parser.add_argument("--out", required=True, help="output CSV path")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    dfs = []
+    for path in args.inputs:
+        df = pd.read_csv(path)
+        if "description" in df.columns and "summary" not in os.path.basename(path):
+            dfs.append(df)
+    deduped = dedupe_postings(pd.concat(dfs, ignore_index=True), threshold=args.threshold)
+    deduped.to_csv(args.out, index=False)
+    print(f"✓ Saved deduplicated: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
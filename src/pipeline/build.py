@@ -0,0 +1,559 @@
+"""
+One command to (re)build the dataset the web app serves.
+
+    python -m src.pipeline.build                 # everything that is stale
+    python -m src.pipeline.build clean           # up to and including a stage
+    python -m src.pipeline.build --scrape -j 4   # re-scrape first, 4 processes
+    python -m src.pipeline.build --dry-run
+
+Stages, per (state, role) search where noted:
+
+    scrape    jobspy search -> data/raw/{state}_{role}_jobs.csv   (only with --scrape)
+    clean     clean_CSV.clean_jobs -> data/interim/clean/{state}_{role}_clean.csv
+    dedupe    MinHash near-duplicate clusters over all cleaned files and the
+              ingest log -> data/interim/deduped.csv
+    derive    state/role/remote/annual salary/min_exp columns -> data/processed/all_states_clean.csv
+    index     skill ID CSR arrays, salary sketches, recommender TF-IDF vectors,
+              search index -> data/processed/index/*.npy, *.npz, *.json
+    aggregate summary reports -> data/processed/{role,all_roles}_summary_clean.csv
+    publish   data/processed/manifest.json, which the running app hot-reloads
+
+A task reruns when the content hash of any of its inputs (including its
+own source files) or outputs differs from the last run's stamp in
+data/interim/stamps/. Rows appended by the ingest worker are folded in at
+the dedupe stage.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+RAW = os.path.join(REPO_ROOT, "data", "raw")
+INTERIM = os.path.join(REPO_ROOT, "data", "interim")
+PROCESSED = os.path.join(REPO_ROOT, "data", "processed")
+
+STAGES = ["scrape", "clean", "dedupe", "derive", "index", "aggregate", "publish"]
+
+# State searched -> file name prefix
+STATES = {"California": "california", "New York": "newyork", "Texas": "texas"}
+
+# Search term -> file name part
+ROLES = {
+    "software engineer": "software_engineer",
+    "data analyst": "data_analyst",
+    "business analyst": "business_analyst",
+    "machine learning engineer": "machine_learning_engineer",
+    "data scientist": "data_scientist",
+    "product manager": "product_manager",
+}
+
+RESULTS_WANTED = 500
+
+# Raw rows read and cleaned at a time, bounds the clean stage's memory
+CLEAN_CHUNK_ROWS = 20000
+
+CLEANED = os.path.join(INTERIM, "clean")
+DEDUPED = os.path.join(INTERIM, "deduped.csv")
+DATASET = os.path.join(PROCESSED, "all_states_clean.csv")
+SKILLS_OFFSETS = os.path.join(PROCESSED, "index", "skills_offsets.npy")
+SKILLS_IDS = os.path.join(PROCESSED, "index", "skills_ids.npy")
+SALARY_SKETCHES = os.path.join(PROCESSED, "index", "salary_sketches.npz")
+# JobVectors arrays (src/analysis/job_vectors.py) plus the rows they match
+JOB_VECTORS = {name: os.path.join(PROCESSED, "index", f"job_vectors_{name}.npy")
+               for name in ["data", "indices", "indptr", "df", "alive"]}
+JOB_VECTORS_META = os.path.join(PROCESSED, "index", "job_vectors.json")
+SEARCH_INDEX = os.path.join(PROCESSED, "index", "search_index.npz")
+SUMMARY = os.path.join(PROCESSED, "all_roles_summary_clean.csv")
+MANIFEST = os.path.join(PROCESSED, "manifest.json")
+INGEST_LOG = os.path.join(PROCESSED, "ingest_log")
+# Content hashes of each task's inputs and outputs as of its last run
+STAMPS = os.path.join(INTERIM, "stamps")
+
+# Column names of the summary reports, as in the committed ones
+SUMMARY_COLUMNS = ["state", "total_jobs", "jobs_with_salary", "avg_min_salary", "avg_max_salary",
+                   "remote_jobs"]
+
+
+def _src(*parts):
+    return os.path.join(REPO_ROOT, *parts)
+
+
+CLEAN_CODE = [_src("src", "cleaning", "clean_CSV.py"), _src("src", "cleaning", "skills.json"),
+              _src("api", "skills.py")]
+
+
+class Task:
+    def __init__(self, name, stage, fn, inputs, outputs, kwargs=None):
+        self.name = name
+        self.stage = stage
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.kwargs = kwargs or {}
+        self.deps = set()
+
+
+# Stage functions. They run in worker processes, so they import what they
+# need themselves.
+
+def scrape_frame(role, state, results_wanted, hours_old=None):
+    """One jobspy search as a raw DataFrame labelled with its state and role."""
+    from jobspy import scrape_jobs
+
+    jobs = scrape_jobs(
+        site_name=["indeed"],
+        search_term=role,
+        location=state,
+        results_wanted=results_wanted,
+        country_indeed="USA",
+        enforce_annual_salary=True,
+        description_format="html",
+        hours_old=hours_old,
+        verbose=1,
+        telemetry_path=os.path.join(INTERIM, "scrape_telemetry.jsonl"),
+    )
+    jobs["state"] = state
+    jobs["role"] = role.title()
+    return jobs
+
+
+def scrape_search(role, state, out, results_wanted):
+    jobs = scrape_frame(role, state, results_wanted)
+    _write_csv(jobs, out)
+    print(f"{state} - {role}: {len(jobs)} jobs scraped")
+
+
+def clean_search(raw, out, workers=1):
+    from src.cleaning.clean_CSV import clean_jobs
+
+    clean_jobs(raw, out, workers=workers, chunksize=CLEAN_CHUNK_ROWS)
+
+
+def dedupe_all(inputs, out, log_rows=0):
+    """
+    ``inputs`` is [(cleaned path, state, role), ...]; rows are labelled with
+    their search. The first ``log_rows`` ingest log rows are added to them.
+    """
+    import pandas as pd
+
+    from api.ingest_log import read_rows
+    from api.skills import ID_DTYPES
+    from src.cleaning.dedupe import dedupe_postings
+
+    dfs = []
+    for path, state, role in inputs:
+        df = pd.read_csv(path, dtype=ID_DTYPES)
+        for col, value in (("state", state), ("role", role.title())):
+            df[col] = df[col].fillna(value) if col in df.columns else value
+        dfs.append(df)
+    if log_rows:
+        dfs.append(read_rows(INGEST_LOG)[0].iloc[:log_rows])
+    _write_csv(dedupe_postings(pd.concat(dfs, ignore_index=True)), out)
+
+
+def derive_frame(df):
+    """Normalized state/role/remote flags plus derived salary and experience."""
+    import pandas as pd
+
+    from api.salary_stats import annual_midpoint
+    from api.states import STATE_CODES
+    from src.analysis.recommendation_model import extract_years_from_description
+
+    from_location = df["location"].astype(str).str.extract(r",\s*([A-Z]{2})\b")[0].map(STATE_CODES)
+    df["state"] = df["state"].fillna(from_location) if "state" in df.columns else from_location
+    if "role" in df.columns:
+        df["role"] = df["role"].astype(str).str.title()
+    df["is_remote"] = (
+        df.get("is_remote", pd.Series(False, index=df.index)).astype(str).str.lower().eq("true")
+        | df["location"].astype(str).str.contains("remote", case=False)
+    )
+    df["salary_annual"] = annual_midpoint(df).round(0)
+    df["min_exp"] = df["description"].apply(extract_years_from_description).astype(int)
+    return df
+
+
+def derive_columns(src, out):
+    import pandas as pd
+
+    from api.skills import ID_DTYPES
+
+    df = derive_frame(pd.read_csv(src, dtype=ID_DTYPES))
+    _write_csv(df, out)
+    print(f"✓ Derived {len(df)} postings: {out}")
+
+
+def build_skill_index(src, offsets_out, ids_out):
+    import numpy as np
+    import pandas as pd
+
+    from api.skills import ID_DTYPES, SkillMatrix
+
+    df = pd.read_csv(src, usecols=lambda c: c in ("parsed_skill_ids", "parsed_skills"), dtype=ID_DTYPES)
+    skills = SkillMatrix.from_columns(df.get("parsed_skill_ids"), df.get("parsed_skills"), n=len(df))
+    os.makedirs(os.path.dirname(offsets_out), exist_ok=True)
+    np.save(offsets_out, skills.offsets)
+    np.save(ids_out, skills.ids)
+
+
+def build_salary_sketches(src, out):
+    import pandas as pd
+
+    from api.salary_stats import SalarySketches
+
+    df = pd.read_csv(src, usecols=lambda c: c in ("min_amount", "max_amount", "interval",
+                                                   "state", "role", "is_remote"))
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    # np.savez appends .npz unless the name already ends with it, so write
+    # through a file object to keep the temp name
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        SalarySketches.from_frame(df).save(f)
+    os.replace(tmp, out)
+
+
+def build_job_vectors(src, out, meta_out):
+    """The recommender's JobVectors for the jobs load_job_data gives for ``src``."""
+    import pandas as pd
+
+    from api.skills import ID_DTYPES
+    from src.analysis.job_vectors import JobVectors
+    from src.analysis.recommendation_model import dedupe_jobs, job_texts, jobs_digest
+
+    jobs = dedupe_jobs(pd.read_csv(src, dtype=ID_DTYPES))
+    os.makedirs(os.path.dirname(meta_out), exist_ok=True)
+    # np.save appends .npy to names without it, so write through file objects
+    files = {name: open(path + ".tmp", "wb") for name, path in out.items()}
+    try:
+        JobVectors.from_texts(job_texts(jobs)).save(files)
+    finally:
+        for f in files.values():
+            f.close()
+    for path in out.values():
+        os.replace(path + ".tmp", path)
+    with open(meta_out + ".tmp", "w") as f:
+        json.dump({"rows": len(jobs), "digest": jobs_digest(jobs)}, f)
+    os.replace(meta_out + ".tmp", meta_out)
+
+
+def build_search_index(src, out):
+    import pandas as pd
+
+    from api.search import SEARCH_FIELDS, SearchIndex
+
+    df = pd.read_csv(src, usecols=lambda c: c in SEARCH_FIELDS, dtype=str)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    tmp = out + ".tmp"
+    with open(tmp, "wb") as f:
+        SearchIndex(df).save(f)
+    os.replace(tmp, out)
+
+
+def write_summaries(src, out):
+    """
+    Summary report per state, overall and for each role, with the same
+    columns (SUMMARY_COLUMNS) as the committed data/processed summaries.
+    """
+    import pandas as pd
+
+    df = pd.read_csv(src)
+
+    def report(frame):
+        rows = []
+        for state, group in list(frame.groupby("state")) + [("TOTAL", frame)]:
+            rows.append([
+                state,
+                len(group),
+                int(group["min_amount"].notna().sum()),
+                group["min_amount"].mean(),
+                group["max_amount"].mean(),
+                int(group["is_remote"].sum()),
+            ])
+        summary = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+        for col in ["avg_min_salary", "avg_max_salary"]:
+            summary[col] = summary[col].apply(lambda x: f"${x:,.0f}" if pd.notna(x) else "N/A")
+        return summary
+
+    _write_csv(report(df), out)
+    if "role" in df.columns:
+        for role, group in df.groupby("role"):
+            name = f"{ROLES.get(role.lower(), role.lower().replace(' ', '_'))}_summary_clean.csv"
+            _write_csv(report(group), os.path.join(os.path.dirname(out), name))
+
+
+def publish(dataset, offsets, ids, salary, vectors, vectors_meta, search, out, log_rows=0):
+    """
+    Write the manifest last, atomically, so the app swaps to the new build.
+    The version is a hash of every file the manifest points to.
+    """
+    digest = hashlib.sha1()
+    for path in [dataset, offsets, ids, salary, *vectors.values(), vectors_meta, search]:
+        digest.update(file_digest(path).encode())
+    base = os.path.dirname(out)
+    manifest = {
+        "version": digest.hexdigest()[:12],
+        "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": [os.path.relpath(dataset, base)],
+        "skills_index": {
+            "offsets": os.path.relpath(offsets, base),
+            "ids": os.path.relpath(ids, base),
+        },
+        "salary_sketches": os.path.relpath(salary, base),
+        "job_vectors": {name: os.path.relpath(path, base) for name, path in vectors.items()},
+        "search_index": os.path.relpath(search, base),
+        "ingest_log_rows": log_rows,
+    }
+    with open(vectors_meta) as f:
+        manifest["job_vectors"].update(json.load(f))
+    tmp = out + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, out)
+    print(f"✓ Published dataset version {manifest['version']}")
+
+
+def _write_csv(df, path):
+    """Write through a temp file so readers never see a partial CSV."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def plan(scrape=False, results_wanted=RESULTS_WANTED, jobs=1):
+    """
+    All tasks of a build, with dependencies resolved from their files.
+    ``jobs`` is shared between the clean tasks: with fewer raw files than
+    processes each file's rows are also sharded across processes.
+    """
+    from api.ingest_log import list_parts
+
+    tasks = []
+    cleaned = []
+    for state, state_slug in STATES.items():
+        for role, role_slug in ROLES.items():
+            raw = os.path.join(RAW, f"{state_slug}_{role_slug}_jobs.csv")
+            out = os.path.join(CLEANED, f"{state_slug}_{role_slug}_clean.csv")
+            committed = os.path.join(PROCESSED, f"{state_slug}_{role_slug}_clean.csv")
+            search = f"{state_slug}_{role_slug}"
+            if scrape:
+                tasks.append(Task(f"scrape:{search}", "scrape", scrape_search, [], [raw],
+                                  dict(role=role, state=state, out=raw,
+                                       results_wanted=results_wanted)))
+            elif not os.path.exists(raw):
+                existing = [path for path in (out, committed) if os.path.exists(path)]
+                if existing:
+                    cleaned.append((existing[0], state, role))
+                else:
+                    print(f"Skipping {search}: no {os.path.relpath(raw, REPO_ROOT)} (use --scrape)")
+                continue
+            tasks.append(Task(f"clean:{search}", "clean", clean_search, [raw] + CLEAN_CODE, [out],
+                              dict(raw=raw, out=out)))
+            cleaned.append((out, state, role))
+
+    # The ingest log as of now; its parts are inputs, so new rows make dedupe stale
+    log_parts = list_parts(INGEST_LOG)
+    log_rows = log_parts[-1][1] if log_parts else 0
+
+    clean_tasks = [t for t in tasks if t.stage == "clean"]
+    for task in clean_tasks:
+        task.kwargs["workers"] = max(1, jobs // len(clean_tasks))
+
+    tasks += [
+        Task("dedupe", "dedupe", dedupe_all,
+             [path for path, _, _ in cleaned] + [path for _, _, path in log_parts]
+             + [__file__, _src("src", "cleaning", "dedupe.py")],
+             [DEDUPED], dict(inputs=cleaned, out=DEDUPED, log_rows=log_rows)),
+        Task("derive", "derive", derive_columns,
+             [DEDUPED, __file__, _src("api", "salary_stats.py")], [DATASET],
+             dict(src=DEDUPED, out=DATASET)),
+        Task("index", "index", build_skill_index, [DATASET, _src("api", "skills.py")],
+             [SKILLS_OFFSETS, SKILLS_IDS],
+             dict(src=DATASET, offsets_out=SKILLS_OFFSETS, ids_out=SKILLS_IDS)),
+        Task("salary", "index", build_salary_sketches, [DATASET, _src("api", "salary_stats.py")],
+             [SALARY_SKETCHES], dict(src=DATASET, out=SALARY_SKETCHES)),
+        Task("vectors", "index", build_job_vectors,
+             [DATASET, _src("src", "analysis", "job_vectors.py"),
+              _src("src", "analysis", "recommendation_model.py")],
+             list(JOB_VECTORS.values()) + [JOB_VECTORS_META],
+             dict(src=DATASET, out=JOB_VECTORS, meta_out=JOB_VECTORS_META)),
+        Task("search", "index", build_search_index, [DATASET, _src("api", "search.py")],
+             [SEARCH_INDEX], dict(src=DATASET, out=SEARCH_INDEX)),
+        Task("aggregate", "aggregate", write_summaries, [DATASET, __file__], [SUMMARY],
+             dict(src=DATASET, out=SUMMARY)),
+        Task("publish", "publish", publish,
+             [DATASET, SKILLS_OFFSETS, SKILLS_IDS, SALARY_SKETCHES, JOB_VECTORS_META, SEARCH_INDEX,
+              SUMMARY],
+             [MANIFEST],
+             dict(dataset=DATASET, offsets=SKILLS_OFFSETS, ids=SKILLS_IDS, salary=SALARY_SKETCHES,
+                  vectors=JOB_VECTORS, vectors_meta=JOB_VECTORS_META, search=SEARCH_INDEX,
+                  out=MANIFEST,
+                  log_rows=log_rows)),
+    ]
+
+    producer = {path: task for task in tasks for path in task.outputs}
+    for task in tasks:
+        task.deps = {producer[path].name for path in task.inputs if path in producer}
+    return tasks
+
+
+# Global cache: content hash per (path, size, mtime), so a file shared by
+# several tasks is read once per build
+_DIGESTS = {}
+
+
+def file_digest(path):
+    """sha1 of a file's content, None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    key = (path, st.st_size, st.st_mtime_ns)
+    if key not in _DIGESTS:
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _DIGESTS[key] = digest.hexdigest()
+    return _DIGESTS[key]
+
+
+def _stamp_path(task):
+    return os.path.join(STAMPS, task.name.replace(":", "_") + ".json")
+
+
+def task_digests(task):
+    """Content hashes of a task's inputs and outputs, keyed by repo-relative path."""
+    return {kind: {os.path.relpath(p, REPO_ROOT): file_digest(p) for p in paths}
+            for kind, paths in (("inputs", task.inputs), ("outputs", task.outputs))}
+
+
+def write_stamp(task):
+    """Record the task's input and output hashes after a successful run."""
+    path = _stamp_path(task)
+    os.makedirs(STAMPS, exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        json.dump(task_digests(task), f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def stale_reason(task):
+    """
+    Why the task has to run, None if it is up to date: an output is
+    missing, the task has no stamp, or an input or output hash differs from
+    the stamped one. Scrapes always run.
+    """
+    if task.stage == "scrape":
+        return "scrapes always run"
+    missing = [path for path in task.outputs if not os.path.exists(path)]
+    if missing:
+        return f"missing {os.path.relpath(missing[0], REPO_ROOT)}"
+    try:
+        with open(_stamp_path(task)) as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return "no stamp"
+    digests = task_digests(task)
+    for kind, paths in digests.items():
+        for path, digest in paths.items():
+            if stamp.get(kind, {}).get(path) != digest:
+                return f"{path} changed"
+    if stamp != digests:
+        return "inputs changed"
+    return None
+
+
+def is_stale(task, force=False):
+    """True if the task has to run (see stale_reason)."""
+    return force or stale_reason(task) is not None
+
+
+def run(tasks, jobs=1, force=False, dry_run=False):
+    """Run tasks in dependency order, in parallel where possible. Returns failed task names."""
+    by_name = {t.name: t for t in tasks}
+    done, failed, ran = set(), set(), set()
+    pending = dict(by_name)
+    running = {}
+
+    def ready(task):
+        return task.deps <= done
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name, task in list(pending.items()):
+                if task.deps & failed:
+                    print(f"  skip {name} (dependency failed)")
+                    failed.add(name)
+                    del pending[name]
+                elif ready(task):
+                    del pending[name]
+                    # Without a dry run, upstream outputs are on disk and hashed
+                    upstream_ran = dry_run and bool(task.deps & ran)
+                    if force:
+                        reason = "forced"
+                    elif upstream_ran:
+                        reason = "upstream would run"
+                    else:
+                        reason = stale_reason(task)
+                    if reason is None:
+                        print(f"  up to date: {name}")
+                        done.add(name)
+                    elif dry_run:
+                        print(f"  would run: {name} ({reason})")
+                        done.add(name)
+                        ran.add(name)
+                    else:
+                        print(f"  run: {name} ({reason})")
+                        running[pool.submit(task.fn, **task.kwargs)] = (name, time.perf_counter())
+            if not running:
+                if pending and not any(ready(t) or t.deps & failed for t in pending.values()):
+                    raise RuntimeError(f"Unresolvable dependencies: {sorted(pending)}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, start = running.pop(future)
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"✗ {name} failed: {type(e).__name__}: {e}")
+                    failed.add(name)
+                else:
+                    print(f"✓ {name} ({time.perf_counter() - start:.1f}s)")
+                    write_stamp(by_name[name])
+                    done.add(name)
+                    ran.add(name)
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("target", nargs="?", choices=STAGES, default="publish",
+                        help="last stage to build (default: publish)")
+    parser.add_argument("--scrape", action="store_true",
+                        help="re-scrape every search (otherwise existing raw files are used)")
+    parser.add_argument("--results", type=int, default=RESULTS_WANTED,
+                        help="results wanted per search when scraping")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="parallel processes")
+    parser.add_argument("--force", action="store_true", help="rerun tasks even if up to date")
+    parser.add_argument("--dry-run", action="store_true", help="only print what would run")
+    args = parser.parse_args(argv)
+
+    last = STAGES.index(args.target)
+    tasks = [t for t in plan(scrape=args.scrape, results_wanted=args.results, jobs=args.jobs)
+             if STAGES.index(t.stage) <= last]
+    failed = run(tasks, jobs=args.jobs, force=args.force, dry_run=args.dry_run)
+    if failed:
+        print(f"Build failed: {', '.join(sorted(failed))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Ingest worker: scrape recent postings on a schedule and append the new
+ones to the ingest log (api/ingest_log.py), which the app serves without a
+rebuild.
+
+    python -m src.pipeline.ingest                       # a round every hour
+    python -m src.pipeline.ingest --once --hours-old 24
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from api.ingest_log import append_rows, compact, list_parts, read_rows  # noqa: E402
+from src.pipeline.build import DATASET, INGEST_LOG, ROLES, STATES, derive_frame, scrape_frame  # noqa: E402
+
+INTERVAL = 3600
+HOURS_OLD = 24
+RESULTS_WANTED = 100
+
+# Log parts kept before they are merged into one
+COMPACT_PARTS = 24
+
+TEXT_KEY = ["title", "company", "description"]
+
+
+def _text_keys(df):
+    """One hash per posting of its title, company and description."""
+    cols = pd.DataFrame({c: df[c].astype(object).fillna("").astype(str) if c in df.columns else ""
+                         for c in TEXT_KEY}, index=df.index)
+    return pd.util.hash_pandas_object(cols, index=False).to_numpy()
+
+
+def _ids(df):
+    return df["id"].dropna().astype(str).tolist() if "id" in df.columns else []
+
+
+class KnownPostings:
+    """IDs and text keys of the postings already in the dataset or the log."""
+
+    def __init__(self, log_dir=INGEST_LOG, dataset=DATASET):
+        self.ids = set()
+        self.keys = set()
+        if os.path.exists(dataset):
+            self.add(pd.read_csv(dataset, usecols=lambda c: c == "id" or c in TEXT_KEY, dtype=str))
+        self.add(read_rows(log_dir)[0])
+
+    def add(self, df):
+        self.ids.update(_ids(df))
+        self.keys.update(_text_keys(df).tolist())
+
+    def new_rows(self, df):
+        """The rows of ``df`` not known yet, first of each repeated posting only."""
+        ids = df["id"].astype(str) if "id" in df.columns else pd.Series("", index=df.index)
+        keys = pd.Series(_text_keys(df), index=df.index)
+        new = ~(ids.isin(self.ids) | keys.isin(self.keys)) & ~keys.duplicated()
+        return df[new.to_numpy()]
+
+
+def scrape_round(hours_old=HOURS_OLD, results_wanted=RESULTS_WANTED):
+    """Every search's postings from the last ``hours_old`` hours, cleaned and derived."""
+    from src.cleaning.clean_CSV import clean_frame
+
+    frames = []
+    for state in STATES:
+        for role in ROLES:
+            try:
+                raw = scrape_frame(role, state, results_wanted, hours_old=hours_old)
+            except Exception as e:
+                print(f"Error scraping {state} - {role}: {e}")
+                continue
+            if not len(raw):
+                continue
+            # The build cleans raw CSVs read back as text; do the same so
+            # log rows match built ones column for column
+            raw = pd.read_csv(io.StringIO(raw.to_csv(index=False)), dtype=str)
+            frames.append(clean_frame(raw))
+    if not frames:
+        return pd.DataFrame()
+    return derive_frame(pd.concat(frames, ignore_index=True))
+
+
+def ingest_once(known, log_dir=INGEST_LOG, hours_old=HOURS_OLD, results_wanted=RESULTS_WANTED,
+                compact_parts=COMPACT_PARTS):
+    """One round: scrape, append the new postings, compact if due. Returns rows appended."""
+    scraped = scrape_round(hours_old, results_wanted)
+    rows = known.new_rows(scraped) if len(scraped) else scraped
+    end = append_rows(log_dir, rows)
+    known.add(rows)
+    print(f"Ingest: {len(scraped)} scraped, {len(rows)} new, log at {end} rows")
+    if len(list_parts(log_dir)) > compact_parts:
+        compact(log_dir)
+    return len(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--interval", type=float, default=INTERVAL, help="seconds between rounds")
+    parser.add_argument("--hours-old", type=int, default=HOURS_OLD,
+                        help="only scrape postings from the last N hours")
+    parser.add_argument("--results", type=int, default=RESULTS_WANTED,
+                        help="results wanted per search")
+    parser.add_argument("--compact-parts", type=int, default=COMPACT_PARTS,
+                        help="compact the log once it has more parts than this")
+    parser.add_argument("--log", default=INGEST_LOG, help="ingest log folder")
+    parser.add_argument("--once", action="store_true", help="run one round and exit")
+    args = parser.parse_args(argv)
+
+    known = KnownPostings(args.log)
+    while True:
+        started = time.monotonic()
+        try:
+            ingest_once(known, args.log, args.hours_old, args.results, args.compact_parts)
+        except Exception as e:
+            print(f"Error in ingest round: {e}")
+        if args.once:
+            break
+        time.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,65 @@
-﻿from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, g
+import functools
+import gzip
+import hashlib
 import os
 import sys
+from datetime import datetime, timezone
+import numpy as np
 import pandas as pd
-from collections import Counter
+from werkzeug.http import is_resource_modified
 
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
 if REPO_ROOT not in sys.path:
     sys.path.insert(0, REPO_ROOT)
 
-from api.data_loader import load_all_states_data
-from src.analysis.recommendation_model import recommend_jobs, extract_resume_text
+from api import metrics, profiling
+from api.cooccurrence import SkillCooccurrence
+from api.data_loader import get_dataset, start_watcher
+from api.salary_stats import DEFAULT_QUANTILES, salary_histogram
+from api.search import SearchIndex, parse_query
+from api.skills import skill_id, skill_names
+from api.trends import TrendStore
+from src.analysis.recommendation_model import (
+    recommend_jobs,
+    extract_resume_text,
+    get_job_index,
+    import_recommend_modules,
+    DEFAULT_SENIOR_TERMS,
+    DEFAULT_EXP_TOLERANCE,
+)
 
 
 app = Flask(__name__)
 
+# Upper bound on ?k= for the skill analysis endpoints
+SKILLS_MAX_K = 100
+
+# Page size limits for /api/search
+SEARCH_PER_PAGE = 20
+SEARCH_MAX_PER_PAGE = 100
+
+# Seconds browsers/proxies may reuse a chart payload before revalidating
+API_CACHE_MAX_AGE = int(os.environ.get("API_CACHE_MAX_AGE", 60))
+
+# API responses larger than this are gzipped for clients that accept it
+# (0 disables compression, e.g. when a reverse proxy already does it)
+API_GZIP_MIN_SIZE = int(os.environ.get("API_GZIP_MIN_SIZE", 1024))
+
+
+def warm_up():
+    """
+    Load the dataset, search/trend/skill indexes and recommendation index up
+    front (gunicorn preload). The modules /recommend imports on first use are
+    imported too, so forked workers share them instead of each importing its own.
+    """
+    SearchIndex.for_dataset(get_dataset())
+    trend_store(get_dataset())
+    SkillCooccurrence.for_dataset(get_dataset())
+    get_job_index()
+    import_recommend_modules()
+
+
 # front end
 
 @app.route("/")
@@ -54,20 +100,36 @@ def team_page():
 
 @app.route("/recommend", methods=["GET", "POST"])
 def recommend():
+    # Optional filter overrides (comma separated title terms, extra years allowed)
+    exclude_titles = request.form.get("exclude_titles")
+    if exclude_titles is None:
+        senior_terms = DEFAULT_SENIOR_TERMS
+    else:
+        senior_terms = tuple(t.strip() for t in exclude_titles.split(",") if t.strip())
+    try:
+        exp_tolerance = int(request.form.get("exp_tolerance", DEFAULT_EXP_TOLERANCE))
+    except ValueError:
+        exp_tolerance = DEFAULT_EXP_TOLERANCE
+    filter_args = {"senior_terms": senior_terms, "exp_tolerance": exp_tolerance}
+    if exp_tolerance < 0:
+        return render_template("recommend.html", results=None,
+                               error="exp_tolerance must be 0 or more", **filter_args), 400
+
     if request.method == "POST":
         resume_file = request.files.get("resume")
 
         if not resume_file:
-            return render_template("recommend.html", results=None, error="No file uploaded")
+            return render_template("recommend.html", results=None, error="No file uploaded", **filter_args)
 
         # Convert uploaded resume to text (PDF or TXT)
         try:
-            resume_text = extract_resume_text(resume_file)
+            with metrics.span("recommend.parse_resume"):
+                resume_text = extract_resume_text(resume_file)
         except Exception as e:
-            return render_template("recommend.html", results=None, error=f"Could not read resume: {e}")
+            return render_template("recommend.html", results=None, error=f"Could not read resume: {e}", **filter_args)
 
         # Run recommendation model
-        df_results = recommend_jobs(resume_text)
+        df_results = recommend_jobs(resume_text, **filter_args)
 
         # Only keep columns you want to show users
         keep_cols = ["title", "company", "location", "description", "job_url", "final_score"]
@@ -75,30 +137,35 @@ def recommend():
 
         results = df_results.to_dict(orient="records")
 
-        return render_template("recommend.html", results=results, error=None)
+        return render_template("recommend.html", results=results, error=None, **filter_args)
 
-    return render_template("recommend.html", results=None, error=None)
+    return render_template("recommend.html", results=None, error=None, **filter_args)
 
 
 
 
 # API Routes (JSON Data for Charts)
 
-@app.route("/api/salary")
-def salary_api():
-    df = load_all_states_data()
-    
-    # Filters
-    location = request.args.get('location')
-    job = request.args.get('job')
-    
+# Hardcoded lists based on available data
+LOCATIONS = ["California", "New York", "Texas", "Remote"]
+JOB_TITLES = [
+    "Software Engineer", 
+    "Data Scientist",
+    "Data Analyst",
+    "Business Analyst",
+    "Machine Learning Engineer",
+    "Product Manager"
+]
+
+
+def filter_postings(df, location, job):
+    """Apply the dashboard's location and job dropdown filters."""
     if location and location != "All locations":
         if location == "Remote":
             # Check both location string and is_remote flag
             df = df[
                 (df['location'].str.contains("Remote", case=False, na=False)) | 
-                (df['is_remote'] == True) | 
-                (df['is_remote'] == "True")
+                (df['is_remote'].fillna(False).astype(bool))
             ]
         else:
             # Map full state names to abbreviations
@@ -116,125 +183,376 @@ def salary_api():
             df = df[df['title'].str.contains("Software Engineer|DevOps|Full Stack|Backend|Frontend|Mobile|Embedded|Firmware", case=False, na=False, regex=True)]
         else:
             df = df[df['title'].str.contains(job, case=False, na=False)]
-        
-    # Calculate average salary
-    # Ensure numeric
-    df['min_amount'] = pd.to_numeric(df['min_amount'], errors='coerce')
-    df['max_amount'] = pd.to_numeric(df['max_amount'], errors='coerce')
-    df = df.dropna(subset=['min_amount', 'max_amount'])
+
+    return df
+
+
+def filter_labels():
+    """Metric labels for the dashboard filters (unknown values bucketed)."""
+    location = request.args.get('location') or "All locations"
+    job = request.args.get('job') or "All jobs"
+    return {
+        "location": location if location in LOCATIONS or location == "All locations" else "other",
+        "job": job if job in JOB_TITLES or job == "All jobs" else "other",
+    }
+
+
+def request_dataset():
+    """The dataset version pinned for the current request."""
+    if "dataset" not in g:
+        g.dataset = get_dataset()
+    return g.dataset
+
+
+def _accepts_gzip():
+    return API_GZIP_MIN_SIZE > 0 and "gzip" in request.accept_encodings
+
+
+def cached_api(view):
+    """
+    Add ETag/Last-Modified/Cache-Control to a JSON API route.
+
+    The ETag is derived from the dataset version, the path, the query
+    string and the response encoding, so it only changes when the data is
+    rebuilt or the filters differ. Conditional requests that still match
+    get an empty 304 without running the view. Large bodies are gzipped
+    when the client accepts it.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        dataset = request_dataset()
+        use_gzip = _accepts_gzip()
+        key = f"{dataset.version}|{request.path}|{sorted(request.args.items(multi=True))}|{use_gzip}"
+        etag = hashlib.sha1(key.encode()).hexdigest()[:20]
+        last_modified = None
+        if dataset.modified:
+            last_modified = datetime.fromtimestamp(int(dataset.modified), tz=timezone.utc)
+
+        fresh = not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+        metrics.count_cache("http_conditional", fresh)
+        if fresh:
+            response = app.response_class(status=304)
+        else:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            if use_gzip and response.content_length and response.content_length >= API_GZIP_MIN_SIZE:
+                response.set_data(gzip.compress(response.get_data(), compresslevel=5))
+                response.headers["Content-Encoding"] = "gzip"
+
+        response.vary.add("Accept-Encoding")
+        response.set_etag(etag)
+        if last_modified is not None:
+            response.last_modified = last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = API_CACHE_MAX_AGE
+        return response
+
+    return wrapper
+
+
+@app.route("/api/salary")
+@cached_api
+def salary_api():
+    dataset = request_dataset()
+    df = dataset.frame
     
-    # Calculate average for each row
-    df['avg_salary'] = (df['min_amount'] + df['max_amount']) / 2
+    # Filters
+    with metrics.span("api.filter"):
+        df = filter_postings(df, request.args.get('location'), request.args.get('job'))
+        
+    with metrics.span("api.salary"):
+        # Calculate average salary
+        # Ensure numeric (without writing into the shared cached frame)
+        min_amount = pd.to_numeric(df['min_amount'], errors='coerce')
+        max_amount = pd.to_numeric(df['max_amount'], errors='coerce')
+
+        # Calculate average for each row
+        avg_salary = ((min_amount + max_amount) / 2).dropna()
+
+        # Binned mode: histogram counts + quantiles instead of every value
+        if request.args.get('bins') or request.args.get('bin_edges'):
+            try:
+                hist = salary_histogram(avg_salary.to_numpy(dtype=float), request.args)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            hist['version'] = dataset.version
+            return jsonify(hist)
     
-    return jsonify({'salary': df['avg_salary'].tolist()})
+        return jsonify({'salary': avg_salary.tolist(), 'version': dataset.version})
+
+@app.route("/api/salary/stats")
+@cached_api
+def salary_stats_api():
+    """
+    Yearly salary statistics from the precomputed segment sketches:
+    ?state=Texas&role=Data Analyst&remote=true|false narrows the segments,
+    by=state|role|remote adds the same statistics per value for comparison
+    and quantiles=0.1,0.5,0.9 picks the reported quantiles.
+    """
+    dataset = request_dataset()
+
+    remote = request.args.get('remote')
+    if remote is not None:
+        if remote.lower() not in ('true', 'false', '1', '0'):
+            return jsonify({'error': 'remote must be true or false'}), 400
+        remote = remote.lower() in ('true', '1')
+    try:
+        quantiles = DEFAULT_QUANTILES
+        if request.args.get('quantiles'):
+            quantiles = [float(q) for q in request.args['quantiles'].split(',') if q.strip()]
+    except ValueError:
+        return jsonify({'error': 'quantiles must be a comma separated list of numbers'}), 400
+    if any(not 0 <= q <= 1 for q in quantiles):
+        return jsonify({'error': 'quantiles must be between 0 and 1'}), 400
+
+    filters = {'state': request.args.get('state'), 'role': request.args.get('role'), 'remote': remote}
+    with metrics.span("api.salary_stats"):
+        sketches = dataset.salary
+        out = {'overall': sketches.summary(sketches.select(**filters), quantiles)}
+        by = request.args.get('by')
+        if by:
+            try:
+                out['by'] = by
+                out['groups'] = sketches.compare(by, quantiles, **filters)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+    out['version'] = dataset.version
+    return jsonify(out)
 
 @app.route("/api/filters")
+@cached_api
 def filters_api():
-    # Hardcoded lists based on available data
-    locations = ["California", "New York", "Texas", "Remote"]
-    titles = [
-        "Software Engineer", 
-        "Data Scientist",
-        "Data Analyst",
-        "Business Analyst",
-        "Machine Learning Engineer",
-        "Product Manager"
-    ]
-    
     return jsonify({
-        'locations': locations,
-        'jobs': titles
+        'locations': LOCATIONS,
+        'jobs': JOB_TITLES,
+        'version': request_dataset().version
     })
 
 @app.route("/api/skills")
+@cached_api
 def skills_api():
-    df = load_all_states_data()
+    dataset = request_dataset()
+    df = dataset.frame
     
     # Filters
-    location = request.args.get('location')
-    job = request.args.get('job')
+    with metrics.span("api.filter"):
+        df = filter_postings(df, request.args.get('location'), request.args.get('job'))
     
-    if location and location != "All locations":
-        if location == "Remote":
-            df = df[
-                (df['location'].str.contains("Remote", case=False, na=False)) | 
-                (df['is_remote'] == True) | 
-                (df['is_remote'] == "True")
-            ]
-        else:
-            # Map full state names to abbreviations
-            loc_map = {
-                "California": "CA",
-                "New York": "NY",
-                "Texas": "TX"
-            }
-            search_term = loc_map.get(location, location)
-            df = df[df['location'].str.contains(search_term, case=False, na=False)]
-            
-    if job and job != "All jobs":
-        if job == "Software Engineer":
-            df = df[df['title'].str.contains("Software Engineer|DevOps|Full Stack|Backend|Frontend|Mobile|Embedded|Firmware", case=False, na=False, regex=True)]
-        else:
-            df = df[df['title'].str.contains(job, case=False, na=False)]
-    
-    # Extract skills
-    all_skills = []
-    for skills_str in df['parsed_skills'].dropna():
-        # Assuming comma separated
-        skills = [s.strip() for s in skills_str.split(',')]
-        all_skills.extend(skills)
-        
-    counts = Counter(all_skills)
-    most_common = counts.most_common(20) # Top 20
+    # Count skills over the filtered rows (the frame index is the row
+    # position in dataset.skills)
+    with metrics.span("api.skills"):
+        most_common = dataset.skills.most_common(df.index.to_numpy(), k=20) # Top 20
     
     return jsonify({
         'skill': [x[0] for x in most_common],
-        'count': [x[1] for x in most_common]
+        'count': [x[1] for x in most_common],
+        'version': dataset.version
+    })
+
+def _skill_filter_args():
+    """state, role and k (1..SKILLS_MAX_K) from the query string; raises ValueError."""
+    try:
+        k = int(request.args.get('k', 10))
+    except ValueError:
+        raise ValueError('k must be an integer')
+    if not 1 <= k <= SKILLS_MAX_K:
+        raise ValueError(f'k must be between 1 and {SKILLS_MAX_K}')
+    return request.args.get('state'), request.args.get('role'), k
+
+
+@app.route("/api/skills/related")
+@cached_api
+def related_skills_api():
+    """
+    Skills that appear together with ?skill=python, ranked by
+    metric=lift|pmi|count, optionally within a state and/or role.
+    """
+    dataset = request_dataset()
+    name = request.args.get('skill', '').strip()
+    if not name:
+        return jsonify({'error': 'skill is required'}), 400
+    skill = skill_id(name)
+    if skill is None:
+        return jsonify({'error': f'unknown skill: {name}'}), 404
+    try:
+        state, role, k = _skill_filter_args()
+        with metrics.span("api.skills_related"):
+            cooc = SkillCooccurrence.for_dataset(dataset)
+            related = cooc.related(skill, state=state, role=role, k=k,
+                                   metric=request.args.get('metric', 'lift'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    segment = cooc.segment(state, role)
+    return jsonify({
+        'skill': skill_names([skill])[0],
+        'postings': int(segment.skill_counts[skill]) if segment else 0,
+        'related': related,
+        'version': dataset.version
     })
 
+
+@app.route("/api/skills/salary")
+@cached_api
+def skills_salary_api():
+    """Skills whose postings pay the most above the rest, optionally within a state and/or role."""
+    dataset = request_dataset()
+    try:
+        state, role, k = _skill_filter_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    with metrics.span("api.skills_salary"):
+        lift = SkillCooccurrence.for_dataset(dataset).salary_lift(state=state, role=role, k=k)
+    return jsonify({'skills': lift, 'version': dataset.version})
+
+
+def trend_store(dataset):
+    """
+    TrendStore with a bucket per dashboard location/job combination
+    (None = no filter). Built once per dataset version, and extended in
+    place of a rebuild when ingested rows are added.
+    """
+    def buckets(frame):
+        frame = frame.reset_index(drop=True)
+        by_location = {loc: filter_postings(frame, loc, None).index.to_numpy()
+                       for loc in [None] + LOCATIONS}
+        by_job = {job: filter_postings(frame, None, job).index.to_numpy()
+                  for job in [None] + JOB_TITLES}
+        return {(loc, job): np.intersect1d(loc_rows, job_rows, assume_unique=True)
+                for loc, loc_rows in by_location.items()
+                for job, job_rows in by_job.items()}
+
+    def build(ds):
+        return TrendStore(ds.frame["date_posted"], buckets(ds.frame))
+
+    def update(store, ds, start):
+        # Ingested rows only add counts, so the old store is extended
+        rows = ds.frame.iloc[start:]
+        return store.extended(rows["date_posted"], buckets(rows))
+
+    return dataset.aggregate("trend_store", build, update)
+
+
 @app.route("/api/trends")
+@cached_api
 def trends_api():
-    df = load_all_states_data()
-
-    # Filters
+    """
+    Postings over time for the dashboard filters, with optional
+    freq=day|week|month, window=N (rolling average over N periods),
+    growth=true (change from the previous period), start/end dates and
+    dense=true (also list periods without postings).
+    """
+    dataset = request_dataset()
     location = request.args.get('location')
     job = request.args.get('job')
-    
-    if location and location != "All locations":
-        if location == "Remote":
-            df = df[
-                (df['location'].str.contains("Remote", case=False, na=False)) | 
-                (df['is_remote'] == True) | 
-                (df['is_remote'] == "True")
-            ]
-        else:
-            # Map full state names to abbreviations
-            loc_map = {
-                "California": "CA",
-                "New York": "NY",
-                "Texas": "TX"
-            }
-            search_term = loc_map.get(location, location)
-            df = df[df['location'].str.contains(search_term, case=False, na=False)]
-            
-    if job and job != "All jobs":
-        if job == "Software Engineer":
-            df = df[df['title'].str.contains("Software Engineer|DevOps|Full Stack|Backend|Frontend|Mobile|Embedded|Firmware", case=False, na=False, regex=True)]
-        else:
-            df = df[df['title'].str.contains(job, case=False, na=False)]
-    
-    # Ensure date
-    df['date_posted'] = pd.to_datetime(df['date_posted'], errors='coerce')
-    df = df.dropna(subset=['date_posted'])
-    
-    daily_counts = df.groupby('date_posted').size().reset_index(name='postings')
-    daily_counts = daily_counts.sort_values('date_posted')
-    
+    location = None if location in (None, "", "All locations") else location
+    job = None if job in (None, "", "All jobs") else job
+
+    try:
+        window = int(request.args['window']) if request.args.get('window') else None
+        start = pd.Timestamp(request.args['start']) if request.args.get('start') else None
+        end = pd.Timestamp(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({'error': 'window must be an integer and start/end dates (YYYY-MM-DD)'}), 400
+
+    with metrics.span("api.trends"):
+        store = trend_store(dataset)
+        counts = store.counts.get((location, job))
+        if counts is None:
+            # Not one of the dropdown values, count the filtered rows directly
+            with metrics.span("api.filter"):
+                rows = filter_postings(dataset.frame, location, job).index.to_numpy()
+            counts = store.daily_counts(rows)
+        try:
+            series = store.series(
+                counts,
+                freq=request.args.get('freq', 'day'),
+                window=window,
+                growth=request.args.get('growth', '').lower() in ('1', 'true'),
+                start=start,
+                end=end,
+                dense=request.args.get('dense', '').lower() in ('1', 'true'),
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    series['version'] = dataset.version
+    return jsonify(series)
+
+@app.route("/api/search")
+@cached_api
+def search_api():
+    """
+    Free-text search: ?q=python "machine learning"&page=1&per_page=20
+    with optional state, role, remote=true|false, min_salary, max_salary
+    (yearly amounts).
+    """
+    dataset = request_dataset()
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'q is required'}), 400
+    if not parse_query(query):
+        return jsonify({'error': 'q must contain at least one word'}), 400
+
+    try:
+        page = int(request.args.get('page', 1))
+        per_page = int(request.args.get('per_page', SEARCH_PER_PAGE))
+        min_salary = request.args.get('min_salary')
+        max_salary = request.args.get('max_salary')
+        min_salary = float(min_salary) if min_salary else None
+        max_salary = float(max_salary) if max_salary else None
+    except ValueError:
+        return jsonify({'error': 'page, per_page, min_salary and max_salary must be numbers'}), 400
+    if page < 1 or not 1 <= per_page <= SEARCH_MAX_PER_PAGE:
+        return jsonify({'error': f'page must be >= 1 and per_page between 1 and {SEARCH_MAX_PER_PAGE}'}), 400
+
+    remote = request.args.get('remote')
+    if remote is not None:
+        if remote.lower() not in ('true', 'false', '1', '0'):
+            return jsonify({'error': 'remote must be true or false'}), 400
+        remote = remote.lower() in ('true', '1')
+
+    with metrics.span("api.search"):
+        index = SearchIndex.for_dataset(dataset)
+        rows, scores, total = index.search(
+            query,
+            offset=(page - 1) * per_page,
+            limit=per_page,
+            state=request.args.get('state'),
+            role=request.args.get('role'),
+            remote=remote,
+            min_salary=min_salary,
+            max_salary=max_salary,
+        )
+
+        cols = ['id', 'title', 'company', 'location', 'date_posted', 'job_url',
+                'min_amount', 'max_amount', 'interval', 'description']
+        hits = dataset.frame.iloc[rows][[c for c in cols if c in dataset.frame.columns]]
+        if 'date_posted' in hits.columns:
+            hits['date_posted'] = pd.to_datetime(hits['date_posted'], errors='coerce').dt.strftime('%Y-%m-%d')
+        if 'description' in hits.columns:
+            hits['description'] = hits['description'].str.slice(0, 300)
+        hits = hits.astype(object).where(hits.notna(), None)
+        results = hits.to_dict(orient='records')
+        for result, score in zip(results, scores):
+            result['score'] = round(float(score), 4)
+
     return jsonify({
-        'date': daily_counts['date_posted'].dt.strftime('%Y-%m-%d').tolist(),
-        'postings': daily_counts['postings'].tolist()
+        'query': query,
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'results': results,
+        'version': dataset.version
     })
 
 
+metrics.init_app(app, route_labels=lambda: filter_labels() if request.path.startswith("/api/") else {})
+profiling.init_app(app)
+
+
 if __name__ == "__main__":
+    start_watcher()
     app.run(debug=True)
@@ -14,12 +14,19 @@ async function getData(url, params = null) {
 }
 
 // salary: accept optional filters object { location, job }
+// (binned server side: the API returns histogram edges + counts)
 async function loadSalaryChart(filters = {}) {
-    const data = await getData("/api/salary", filters);
+    const data = await getData("/api/salary", { ...filters, bins: 40 });
+
+    const edges = data.edges || [];
+    const centers = edges.slice(0, -1).map((e, i) => (e + edges[i + 1]) / 2);
+    const widths = edges.slice(0, -1).map((e, i) => edges[i + 1] - e);
 
     const trace = {
-        x: data.salary || [],
-        type: "histogram",
+        x: centers,
+        y: data.counts || [],
+        width: widths,
+        type: "bar",
         marker: { color: "#4f46e5" }, // Indigo-600
         hovertemplate: "Salary: $%{x}<br>Count: %{y} jobs<extra></extra>"
     };
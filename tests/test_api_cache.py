@@ -0,0 +1,76 @@
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.data_loader import Dataset, apply_schema
+from src.website import app as app_module
+
+
+def _dataset(version, n=200):
+    rng = np.random.default_rng(0)
+    low = rng.integers(40, 150, n) * 1000
+    frame = apply_schema(pd.DataFrame({
+        "title": ["Data Analyst"] * n,
+        "company": [f"Company {i}" for i in range(n)],
+        "location": ["Austin, TX"] * n,
+        "is_remote": [False] * n,
+        "min_amount": low,
+        "max_amount": low + 20000,
+        "interval": ["yearly"] * n,
+    }))
+    return Dataset(frame, version, 1735689600)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    dataset = {"current": _dataset("v1")}
+    monkeypatch.setattr(app_module, "get_dataset", lambda: dataset["current"])
+    client = app_module.app.test_client()
+    client.dataset = dataset
+    return client
+
+
+def test_matching_etag_gets_an_empty_304(client):
+    first = client.get("/api/salary?location=Texas")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Last-Modified"]
+    assert "max-age" in first.headers["Cache-Control"]
+
+    again = client.get("/api/salary?location=Texas", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_etag_changes_with_the_filters_and_the_version(client):
+    etag = client.get("/api/salary?location=Texas").headers["ETag"]
+    assert client.get("/api/salary?location=California").headers["ETag"] != etag
+
+    client.dataset["current"] = _dataset("v2")
+    stale = client.get("/api/salary?location=Texas", headers={"If-None-Match": etag})
+    assert stale.status_code == 200
+    assert stale.headers["ETag"] != etag
+
+
+def test_large_responses_are_gzipped(client):
+    plain = client.get("/api/salary")
+    assert "Content-Encoding" not in plain.headers
+    assert len(plain.data) >= app_module.API_GZIP_MIN_SIZE
+
+    zipped = client.get("/api/salary", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert gzip.decompress(zipped.data) == plain.data
+    # The encoding is part of the ETag, so caches keep both bodies apart
+    assert zipped.headers["ETag"] != plain.headers["ETag"]
+
+
+def test_small_responses_are_not_gzipped(client):
+    binned = client.get("/api/salary?bins=4", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in binned.headers
+    hist = binned.get_json()
+    assert len(hist["edges"]) == 5
+    assert sum(hist["counts"]) == hist["count"] == 200
@@ -0,0 +1,73 @@
+import os
+
+import pandas as pd
+import pytest
+
+from src.pipeline import build
+
+
+@pytest.fixture
+def task(tmp_path, monkeypatch):
+    monkeypatch.setattr(build, "STAMPS", str(tmp_path / "stamps"))
+    src, out = tmp_path / "in.txt", tmp_path / "out.txt"
+    src.write_text("a")
+    out.write_text("b")
+    return build.Task("derive", "derive", None, [str(src)], [str(out)])
+
+
+def test_task_is_stale_until_stamped(task):
+    assert build.is_stale(task)
+    build.write_stamp(task)
+    assert not build.is_stale(task)
+
+
+def test_staleness_follows_content_not_mtime(task):
+    build.write_stamp(task)
+    src, out = task.inputs[0], task.outputs[0]
+    os.utime(src, (0, 0))
+    os.utime(out, (0, 0))
+    assert not build.is_stale(task)
+
+    with open(src, "w") as f:
+        f.write("changed")
+    assert build.is_stale(task)
+    assert build.stale_reason(task) == f"{os.path.relpath(src, build.REPO_ROOT)} changed"
+
+
+def test_changed_or_missing_output_is_stale(task):
+    build.write_stamp(task)
+    with open(task.outputs[0], "w") as f:
+        f.write("edited by hand")
+    assert build.is_stale(task)
+    os.remove(task.outputs[0])
+    assert build.is_stale(task)
+
+
+def test_summaries_keep_the_committed_columns(tmp_path):
+    src = tmp_path / "all_states.csv"
+    pd.DataFrame({
+        "state": ["Texas", "Texas", "New York"],
+        "role": ["Data Analyst"] * 3,
+        "min_amount": [50000, None, 70000],
+        "max_amount": [70000, None, 90000],
+        "is_remote": [True, False, False],
+    }).to_csv(src, index=False)
+    build.write_summaries(str(src), str(tmp_path / "all_roles_summary_clean.csv"))
+
+    committed = pd.read_csv(os.path.join(build.PROCESSED, "data_analyst_summary_clean.csv"), nrows=0)
+    written = pd.read_csv(tmp_path / "data_analyst_summary_clean.csv")
+    assert list(written.columns) == list(committed.columns) == build.SUMMARY_COLUMNS
+    assert written["state"].tolist() == ["New York", "Texas", "TOTAL"]
+
+
+def test_derive_frame_without_is_remote():
+    df = build.derive_frame(pd.DataFrame({
+        "location": ["Austin, TX", "Remote"],
+        "description": ["3+ years of python", ""],
+        "min_amount": [100000, None],
+        "max_amount": [120000, None],
+        "interval": ["yearly", None],
+    }))
+    assert df["is_remote"].tolist() == [False, True]
+    assert df["state"].tolist()[0] == "Texas"
+    assert df["min_exp"].tolist() == [3, 0]
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from src.cleaning import clean_CSV
+
+
+def _fake_extract(text):
+    # spaCy stand-in: whole-word matches of a few skills.json terms
+    if pd.isna(text):
+        return ""
+    words = set(text.lower().replace(",", " ").split())
+    return ", ".join(sorted(words & {"python", "sql", "excel", "tableau"}))
+
+
+@pytest.fixture
+def raw(tmp_path, monkeypatch):
+    monkeypatch.setattr(clean_CSV, "extract_skills_nlp", _fake_extract)
+    path = tmp_path / "raw.csv"
+    n = 11
+    pd.DataFrame({
+        "Title": [f"Data Analyst {i}" for i in range(n)],
+        "company": ["Acme", None] * 5 + ["Initech"],
+        "description": [f"<p>Python &amp; SQL</p>&nbsp;{i} years" if i % 3 else None for i in range(n)],
+        "skills": ["Python, Excel" if i % 2 else "" for i in range(n)],
+        # Missing only in a later chunk, so chunks disagree on the inferred type
+        "min_amount": [50000 + i if i < 9 else None for i in range(n)],
+        "max_amount": [70000] * n,
+        "emails": ["x@example.com"] * n,
+        "is_remote": [True, False] * 5 + [True],
+    }).to_csv(path, index=False)
+    return path
+
+
+def test_chunked_cleaning_matches_a_single_pass(raw, tmp_path):
+    clean_CSV.clean_jobs(str(raw), str(tmp_path / "whole.csv"))
+    clean_CSV.clean_jobs(str(raw), str(tmp_path / "chunked.csv"), chunksize=4)
+
+    whole = pd.read_csv(tmp_path / "whole.csv")
+    chunked = pd.read_csv(tmp_path / "chunked.csv")
+    pd.testing.assert_frame_equal(chunked, whole)
+    assert len(whole) == 11
+    assert "emails" not in whole.columns
+    assert whole["skill_count"].tolist()[:2] == [0, 2]
+
+
+def test_chunked_parquet_matches_csv(raw, tmp_path):
+    clean_CSV.clean_jobs(str(raw), str(tmp_path / "whole.csv"))
+    clean_CSV.clean_jobs(str(raw), str(tmp_path / "chunked.parquet"), chunksize=4)
+
+    whole = pd.read_csv(tmp_path / "whole.csv", dtype=str)
+    chunked = pd.read_parquet(tmp_path / "chunked.parquet")
+    assert list(chunked.columns) == list(whole.columns)
+    for col in ["title", "description", "parsed_skills", "parsed_skill_ids", "skill_ids"]:
+        assert chunked[col].fillna("").tolist() == whole[col].fillna("").tolist()
+    assert chunked["min_amount"].tolist()[:9] == [50000.0 + i for i in range(9)]
+    assert chunked["min_amount"].isna().tolist()[9:] == [True, True]
+
+
+def test_failed_chunk_leaves_no_output(raw, tmp_path, monkeypatch):
+    def fail(text):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(clean_CSV, "extract_skills_nlp", fail)
+    out = tmp_path / "out.csv"
+    with pytest.raises(RuntimeError):
+        clean_CSV.clean_jobs(str(raw), str(out), chunksize=4)
+    assert list(tmp_path.iterdir()) == [raw]
@@ -0,0 +1,67 @@
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cleaning.clean_CSV import clean_html, clean_html_column
+
+
+def clean_html_reference(text):
+    """clean_CSV.clean_html before it was vectorized."""
+    if pd.isna(text):
+        return ""
+    text = re.sub(r"<[^>]+>", " ", str(text))
+    for entity, char in {"&nbsp;": " ", "&rsquo;": "'", "&lsquo;": "'", "&rdquo;": '"',
+                         "&ldquo;": '"', "&amp;": "&", "&lt;": "<", "&gt;": ">",
+                         "&quot;": '"'}.items():
+        text = text.replace(entity, char)
+    text = text.replace("\u2019", "'").replace("\u2013", "-").replace("\u2014", "-")
+    return re.sub(r"\s+", " ", text).strip()
+
+
+SAME_AS_REFERENCE = [
+    None,
+    np.nan,
+    "",
+    "   ",
+    42,
+    1.5,
+    "plain text",
+    "<p>Hello</p><p>world</p>",
+    "<div class=\"a\">\n  <ul><li>SQL</li>\n<li>Python</li></ul>\n</div>",
+    "<br/>line<br>break<br />",
+    "unclosed <b tag",
+    "stray > bracket and a < b",
+    "<a href='x'>link</a>&nbsp;&nbsp;text",
+    "Tom&rsquo;s &lsquo;quoted&rsquo; &ldquo;words&rdquo;",
+    "R&amp;D &lt;b&gt;not a tag&lt;/b&gt; &quot;q&quot;",
+    "&amp;nbsp; stays an entity",
+    "AT&T and Q&A without entities",
+    "it\u2019s 9\u20135 \u2014 every day",
+    "tabs\tand\r\nnewlines\n\n\nand  spaces",
+    "\xa0non-breaking\xa0spaces\xa0",
+    "café naïve 中文",
+]
+
+
+@pytest.mark.parametrize("text", SAME_AS_REFERENCE)
+def test_clean_html_matches_reference(text):
+    assert clean_html(text) == clean_html_reference(text)
+
+
+def test_clean_html_column_matches_reference():
+    col = pd.Series(SAME_AS_REFERENCE, dtype=object)
+    assert clean_html_column(col).tolist() == [clean_html_reference(t) for t in SAME_AS_REFERENCE]
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Every entity is decoded, not only the nine the reference knew
+    ("9&ndash;5 &middot; &#8209; &eacute;", "9-5 \u00b7 \u2011 \u00e9"),
+    # Decoding happens once: an escaped entity stays an entity
+    ("&amp;lt;", "&lt;"),
+    # All curly quotes become ASCII, and zero-width no-break spaces go
+    ("\u2018a\u2019 \u201cb\u201d\ufeff", "'a' \"b\""),
+])
+def test_clean_html_decodes_what_the_reference_missed(text, expected):
+    assert clean_html(text) == expected
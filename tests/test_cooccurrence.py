@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+
+from api.cooccurrence import SkillCooccurrence
+from api.skills import SkillMatrix, skill_id
+
+
+def _frame():
+    return pd.DataFrame({
+        "state": ["Texas", "Texas", "New York", "California", "Texas", "New York"],
+        "role": ["Data Analyst", "Data Scientist", "Data Analyst", "Data Analyst",
+                 "Data Analyst", "Data Engineer"],
+        "parsed_skills": ["python, sql", "python, pandas", "sql, excel", "python, sql, excel",
+                          "sql", "python, spark"],
+        "min_amount": [80000, 120000, 70000, 90000, None, 130000],
+        "max_amount": [100000, 140000, 90000, 110000, None, 150000],
+        "interval": "yearly",
+    })
+
+
+def _cooc(frame):
+    return SkillCooccurrence(SkillMatrix.from_columns(names=frame["parsed_skills"]), frame)
+
+
+def test_extended_matches_a_full_build():
+    frame = _frame()
+    skills = SkillMatrix.from_columns(names=frame["parsed_skills"])
+    extended = _cooc(frame.iloc[:3]).extended(skills, frame, 3)
+    full = _cooc(frame)
+
+    assert extended.segments.keys() == full.segments.keys()
+    for key, seg in full.segments.items():
+        other = extended.segments[key]
+        assert (other.cooc != seg.cooc).nnz == 0
+        assert np.array_equal(other.skill_counts, seg.skill_counts)
+        assert np.array_equal(other.n_with, seg.n_with)
+        assert np.allclose(other.sum_with, seg.sum_with)
+        assert (other.n_postings, other.n_salaried, other.salary_total) == \
+            (seg.n_postings, seg.n_salaried, seg.salary_total)
+
+
+def test_related_ranks_by_lift():
+    frame = _frame()
+    related = _cooc(frame).related(skill_id("sql"), min_count=1)
+    # 6 postings: sql in 4, excel in 2 (both with sql), python in 4 (2 with sql)
+    assert [r["skill"] for r in related] == ["excel", "python"]
+    assert related[0]["lift"] == 1.5
+    assert related[1]["lift"] == 0.75
+    assert related[0]["count"] == 2
+
+
+def test_lift_ties_go_to_the_pair_seen_more_often():
+    frame = pd.DataFrame({"parsed_skills": ["python, pandas"] * 3 + ["python, numpy"] * 2 + ["sql"]})
+    related = _cooc(frame).related(skill_id("python"), min_count=1)
+    assert [r["lift"] for r in related] == [1.2, 1.2]
+    assert [r["skill"] for r in related] == ["pandas", "numpy"]
+
+
+def test_state_filter_accepts_codes():
+    cooc = _cooc(_frame())
+    assert cooc.segment("TX") is cooc.segment("Texas") is cooc.segment(" texas ")
+    assert cooc.segment("TX").n_postings == 3
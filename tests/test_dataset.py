@@ -0,0 +1,100 @@
+import json
+
+import pandas as pd
+import pytest
+
+from api import data_loader
+
+
+def _rows(n, offset=0):
+    return pd.DataFrame({
+        "id": [f"job-{offset + i}" for i in range(n)],
+        "title": ["Data Analyst"] * n,
+        "company": [f"Company {offset + i}" for i in range(n)],
+        "state": ["Texas"] * n,
+        "role": ["Data Analyst"] * n,
+        "is_remote": [False] * n,
+        "min_amount": [50000.0] * n,
+        "max_amount": [70000.0] * n,
+        "interval": ["yearly"] * n,
+        "date_posted": ["2025-01-01"] * n,
+        "parsed_skills": ["python, sql"] * n,
+    })
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    snapshots = tmp_path / "index" / "snapshots"
+    monkeypatch.setattr(data_loader, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(data_loader, "MANIFEST_PATH", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(data_loader, "INGEST_LOG_DIR", str(tmp_path / "ingest_log"))
+    monkeypatch.setattr(data_loader, "SNAPSHOT_DIR", str(snapshots))
+    monkeypatch.setattr(data_loader, "SNAPSHOT_CURRENT", str(snapshots / "current.json"))
+    monkeypatch.setattr(data_loader, "_CURRENT", None)
+    for name in ("_AGGREGATE_BUILDERS", "_AGGREGATE_UPDATERS", "_AGGREGATE_REFRESHERS"):
+        monkeypatch.setattr(data_loader, name, {})
+    return tmp_path
+
+
+def _publish(data_dir, version, rows):
+    rows.to_csv(data_dir / "all_states_clean.csv", index=False)
+    with open(data_dir / "manifest.json", "w") as f:
+        json.dump({"version": version, "files": ["all_states_clean.csv"]}, f)
+
+
+def test_reload_swaps_in_a_new_version_with_its_aggregates(data_dir):
+    _publish(data_dir, "v1", _rows(3))
+    old = data_loader.get_dataset()
+    assert old.version == "v1"
+    assert old.aggregate("rows", lambda ds: len(ds.frame)) == 3
+    assert not data_loader.reload_dataset()
+
+    _publish(data_dir, "v2", _rows(5))
+    assert data_loader.reload_dataset()
+    new = data_loader.get_dataset()
+    assert new.version == "v2"
+    # Aggregates in use are built before the swap; the old version is untouched
+    assert new._aggregates["rows"] == 5
+    assert old.aggregate("rows", lambda ds: 0) == 3
+
+
+def test_invalid_manifest_keeps_the_last_good_dataset(data_dir):
+    _publish(data_dir, "v1", _rows(3))
+    data_loader.get_dataset()
+    with open(data_dir / "manifest.json", "w") as f:
+        json.dump({"files": ["all_states_clean.csv"]}, f)
+    assert not data_loader.reload_dataset()
+    assert data_loader.get_dataset().version == "v1"
+
+
+def test_ingested_rows_update_aggregates_in_place(data_dir):
+    from api import ingest_log
+
+    _publish(data_dir, "v1", _rows(3))
+    old = data_loader.get_dataset()
+    calls = []
+
+    def update(value, dataset, start):
+        calls.append(start)
+        return value + len(dataset.frame) - start
+
+    old.aggregate("rows", lambda ds: len(ds.frame), update=update)
+    ingest_log.append_rows(data_loader.INGEST_LOG_DIR, _rows(2, offset=3))
+    assert data_loader.reload_dataset()
+
+    new = data_loader.get_dataset()
+    assert new.version == "v1+2"
+    assert (new.base_rows, new.log_rows, len(new.frame)) == (3, 2, 5)
+    assert new.frame["id"].tolist()[-2:] == ["job-3", "job-4"]
+    assert new.salary.n_rows == 5
+    assert calls == [3]
+    assert new._aggregates["rows"] == 5
+
+    # A rebuild that already contains the log rows serves them once
+    _publish(data_dir, "v2", pd.concat([_rows(3), _rows(2, offset=3)]))
+    with open(data_dir / "manifest.json", "w") as f:
+        json.dump({"version": "v2", "files": ["all_states_clean.csv"], "ingest_log_rows": 2}, f)
+    assert data_loader.reload_dataset()
+    rebuilt = data_loader.get_dataset()
+    assert (rebuilt.version, len(rebuilt.frame), rebuilt.base_rows) == ("v2", 5, 5)
+    assert calls == [3]
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+from src.cleaning.dedupe import THRESHOLD, cluster_labels, dedupe_postings
+
+WORDS = [f"word{i}" for i in range(200)]
+
+
+def _text(changed=()):
+    return " ".join(f"other{i}" if i in changed else w for i, w in enumerate(WORDS))
+
+
+def test_threshold_decides_near_duplicates():
+    # One changed word breaks 5 of 196 shingles: Jaccard 191/201 ~ 0.95.
+    # Every 4th word changed leaves no shingle intact: Jaccard 0.
+    texts = [_text(), _text({100}), _text(range(0, 200, 4)), "Word0  " + _text()[6:].upper()]
+    labels = cluster_labels(texts)
+    assert labels[0] == labels[1] == labels[3]
+    assert labels[2] != labels[0]
+
+    strict = cluster_labels(texts, threshold=1.0)
+    assert strict[0] == strict[3]
+    assert strict[1] != strict[0]
+
+
+def test_similarity_below_the_threshold_is_kept_apart():
+    # Six changed words spread out: Jaccard 166/226 ~ 0.73 < THRESHOLD
+    changed = {20, 50, 80, 110, 140, 170}
+    assert len(set(cluster_labels([_text(), _text(changed)]))) == 2
+    assert THRESHOLD > 166 / 226
+
+
+def test_texts_without_words_are_not_near_duplicates():
+    # Only identical texts share a label ("" and None are both empty)
+    labels = cluster_labels(["", None, "  ", "!!"])
+    assert labels[0] == labels[1]
+    assert len(set(labels)) == 3
+
+
+def test_canonical_row_prefers_a_salary_then_the_newest():
+    df = pd.DataFrame({
+        "id": ["a", "b", "c", "d"],
+        "title": ["Data Analyst"] * 4,
+        "company": ["Acme"] * 3 + ["Other"],
+        "description": [_text(), _text({100}), _text(), _text(range(0, 200, 4))],
+        "min_amount": [None, 60000, 50000, None],
+        "date_posted": ["2025-01-03", "2025-01-01", "2025-01-02", "2025-01-01"],
+    })
+    out = dedupe_postings(df)
+    assert out["id"].tolist() == ["c", "d"]
+    assert out["cluster_id"].tolist() == ["c", "d"]
+    assert out["cluster_size"].tolist() == [3, 1]
+    assert np.issubdtype(out["cluster_size"].dtype, np.integer)
@@ -0,0 +1,54 @@
+import os
+import shutil
+
+import pandas as pd
+
+from api import ingest_log
+
+
+def _rows(n, offset=0):
+    return pd.DataFrame({"id": [f"job-{offset + i}" for i in range(n)],
+                         "title": ["Data Analyst"] * n})
+
+
+def test_append_and_read_from_a_row(tmp_path):
+    log = str(tmp_path / "log")
+    assert ingest_log.read_rows(log)[1] == 0
+    assert ingest_log.append_rows(log, _rows(3)) == 3
+    assert ingest_log.append_rows(log, _rows(0)) == 3
+    assert ingest_log.append_rows(log, _rows(2, offset=3)) == 5
+    assert [(s, e) for s, e, _ in ingest_log.list_parts(log)] == [(0, 3), (3, 5)]
+
+    rows, end = ingest_log.read_rows(log, start=2)
+    assert end == 5
+    assert rows["id"].tolist() == ["job-2", "job-3", "job-4"]
+    rows, end = ingest_log.read_rows(log, start=5)
+    assert end == 5 and rows.empty
+
+
+def test_compaction_keeps_the_rows(tmp_path):
+    log = str(tmp_path / "log")
+    for lo in range(0, 6, 2):
+        ingest_log.append_rows(log, _rows(2, offset=lo))
+    assert not ingest_log.compact(log, max_parts=3)
+    assert ingest_log.compact(log, max_parts=1)
+    assert [(s, e) for s, e, _ in ingest_log.list_parts(log)] == [(0, 6)]
+    assert ingest_log.read_rows(log, start=4)[0]["id"].tolist() == ["job-4", "job-5"]
+    assert ingest_log.append_rows(log, _rows(1, offset=6)) == 7
+
+
+def test_parts_covered_by_a_compacted_one_are_skipped(tmp_path):
+    # A reader that lists the folder between the merged part being renamed
+    # into place and the old parts being removed
+    log = str(tmp_path / "log")
+    ingest_log.append_rows(log, _rows(2))
+    ingest_log.append_rows(log, _rows(2, offset=2))
+    old = [path for _, _, path in ingest_log.list_parts(log)]
+    saved = [shutil.copy(path, str(tmp_path)) for path in old]
+    ingest_log.compact(log)
+    for path, copy in zip(old, saved):
+        shutil.copy(copy, path)
+
+    assert len(os.listdir(log)) == 3
+    assert [(s, e) for s, e, _ in ingest_log.list_parts(log)] == [(0, 4)]
+    assert ingest_log.read_rows(log)[0]["id"].tolist() == [f"job-{i}" for i in range(4)]
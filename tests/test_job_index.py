@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.data_loader import Dataset, apply_schema
+from src.analysis import recommendation_model as rm
+from src.analysis.job_vectors import JobVectors
+
+TITLES = ["Data Analyst", "Senior Data Analyst", "Data Scientist", "Lead Data Engineer",
+          "Machine Learning Engineer", "Business Analyst", "Staff Data Scientist", "Analyst Intern"]
+DESCRIPTIONS = ["python sql dashboards", "sql excel reporting 5 years", "python statistics models",
+                "python spark pipelines 3 years", "python pytorch models 2 years",
+                "excel sql reporting", "python statistics sql 8 years", "excel python reporting"]
+
+
+def _jobs(n, offset=0, days_old=0):
+    rows = [(offset + i) % len(TITLES) for i in range(n)]
+    return pd.DataFrame({
+        "id": [f"job-{offset + i}" for i in range(n)],
+        "title": [TITLES[r] for r in rows],
+        "company": [f"Company {offset + i}" for i in range(n)],
+        "description": [DESCRIPTIONS[r] for r in rows],
+        "skills": ["python, sql" if r % 2 else "excel, tableau, negotiation" for r in rows],
+        "date_posted": pd.Timestamp.now().normalize() - pd.Timedelta(days=days_old),
+    })
+
+
+def _index(jobs):
+    return rm.JobIndex(jobs, vectors=JobVectors.from_texts(rm.job_texts(jobs)))
+
+
+def test_extended_matches_a_rebuilt_index():
+    base, new = _jobs(40), _jobs(12, offset=40)
+    index = _index(base)
+    # Cached candidate masks are extended along with the index
+    index.candidates(2)
+    index.candidates(0, ["intern", "staff"])
+
+    extended = index.extended(pd.concat([new, base.iloc[:5]]))
+    full = _index(pd.concat([base, new]))
+
+    assert len(extended.jobs) == len(full.jobs) == 52
+    assert (extended.jobs["is_senior"].to_numpy() == full.jobs["is_senior"].to_numpy()).all()
+    assert (extended.jobs["min_exp"].to_numpy() == full.jobs["min_exp"].to_numpy()).all()
+    for years, terms in [(2, rm.DEFAULT_SENIOR_TERMS), (0, ["intern", "staff"]), (9, ["lead"])]:
+        assert np.array_equal(extended.candidates(years, terms, 0), full.candidates(years, terms, 0))
+    assert np.array_equal(extended.skills.ids, full.skills.ids)
+    assert np.array_equal(extended.skill_counts, full.skill_counts)
+    assert extended.extended(new) is extended
+
+
+def test_extended_keeps_the_schema():
+    index = _index(apply_schema(_jobs(40)))
+    extended = index.extended(apply_schema(_jobs(12, offset=40)))
+    dtypes = {c: t.name for c, t in index.jobs.dtypes.items()}
+    assert {c: t.name for c, t in extended.jobs.dtypes.items()} == dtypes
+    assert dtypes["company"] == "category"
+    assert "object" not in dtypes.values()
+
+
+def test_extended_keeps_idf_until_refit():
+    base, new = _jobs(40), _jobs(12, offset=40)
+    index = _index(base)
+    extended = index.extended(new)
+    assert extended.vectors.weights is index.vectors.weights
+
+    refit = extended.refit()
+    full = _index(pd.concat([base, new]))
+    rows = np.arange(52)
+    resume = "python sql statistics models"
+    assert np.allclose(refit.vectors.scores(resume, rows), full.vectors.scores(resume, rows))
+    assert extended.vectors.weights is index.vectors.weights
+
+
+def test_expired_postings_are_tombstoned(monkeypatch):
+    monkeypatch.setattr(rm, "MAX_POSTING_AGE_DAYS", 30)
+    index = _index(_jobs(20))
+    extended = index.extended(pd.concat([_jobs(4, offset=20, days_old=60), _jobs(4, offset=24)]))
+    assert not extended.vectors.alive[20:24].any()
+    assert extended.vectors.alive[24:].all()
+    assert not extended.candidates(9, [], 0)[20:24].any()
+
+    # Postings that expire later are tombstoned by the next refit
+    monkeypatch.setattr(rm, "MAX_POSTING_AGE_DAYS", 0)
+    index = _index(_jobs(20, days_old=60))
+    assert index.vectors.alive.all()
+    monkeypatch.setattr(rm, "MAX_POSTING_AGE_DAYS", 30)
+    refit = index.refit()
+    assert not refit.vectors.alive.any()
+    assert not refit.candidates(9, [], 0).any()
+    assert index.vectors.alive.all()
+
+
+@pytest.mark.parametrize("refresh", [None, lambda value: value + 1])
+def test_dataset_refreshes_aggregates(refresh):
+    dataset = Dataset(pd.DataFrame({"title": ["a"]}), "v1", 0)
+    name = "test_refresh" if refresh else "test_no_refresh"
+    dataset.aggregate(name, lambda ds: 1, refresh=refresh)
+    dataset.refresh_aggregates()
+    assert dataset.aggregate(name, lambda ds: 1) == (2 if refresh else 1)
+
+
+def test_recommend_jobs_without_candidates_is_empty(monkeypatch):
+    monkeypatch.setattr(rm, "get_job_index", lambda: _index(_jobs(20)))
+    top = rm.recommend_jobs("python sql data analyst", exp_tolerance=-5)
+    assert top.empty
+    assert "final_score" in top.columns
+
+
+def test_recommend_rejects_a_negative_exp_tolerance():
+    from src.website.app import app
+    response = app.test_client().post("/recommend", data={"exp_tolerance": "-1"})
+    assert response.status_code == 400
@@ -0,0 +1,38 @@
+import numpy as np
+
+from src.analysis.job_vectors import ARRAYS, JobVectors
+
+TEXTS = ["python sql dashboards reporting", "sql excel reporting", "python statistics models",
+         "python spark pipelines", "python pytorch models", "excel sql reporting dashboards"] * 3
+
+
+def _paths(tmp_path):
+    return {name: str(tmp_path / f"job_vectors_{name}.npy") for name in ARRAYS}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    vectors = JobVectors.from_texts(TEXTS).appended(["python sql models", "spark pipelines"])
+    vectors = vectors.removed([1, 7]).refreshed()
+    vectors.save(_paths(tmp_path))
+
+    loaded = JobVectors.load(_paths(tmp_path))
+    # Mapped read-only, not copied
+    assert not loaded.blocks[0].data.flags.writeable
+    assert loaded.n_docs == vectors.n_docs == 20
+    assert np.array_equal(loaded.alive, vectors.alive)
+    assert np.array_equal(loaded.df, vectors.df)
+    for resume in ["python sql reporting", "spark pipelines models"]:
+        assert np.allclose(loaded.scores(resume), vectors.scores(resume))
+    assert not loaded.scores("sql excel reporting")[[1, 7]].any()
+
+
+def test_loaded_vectors_can_be_extended(tmp_path):
+    vectors = JobVectors.from_texts(TEXTS).refreshed()
+    vectors.save(_paths(tmp_path))
+    loaded = JobVectors.load(_paths(tmp_path))
+
+    extended = loaded.appended(["python sql dashboards"]).removed([0]).refreshed()
+    full = JobVectors.from_texts(TEXTS + ["python sql dashboards"]).removed([0]).refreshed()
+    assert np.allclose(extended.scores("python sql"), full.scores("python sql"))
+    # The mapped arrays are never written to
+    assert np.array_equal(JobVectors.load(_paths(tmp_path)).alive, np.ones(len(TEXTS), dtype=bool))
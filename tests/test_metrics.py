@@ -0,0 +1,31 @@
+from api import metrics
+
+
+def test_label_values_are_escaped():
+    labels = metrics._labels([("route", 'a\\b"c\nd')])
+    assert labels == '{route="a\\\\b\\"c\\nd"}'
+
+
+def test_plain_label_values_are_unchanged():
+    assert metrics._labels([("method", "GET")], [("le", 0.5)]) == '{method="GET",le="0.5"}'
+
+
+def test_metrics_are_summed_across_processes(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    monkeypatch.setattr(metrics, "MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "_COUNTERS", {})
+    monkeypatch.setattr(metrics, "_HISTOGRAMS", {})
+    key = ("app_cache_requests_total", (("cache", "c"), ("result", "hit")))
+    # Another worker's flushed metrics, and one that has exited
+    metrics._write_json(str(tmp_path / "1001.json"), {}, {key: 2})
+    metrics._write_json(str(tmp_path / "1002.json"), {}, {key: 3})
+    metrics.mark_process_dead(1002)
+    assert not (tmp_path / "1002.json").exists()
+
+    metrics.count_cache("c", hit=True)
+    metrics.observe("app_request_seconds", 0.2, route="/")
+    metrics.flush(force=True)
+    hists, counters = metrics.collect()
+    assert counters[key] == 6
+    assert hists[("app_request_seconds", (("route", "/"),))][-1] == 1
+    assert 'app_cache_requests_total{cache="c",result="hit"} 6' in metrics.render()
@@ -0,0 +1,43 @@
+import glob
+import json
+import sys
+
+import pytest
+from flask import Flask
+
+from api import profiling
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(profiling, "THRESHOLD_MS", 0)
+    app = Flask(__name__)
+
+    @app.route("/ok")
+    def ok():
+        return "ok"
+
+    @app.route("/fail")
+    def fail():
+        raise RuntimeError("boom")
+
+    profiling.init_app(app)
+    return app
+
+
+def _captures(directory):
+    return [json.load(open(path)) for path in sorted(glob.glob(f"{directory}/*.json"))]
+
+
+def test_profiler_is_stopped_when_the_view_raises(app, tmp_path):
+    app.testing = True
+    with pytest.raises(RuntimeError):
+        app.test_client().get("/fail")
+    assert sys.getprofile() is None
+    [meta] = _captures(tmp_path)
+    assert meta["status"] == 500
+    assert "boom" in meta["error"]
+
+    assert app.test_client().get("/ok").status_code == 200
+    assert [m["status"] for m in _captures(tmp_path)] == [500, 200]
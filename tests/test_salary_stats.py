@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from api.salary_stats import SalarySketches, annual_midpoint
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["min_amount", "max_amount", "interval"])
+
+
+def test_annual_midpoint_converts_intervals():
+    salary = annual_midpoint(_frame([
+        (100000, 120000, "yearly"),
+        (40, 60, "hourly"),
+        (5000, 7000, "monthly"),
+        (None, 50000, "yearly"),
+        (50000, 70000, None),
+    ]))
+    assert np.allclose(salary[:3], [110000, 104000, 72000])
+    assert np.isnan(salary[3:]).all()
+
+
+def test_yearly_amounts_under_a_shorter_interval_are_taken_as_yearly():
+    salary = annual_midpoint(_frame([
+        (191360, 291200, "hourly"),
+        (31200, 72800, "hourly"),
+        (63288, 92208, "monthly"),
+    ]))
+    assert np.allclose(salary, [241280, 52000, 77748])
+
+
+def test_implausible_amounts_are_dropped():
+    salary = annual_midpoint(_frame([
+        (1, 5, "hourly"),
+        (2_000_000, 3_000_000, "yearly"),
+        (0, 0, "yearly"),
+    ]))
+    assert np.isnan(salary).all()
+
+
+def test_sketches_only_see_plausible_salaries():
+    frame = _frame([
+        (100000, 120000, "yearly"),
+        (191360, 291200, "hourly"),
+        (1, 5, "hourly"),
+        (2_000_000, 3_000_000, "yearly"),
+    ])
+    frame["state"] = "Texas"
+    sketches = SalarySketches.from_frame(frame)
+    summary = sketches.summary(sketches.select(), [0.5])
+    assert summary["count"] == 2
+    assert summary["max"] == 241280
+    assert summary["min"] == 110000
+
+
+def _postings(n, seed):
+    rng = np.random.default_rng(seed)
+    low = rng.integers(40, 200, n) * 1000.0
+    return pd.DataFrame({
+        "min_amount": low,
+        "max_amount": low + 20000,
+        "interval": rng.choice(["yearly", "yearly", "hourly"], n),
+        "state": rng.choice(["Texas", "New York", None], n),
+        "role": rng.choice(["Data Analyst", "Data Scientist"], n),
+        "is_remote": rng.choice([True, False], n),
+    })
+
+
+def test_merge_matches_sketches_of_all_rows():
+    first, second = _postings(300, 1), _postings(200, 2)
+    # Segments only present in the second part are added
+    second.loc[:20, "role"] = "Product Manager"
+    merged = SalarySketches.from_frame(first).merge(SalarySketches.from_frame(second))
+    full = SalarySketches.from_frame(pd.concat([first, second], ignore_index=True))
+
+    assert merged.n_rows == full.n_rows == 500
+    assert len(merged.n) == len(full.n)
+    for filters in [{}, {"state": "Texas"}, {"role": "Product Manager"},
+                    {"state": "New York", "role": "Data Analyst", "remote": True}]:
+        assert merged.summary(merged.select(**filters)) == full.summary(full.select(**filters))
+
+
+def test_merge_with_no_salaries_is_unchanged():
+    sketches = SalarySketches.from_frame(_postings(100, 3))
+    merged = sketches.merge(SalarySketches.from_frame(_frame([(None, None, None)])))
+    assert merged.n_rows == 101
+    assert merged.summary() == sketches.summary()
+
+
+def test_save_and_load_round_trip(tmp_path):
+    sketches = SalarySketches.from_frame(_postings(100, 4))
+    sketches.save(tmp_path / "salary.npz")
+    loaded = SalarySketches.load(tmp_path / "salary.npz")
+    assert loaded.n_rows == 100
+    assert loaded.summary(loaded.select(state="TX")) == sketches.summary(sketches.select(state="Texas"))
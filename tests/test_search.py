@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from api.search import SearchIndex, parse_query
+
+
+@pytest.fixture(scope="module")
+def index():
+    return SearchIndex(pd.DataFrame({
+        "title": ["Data Analyst", "Machine Learning Engineer", "Software Engineer"],
+        "company": ["Acme", "Globex", "Initech"],
+        "parsed_skills": ["sql, excel", "python, pytorch", "c++, python"],
+        "description": ["Reporting in SQL.", "Train machine learning models.", "Write C++ services."],
+    }))
+
+
+@pytest.mark.parametrize("query", ["", "!!!", '""', "  -- ? "])
+def test_query_without_words_matches_nothing(index, query):
+    assert parse_query(query) == []
+    rows, scores, total = index.search(query)
+    assert total == 0
+    assert len(rows) == 0 and len(scores) == 0
+
+
+def test_query_matches_every_clause(index):
+    rows, _, total = index.search("python")
+    assert total == 2
+    assert sorted(rows.tolist()) == [1, 2]
+    rows, _, total = index.search('"machine learning" python')
+    assert total == 1
+    assert rows.tolist() == [1]
+
+
+def test_state_filter_accepts_names_and_codes():
+    index = SearchIndex(pd.DataFrame({
+        "title": ["Data Analyst", "Data Analyst", "Data Analyst"],
+        "state": ["Texas", None, "California"],
+        "location": ["Austin, TX", "Dallas, TX", "Remote"],
+        "description": ["sql", "sql", "sql"],
+    }))
+    for state in ["TX", "tx", "Texas"]:
+        assert sorted(index.search("sql", state=state)[0].tolist()) == [0, 1]
+    assert index.search("sql", state="CA")[0].tolist() == [2]
+
+
+def test_saved_index_searches_the_same(index, tmp_path):
+    path = tmp_path / "search_index.npz"
+    index.save(path)
+    frame = pd.DataFrame({"title": ["Data Analyst", "Machine Learning Engineer", "Software Engineer"]})
+    loaded = SearchIndex.load(path, frame)
+    assert loaded.vocab == index.vocab
+    for query in ["python", '"machine learning" python', "c++"]:
+        rows, scores, total = loaded.search(query)
+        expected = index.search(query)
+        assert rows.tolist() == expected[0].tolist() and total == expected[2]
+        assert np.allclose(scores, expected[1])
+    assert sorted(loaded.search("python", role="engineer")[0].tolist()) == [1, 2]
+    with pytest.raises(ValueError):
+        SearchIndex.load(path, frame.iloc[:2])
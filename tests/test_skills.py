@@ -0,0 +1,61 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from api.skills import ID_DTYPES, SkillMatrix, encode_skills, listed_counts, parse_ids, skill_id, skill_names
+from src.analysis.job_vectors import JobVectors
+from src.analysis.recommendation_model import JobIndex, job_texts
+
+
+def test_parse_ids_accepts_a_lone_id_read_as_a_number():
+    assert parse_ids(42.0).tolist() == [42]
+    assert parse_ids(42).tolist() == [42]
+    assert parse_ids("3 17 42").tolist() == [3, 17, 42]
+    assert parse_ids(float("nan")).tolist() == []
+
+
+def test_id_columns_are_read_as_text():
+    csv = "parsed_skill_ids,parsed_skills\n42,python\n,\n"
+    df = pd.read_csv(io.StringIO(csv), dtype=ID_DTYPES)
+    skills = SkillMatrix.from_columns(df["parsed_skill_ids"], df["parsed_skills"])
+    assert skills.row(0).tolist() == [42]
+    assert len(skills.row(1)) == 0
+
+
+def test_skill_names_are_normalized():
+    assert skill_names([skill_id("Communication")]) == ["communication"]
+    assert skill_names([skill_id("AWS")]) == ["aws"]
+    assert skill_names([skill_id("project management")]) == ["project management"]
+
+
+def test_listed_counts_ignore_case_repeats_and_blanks():
+    names = pd.Series(["Python, python , ,SQL", None, "", "excel", 42])
+    assert listed_counts(names).tolist() == [2, 0, 0, 1, 1]
+    assert listed_counts(None, 3).tolist() == [0, 0, 0]
+
+
+def test_skill_score_counts_skills_outside_the_vocabulary():
+    jobs = pd.DataFrame({
+        "title": ["Data Analyst", "Data Analyst"],
+        "skills": ["python, sql, underwater basket weaving", None],
+        "description": ["python and sql", "excel"],
+        "min_exp": [0, 0],
+    })
+    assert listed_counts(jobs["skills"]).tolist() == [3, 0]
+    index = JobIndex(jobs, vectors=JobVectors.from_texts(job_texts(jobs)))
+    scores = index.skill_scores(encode_skills(["Python", "SQL"]), np.array([0, 1]))
+    assert np.allclose(scores, [2 / 3, 0.0])
+
+
+def test_job_index_uses_the_stored_skill_count():
+    jobs = pd.DataFrame({
+        "title": ["Data Analyst"],
+        "skills": ["python, sql"],
+        "skill_count": [4],
+        "description": ["python and sql"],
+        "min_exp": [0],
+    })
+    index = JobIndex(jobs, vectors=JobVectors.from_texts(job_texts(jobs)))
+    assert index.skill_counts.tolist() == [4]
+    assert np.allclose(index.skill_scores(encode_skills(["python"]), np.array([0])), [0.25])
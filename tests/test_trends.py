@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from api.trends import TrendStore
+
+DATES = pd.to_datetime(["2025-01-01", "2025-01-01", "2025-01-03", "2025-01-06", None, "2025-01-14"])
+
+
+def test_daily_series_leaves_out_days_without_postings():
+    store = TrendStore(DATES)
+    series = store.series(store.daily_counts())
+    assert series == {"date": ["2025-01-01", "2025-01-03", "2025-01-06", "2025-01-14"],
+                      "postings": [2, 1, 1, 1]}
+
+    dense = store.series(store.daily_counts(), dense=True)
+    assert len(dense["date"]) == 14
+    assert dense["postings"][:3] == [2, 0, 1]
+
+
+def test_rolling_average_counts_empty_periods():
+    store = TrendStore(DATES)
+    series = store.series(store.daily_counts(), window=2)
+    # Jan 3 follows an empty Jan 2, Jan 14 an empty Jan 13
+    assert series["rolling"] == [None, 0.5, 0.5, 0.5]
+
+
+def test_weekly_series():
+    store = TrendStore(DATES)
+    series = store.series(store.daily_counts(), freq="week", growth=True)
+    assert series["date"] == ["2024-12-30", "2025-01-06", "2025-01-13"]
+    assert series["postings"] == [3, 1, 1]
+    assert series["growth"] == [None, round(-2 / 3, 4), 0.0]
+
+
+def test_extended_matches_a_full_build():
+    buckets = {"all": np.arange(len(DATES)), "early": np.array([0, 1, 2])}
+    old = TrendStore(DATES[:3], {k: v[v < 3] for k, v in buckets.items()})
+    new = pd.to_datetime(["2024-12-30", "2025-01-20", None])
+    extended = old.extended(new, {"all": np.arange(3), "late": np.array([1])})
+
+    dates = DATES[:3].append(new)
+    full = TrendStore(dates, {"all": np.arange(6), "early": np.array([0, 1, 2]), "late": np.array([4])})
+    assert extended.days.equals(full.days)
+    assert np.array_equal(extended.day_index, full.day_index)
+    assert extended.counts.keys() == full.counts.keys()
+    for key, counts in full.counts.items():
+        assert np.array_equal(extended.counts[key], counts)